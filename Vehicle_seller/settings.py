@@ -47,6 +47,7 @@ SHARED_APPS = [
     'django.contrib.sites',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -62,6 +63,7 @@ DATABASE_ROUTERS = ['django_tenants.routers.TenantSyncRouter']
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 MIDDLEWARE = [
+    'dealership.request_log.RequestLogMiddleware',  # First, so its timing covers the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -80,10 +82,11 @@ AUTHENTICATION_BACKENDS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'accounts.authentication.CustomSessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.TenantJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
+        'accounts.authz.PermissionOrGroup',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -92,6 +95,17 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Tenant-scoped JWTs (accounts.tokens): claims carry schema, groups and perms
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 5))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 1))),
+    'ROTATE_REFRESH_TOKENS': True,
+    'AUTH_TOKEN_CLASSES': ('accounts.tokens.TenantAccessToken',),
+    'TOKEN_USER_CLASS': 'accounts.tokens.TenantTokenUser',
+}
+# Resolve the tenant from the bearer token's schema claim before the header/host strategies
+TENANT_JWT_RESOLUTION = os.getenv('TENANT_JWT_RESOLUTION', 'True') == 'True'
+
 # Update CORS settings for production
 if ENVIRONMENT == 'production':
     CORS_ALLOWED_ORIGINS = [
@@ -149,7 +163,48 @@ CORS_ALLOW_HEADERS = [
     'x-tenant-domain',  # Add custom tenant header
 ]
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Cache: Redis when REDIS_URL is set, otherwise a database table (manage.py createcachetable).
+# Invalidation of tenants, sessions, tokens and permissions relies on every worker sharing it,
+# so there is no per-process fallback.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('DATABASE_CACHE_MAX_ENTRIES', 100000))},
+        }
+    }
+
+# Hostname/schema -> tenant resolution cache (tenants.cache)
+TENANT_CACHE_TTL = int(os.getenv('TENANT_CACHE_TTL', 300))  # Shared layer, seconds
+TENANT_CACHE_LOCAL_TTL = int(os.getenv('TENANT_CACHE_LOCAL_TTL', 30))  # Per-process LRU, seconds
+TENANT_CACHE_MAX_ENTRIES = int(os.getenv('TENANT_CACHE_MAX_ENTRIES', 512))
+
+# Pre-migrated schema that new tenants are cloned from (tenants.provisioning)
+TENANT_TEMPLATE_SCHEMA = os.getenv('TENANT_TEMPLATE_SCHEMA', 'tenant_template')
+
+# Per-user group names and permissions for view authorization (accounts.authz)
+AUTHZ_CACHE_TTL = int(os.getenv('AUTHZ_CACHE_TTL', 300))  # Seconds
+
+# One JSON record per request (dealership.request_log). Server errors and slow requests are always logged
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 1.0))  # Fraction of other requests
+REQUEST_LOG_SLOW_MS = int(os.getenv('REQUEST_LOG_SLOW_MS', 1000))
+
+# Pre-rendered per-tenant catalogue documents (dealership.catalogue)
+CATALOGUE_SNAPSHOT_TTL = int(os.getenv('CATALOGUE_SNAPSHOT_TTL', 86400))
+
+# Sessions are read through Redis and written through to the database. With the database cache
+# that would only add a second query, so sessions are then read from their table directly
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + ('cached_db' if REDIS_URL else 'db')
+SESSION_USER_CACHE_TTL = int(os.getenv('SESSION_USER_CACHE_TTL', 60))  # accounts.authentication
 SESSION_COOKIE_SAMESITE = 'None'
 SESSION_COOKIE_AGE = 1209600
 
@@ -163,12 +218,25 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'dealership.request_log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'dealership.request_log.RequestContextFilter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'requests': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+            'filters': ['request_context'],
+        },
     },
     'loggers': {
         'tenants': {
@@ -181,6 +249,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'dealership.requests': {
+            'handlers': ['requests'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
 
@@ -219,6 +292,14 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Unreferenced content-addressed media written this recently is kept (dealership.media)
+MEDIA_GC_GRACE_SECONDS = int(os.getenv('MEDIA_GC_GRACE_SECONDS', 3600))
+
+# Resumable chunked uploads (dealership.uploads); the staging directory must be shared by all web processes
+UPLOAD_STAGING_ROOT = os.getenv('UPLOAD_STAGING_ROOT', os.path.join(BASE_DIR, 'upload_staging'))
+UPLOAD_PART_SIZE = int(os.getenv('UPLOAD_PART_SIZE', 5 * 1024 * 1024))
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 500 * 1024 * 1024))
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv('UPLOAD_SESSION_TTL_SECONDS', 86400))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
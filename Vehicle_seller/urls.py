@@ -21,9 +21,14 @@ from django.conf.urls.static import static
 from django.urls import path, include
 from accounts import views as account_views
 from django.http import JsonResponse  # You should add this if not already
+from tenants.cache import tenant_cache
 
 def health_check(request):
-    return JsonResponse({"status": "Running", "message": "Welcome to Vehicle Seller API"})
+    return JsonResponse({
+        "status": "Running",
+        "message": "Welcome to Vehicle Seller API",
+        "tenant_cache": tenant_cache.stats(),
+    })
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.utils.translation import gettext_lazy as _
-from accounts.models import CustomUser
+from accounts.models import CustomUser, UserTenantIndex
 
 class CustomUserChangeForm(UserChangeForm):
     class Meta(UserChangeForm.Meta):
@@ -47,4 +47,16 @@ admin.site.unregister(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
-    filter_horizontal = ('permissions',)  # This gives you the two-pane permissions interface
\ No newline at end of file
+    filter_horizontal = ('permissions',)  # This gives you the two-pane permissions interface
+
+
+@admin.register(UserTenantIndex)
+class UserTenantIndexAdmin(admin.ModelAdmin):
+    """Read-only view of the login index; rows are maintained from CustomUser writes."""
+    list_display = ('username', 'email', 'tenant', 'user_id')
+    list_filter = ('tenant',)
+    search_fields = ('username', 'email')
+    readonly_fields = ('username', 'email', 'tenant', 'user_id')
+
+    def has_add_permission(self, request):
+        return False
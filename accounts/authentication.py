@@ -1,44 +1,116 @@
 # accounts/authentication.py
+from importlib import import_module
 from rest_framework.authentication import SessionAuthentication
 from rest_framework import exceptions
-from django.contrib.sessions.models import Session
-from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.conf import settings
+from django.contrib.auth import get_user_model, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from .tokens import TenantTokenUser, TENANT_SCHEMA_CLAIM
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+
+def session_user_cache_key(user_id):
+    return f"accounts:session-user:{user_id}"
+
+
+def invalidate_session_user(user_id):
+    cache.delete(session_user_cache_key(user_id))
+
+
+def get_session_user(session_key):
+    """
+    Resolve the user behind a session key without touching the database in
+    steady state: session data comes from the cache-backed session store and
+    the user row from a short-lived cache entry. The entry is keyed by user id
+    so a user change drops it for every session that user has open; logging
+    out deletes the session itself.
+    """
+    session = SessionStore(session_key=session_key)
+    user_id = session.get(SESSION_KEY)
+    if not user_id:
+        return None
+
+    key = session_user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, getattr(settings, 'SESSION_USER_CACHE_TTL', 60))
+
+    # Same check django.contrib.auth.get_user makes: a password change
+    # invalidates sessions created before it
+    session_hash = session.get(HASH_SESSION_KEY)
+    if session_hash and not constant_time_compare(session_hash, user.get_session_auth_hash()):
+        logger.warning(f"Session auth hash mismatch for user {user.username}")
+        return None
+
+    return user
+
+
 class CustomSessionAuthentication(SessionAuthentication):
     def authenticate(self, request):
         # Use default session auth for admin paths
         if request.path.startswith('/admin/'):
             return super().authenticate(request)
 
-        # Try standard session authentication first
-        auth_result = super().authenticate(request)
-        if auth_result:
-            return auth_result
-
-        # Fallback to custom session header
+        # The custom session header takes precedence; it is served from cache
         session_id = request.META.get('HTTP_X_SESSION_ID')
         if not session_id:
-            return None
+            # Fall back to standard (cookie) session authentication
+            return super().authenticate(request)
 
         logger.debug(f"Authenticating with session ID: {session_id}")
-        try:
-            session = Session.objects.get(session_key=session_id)
-            session_data = session.get_decoded()
-            user_id = session_data.get('_auth_user_id')
-            if not user_id:
-                return None
-
-            user = User.objects.get(id=user_id)
-            if hasattr(request, 'tenant') and user.tenant != request.tenant:
-                logger.warning(f"Invalid tenant access for user {user.username}")
-                raise exceptions.AuthenticationFailed('Invalid tenant access')
-
-            logger.debug(f"Authenticated user: {user.username}")
-            return (user, None)
-        except (Session.DoesNotExist, User.DoesNotExist) as e:
-            logger.warning(f"Session authentication failed: {str(e)}")
-            return None
\ No newline at end of file
+        user = get_session_user(session_id)
+        if user is None or not user.is_active:
+            logger.warning("Session authentication failed: no active user for session")
+            return super().authenticate(request)
+
+        if hasattr(request, 'tenant') and user.tenant_id != request.tenant.id:
+            logger.warning(f"Invalid tenant access for user {user.username}")
+            raise exceptions.AuthenticationFailed('Invalid tenant access')
+
+        logger.debug(f"Authenticated user: {user.username}")
+        return (user, None)
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication for tenant-scoped tokens. Tokens carrying tenant claims
+    authenticate as a stateless TenantTokenUser, so no user or permission
+    queries are made per request; older tokens without claims still load the
+    user from the database.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Reuse the token already verified by HeaderTenantMiddleware
+        cached = getattr(request, 'validated_jwt', None)
+        if cached and cached[0] == raw_token.decode():
+            validated_token = cached[1]
+        else:
+            validated_token = self.get_validated_token(raw_token)
+
+        user = self.get_user(validated_token)
+        if isinstance(user, TenantTokenUser) and hasattr(request, 'tenant') and user.tenant_id != request.tenant.id:
+            logger.warning(f"Invalid tenant access for token user {user.username}")
+            raise exceptions.AuthenticationFailed('Invalid tenant access')
+        return (user, validated_token)
+
+    def get_user(self, validated_token):
+        if TENANT_SCHEMA_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return TenantTokenUser(validated_token)
@@ -0,0 +1,127 @@
+# accounts/authz.py
+"""
+Cached authorization checks.
+
+get_authorization(user) returns the user's group names and permissions
+("app_label.codename"), so a view can check both without a query. A token
+user carries them as claims. For a session user they are loaded once with
+two queries and kept in Django's cache. The cache key combines the user id
+with a generation token. The entry is also memoised on the user object
+for the rest of the request.
+
+accounts.signals drops a user's entry when their groups or permissions
+change. It replaces the generation, which drops every entry, when a
+group's permissions change or a group or permission is deleted. This only
+reaches every worker if the cache is shared; accounts.checks warns about
+a per-process default cache.
+"""
+import uuid
+from collections import namedtuple
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.permissions import BasePermission
+import logging
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'accounts:authz:generation'
+STAFF_GROUPS = ('sub-admins', 'salesperson')
+
+
+class Authorization(namedtuple('Authorization', 'is_active is_superuser groups permissions')):
+    """Same answers as ModelBackend.has_perm, from preloaded sets."""
+
+    def has_perm(self, perm):
+        return self.is_active and (self.is_superuser or perm in self.permissions)
+
+    def in_group(self, names):
+        return not self.groups.isdisjoint(names)
+
+
+ANONYMOUS = Authorization(False, False, frozenset(), frozenset())
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _cache_key(user_id, generation=None):
+    return f"accounts:authz:{generation or _generation()}:{user_id}"
+
+
+def invalidate_authorization(user_ids):
+    generation = _generation()
+    cache.delete_many([_cache_key(user_id, generation) for user_id in user_ids])
+
+
+def invalidate_all_authorizations():
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+    logger.debug("Authorization cache invalidated")
+
+
+def load_authorization(user):
+    """(group names, permissions) of ``user`` from the database."""
+    groups = frozenset(user.groups.values_list('name', flat=True))
+    permissions = frozenset(
+        f"{app_label}.{codename}"
+        for app_label, codename in Permission.objects
+        .filter(Q(user=user) | Q(group__user=user))
+        .values_list('content_type__app_label', 'codename').distinct()
+    )
+    return groups, permissions
+
+
+def get_authorization(user):
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    authorization = getattr(user, '_authorization', None)
+    if authorization is not None:
+        return authorization
+
+    if hasattr(user, 'permission_codenames'):
+        # Token user: the claims are already loaded
+        groups, permissions = user.group_names, user.permission_codenames
+    else:
+        key = _cache_key(user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            cached = load_authorization(user)
+            cache.set(key, cached, getattr(settings, 'AUTHZ_CACHE_TTL', 300))
+        groups, permissions = cached
+
+    authorization = Authorization(user.is_active, user.is_superuser, frozenset(groups), frozenset(permissions))
+    user._authorization = authorization
+    return authorization
+
+
+def has_perm_or_group(user, perm, groups=STAFF_GROUPS):
+    """True if ``user`` has ``perm`` or belongs to any of ``groups``."""
+    authorization = get_authorization(user)
+    return authorization.has_perm(perm) or authorization.in_group(groups)
+
+
+class PermissionOrGroup(BasePermission):
+    """
+    Checks a view's ``required_permissions``, a dict of HTTP method ->
+    (permission, denial message). The request passes if the user has the
+    permission or belongs to one of the view's ``permission_groups``
+    (STAFF_GROUPS by default). Methods not listed are allowed. Denials are
+    rendered as {"error": message}.
+    """
+
+    def has_permission(self, request, view):
+        method = 'GET' if request.method == 'HEAD' else request.method
+        rule = getattr(view, 'required_permissions', {}).get(method)
+        if rule is None:
+            return True
+        perm, message = rule
+        if has_perm_or_group(request.user, perm, getattr(view, 'permission_groups', STAFF_GROUPS)):
+            return True
+        self.message = {'error': message}
+        return False
@@ -0,0 +1,206 @@
+# accounts/bulk_users.py
+"""
+Bulk user provisioning for one tenant.
+
+Rows come from a JSON list or a CSV file. Each row is validated with
+BulkUserSerializer, and usernames are checked against earlier rows and,
+with one query, the database. Group names and permission codenames are
+resolved with one query each. The passwords of the valid rows are then
+hashed in a pool of worker processes, because each PBKDF2 hash costs a few
+hundred milliseconds of CPU. Users, group memberships and permissions are
+written with three bulk_create calls in one transaction.
+
+bulk_create skips the post_save signals, so the login index is written
+with index_users(). New users have no sessions or tokens to invalidate.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .models import CustomUser
+from .serializers import BulkUserSerializer
+from .user_index import index_users
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERMISSION_APP = 'dealership'  # Tenant users may only be given dealership permissions
+LIST_FIELDS = ('groups', 'permissions')
+HASH_POOL_MIN_PASSWORDS = 16  # Below this, starting the pool costs more than it saves
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkUserFileError(ValueError):
+    """The uploaded file cannot be read as a list of users."""
+
+
+def _clean_row(data):
+    row = {}
+    for column, value in data.items():
+        column = str(column or '').strip().lower().replace(' ', '_')
+        if isinstance(value, str):
+            value = value.strip()
+            if column in LIST_FIELDS:
+                value = [item.strip() for item in value.split(';') if item.strip()]
+        if column and value not in (None, ''):
+            row[column] = value
+    return row
+
+
+def rows_from_list(data):
+    """(row number, row) pairs from a list of user objects, as sent to the API."""
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise BulkUserFileError("Expected a list of user objects")
+    return [(row_number, _clean_row(row)) for row_number, row in enumerate(data, start=1)]
+
+
+def read_user_rows(fileobj, filename):
+    """
+    (row number, row) pairs from a CSV file (groups and permissions
+    separated by ";") or a JSON list of objects.
+    """
+    name = filename.lower()
+    if name.endswith('.json'):
+        try:
+            data = json.load(fileobj)
+        except ValueError as e:
+            raise BulkUserFileError(f"Invalid JSON: {e}")
+        return rows_from_list(data)
+    if not name.endswith('.csv'):
+        raise BulkUserFileError("Only .csv and .json files can be imported")
+    reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+    if not reader.fieldnames:
+        raise BulkUserFileError("The file has no header row")
+    # The header is row 1, so data rows are numbered as a spreadsheet shows them
+    return [(row_number, _clean_row(row)) for row_number, row in enumerate(reader, start=2)]
+
+
+def hash_passwords(passwords, processes=None):
+    """make_password() for each of ``passwords``, in a process pool for large batches."""
+    processes = min(processes or os.cpu_count() or 1, len(passwords))
+    if processes <= 1 or len(passwords) < HASH_POOL_MIN_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    # Hashing is pure CPU, so it scales with processes rather than threads
+    pool = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+    with pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (processes * 4))))
+
+
+class UserBatch:
+    """Validation state and report of one provision_users() call."""
+
+    def __init__(self):
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def validate(self, rows):
+        serializer = BulkUserSerializer()
+        valid = []
+        for row_number, data in rows:
+            try:
+                valid.append((row_number, serializer.run_validation(data)))
+            except ValidationError as e:
+                self.add_error(row_number, as_serializer_error(e))
+        return valid
+
+    def resolve(self, valid):
+        """Drop rows with a taken username or an unknown group or permission."""
+        usernames = {attrs['username'] for _, attrs in valid}
+        existing = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+        groups = dict(Group.objects
+                      .filter(name__in={name for _, attrs in valid for name in attrs['groups']})
+                      .values_list('name', 'pk'))
+        codenames = {code.split('.')[-1] for _, attrs in valid for code in attrs['permissions']}
+        permissions = dict(Permission.objects
+                           .filter(content_type__app_label=PERMISSION_APP, codename__in=codenames)
+                           .values_list('codename', 'pk'))
+
+        seen = set()
+        resolved = []
+        for row_number, attrs in valid:
+            errors = {}
+            if attrs['username'] in existing:
+                errors['username'] = ["A user with that username already exists."]
+            elif attrs['username'] in seen:
+                errors['username'] = ["Duplicate username earlier in the list."]
+            unknown = [name for name in attrs['groups'] if name not in groups]
+            if unknown:
+                errors['groups'] = [f"Unknown group(s): {', '.join(unknown)}"]
+            unknown = [code for code in attrs['permissions'] if code.split('.')[-1] not in permissions]
+            if unknown:
+                errors['permissions'] = [f"Unknown {PERMISSION_APP} permission(s): {', '.join(unknown)}"]
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+            seen.add(attrs['username'])
+            attrs['group_ids'] = {groups[name] for name in attrs['groups']}
+            attrs['permission_ids'] = {permissions[code.split('.')[-1]] for code in attrs['permissions']}
+            resolved.append((row_number, attrs))
+        return resolved
+
+
+def provision_users(tenant, rows, processes=None):
+    """
+    Create the users described by ``rows`` ((row number, data) pairs) in
+    ``tenant``. Invalid rows are reported and skipped; the valid ones are
+    written together or not at all.
+    """
+    started = time.monotonic()
+    batch = UserBatch()
+    valid = batch.resolve(batch.validate(rows))
+    hashed = hash_passwords([attrs['password'] for _, attrs in valid], processes)
+
+    users = [
+        CustomUser(
+            username=attrs['username'], email=attrs['email'], password=password,
+            first_name=attrs['first_name'], last_name=attrs['last_name'],
+            tenant=tenant, is_tenant_admin=attrs['is_tenant_admin'],
+        )
+        for (_, attrs), password in zip(valid, hashed)
+    ]
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+            index_users(users)
+            CustomUser.groups.through.objects.bulk_create([
+                CustomUser.groups.through(customuser_id=user.pk, group_id=group_id)
+                for user, (_, attrs) in zip(users, valid) for group_id in attrs['group_ids']
+            ])
+            CustomUser.user_permissions.through.objects.bulk_create([
+                CustomUser.user_permissions.through(customuser_id=user.pk, permission_id=permission_id)
+                for user, (_, attrs) in zip(users, valid) for permission_id in attrs['permission_ids']
+            ])
+    except IntegrityError as e:
+        # Another writer took one of the usernames since resolve()
+        for row_number, _ in valid:
+            batch.add_error(row_number, {"non_field_errors": [str(e).splitlines()[0]]})
+        users = []
+
+    seconds = round(time.monotonic() - started, 3)
+    logger.info(f"Created {len(users)} user(s) for tenant {tenant.schema_name} in {seconds}s")
+    return {
+        "rows": len(rows),
+        "created": len(users),
+        "failed": batch.failed,
+        "errors": sorted(batch.errors, key=lambda error: error['row']),
+        "users": [{"id": user.pk, "username": user.username} for user in users],
+        "seconds": seconds,
+    }
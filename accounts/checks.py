@@ -0,0 +1,20 @@
+# accounts/checks.py
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries are private to one process
+PER_PROCESS_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Cached authorizations, sessions and token revocations are invalidated through the default cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        f"The default cache ({backend}) is not shared between processes.",
+        hint="Permission changes, logouts and token revocations will not reach other workers. "
+             "Use Redis (REDIS_URL) or the database cache.",
+        id='accounts.W001',
+    )]
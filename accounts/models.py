@@ -25,4 +25,22 @@ class CustomUser(AbstractUser):
                 pass
             else:
                 raise ValueError("Superadmin must be in public schema or have no tenant.")
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class UserTenantIndex(models.Model):
+    """
+    Public-schema lookup table mapping a username (and email) to the tenant
+    the user belongs to, so login can resolve the tenant with one query
+    instead of visiting every schema.
+    """
+    username = models.CharField(max_length=150, unique=True)
+    email = models.EmailField(blank=True, db_index=True)  # Stored lowercased
+    user_id = models.BigIntegerField(db_index=True)
+    tenant = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name='user_index'
+    )
+
+    def __str__(self):
+        return f"{self.username} -> {self.tenant_id}"
@@ -5,3 +5,15 @@ class CustomUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'username', 'email', 'tenant', 'is_tenant_admin']
+
+
+class BulkUserSerializer(serializers.Serializer):
+    """One row of a bulk user upload; see accounts.bulk_users."""
+    username = serializers.CharField(max_length=150, validators=[CustomUser.username_validator])
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    is_tenant_admin = serializers.BooleanField(required=False, default=False)
+    groups = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    permissions = serializers.ListField(child=serializers.CharField(), required=False, default=list)
@@ -0,0 +1,102 @@
+# accounts/signals.py
+from django.contrib.auth.signals import user_logged_out
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import CustomUser
+from .user_index import index_user, unindex_user
+from .authentication import invalidate_session_user
+from .authz import invalidate_authorization, invalidate_all_authorizations
+from .tokens import revoke_user_tokens
+
+INDEXED_FIELDS = {'username', 'email', 'tenant', 'tenant_id'}
+
+
+@receiver(post_save, sender=CustomUser)
+def sync_user_tenant_index(sender, instance, raw=False, **kwargs):
+    """Keep the login index current for every user write (API, command, admin)."""
+    if raw:
+        return
+    # Saves such as login()'s last_login update cannot change the index
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_user(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_user_tenant_index(sender, instance, **kwargs):
+    unindex_user(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def drop_cached_session_user(sender, instance, **kwargs):
+    invalidate_session_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def drop_cached_session_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_session_user(user.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def revoke_stale_token_claims(sender, instance, raw=False, created=False, **kwargs):
+    """Access tokens embed user flags; force a refresh after the user changes."""
+    update_fields = kwargs.get('update_fields')
+    if raw or created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    # Token users are served from claims, so nothing else notices the user is gone
+    revoke_user_tokens(instance.pk)
+
+
+# Membership is read before a clear, after an add or remove
+TOKEN_REVOKING_ACTIONS = {'post_add', 'post_remove', 'pre_clear'}
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def revoke_tokens_on_permission_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in TOKEN_REVOKING_ACTIONS:
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set is None:
+        user_ids = instance.user_set.values_list('pk', flat=True)
+    else:
+        user_ids = pk_set
+    user_ids = list(user_ids)
+    for user_id in user_ids:
+        revoke_user_tokens(user_id)
+    # After commit, so other processes cannot re-cache the old rows
+    transaction.on_commit(lambda: invalidate_authorization(user_ids))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def revoke_group_member_tokens(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in TOKEN_REVOKING_ACTIONS:
+        return
+    if not reverse:
+        groups = [instance.pk]
+    elif pk_set is None:
+        groups = instance.group_set.values_list('pk', flat=True)
+    else:
+        groups = pk_set
+    user_ids = CustomUser.objects.filter(groups__in=list(groups)).values_list('pk', flat=True).distinct()
+    for user_id in user_ids:
+        revoke_user_tokens(user_id)
+    transaction.on_commit(invalidate_all_authorizations)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def drop_cached_authorizations(sender, **kwargs):
+    # Cascaded membership rows are deleted without m2m_changed
+    transaction.on_commit(invalidate_all_authorizations)
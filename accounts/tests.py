@@ -1,3 +1,309 @@
-from django.test import TestCase
+import io
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django_tenants.test.cases import TenantTestCase
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.exceptions import TokenError
 
-# Create your tests here.
+from dealership.tests import data_queries
+from dealership.views import DeleteVehicleAPIView
+from tenants.middleware_custom import HeaderTenantMiddleware
+from tenants.models import Client
+from .authentication import CustomSessionAuthentication, SessionStore, TenantJWTAuthentication, get_session_user
+from .authz import get_authorization, has_perm_or_group
+from .bulk_users import read_user_rows
+from .checks import check_shared_cache
+from .models import CustomUser, UserTenantIndex
+from .tokens import TenantAccessToken, TenantRefreshToken, TenantTokenUser
+from .user_index import find_login_entry
+from .views import (bulk_create_tenant_users, get_access_token, logout_user, refresh_access_token,
+                    revoke_access_token)
+
+
+class AccountsTestCase(TenantTestCase):
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Test Dealership'
+
+    def other_tenant(self, schema_name='other_dealership'):
+        # The tenant row is enough for the public-schema tables, so skip creating its schema
+        tenant = Client(schema_name=schema_name, name='Other Dealership')
+        tenant.auto_create_schema = False
+        connection.set_schema_to_public()
+        try:
+            tenant.save()
+        finally:
+            connection.set_tenant(self.tenant)
+        return tenant
+
+    def start_session(self, user):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
+
+
+class UserTenantIndexTests(AccountsTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='index-user', email='Index.User@example.com', password='x', tenant=self.tenant,
+        )
+
+    def test_login_by_username_or_email(self):
+        self.assertEqual(find_login_entry('index-user').user_id, self.user.pk)
+        entry = find_login_entry('index.user@EXAMPLE.com')
+        self.assertEqual((entry.user_id, entry.tenant.pk), (self.user.pk, self.tenant.pk))
+        self.assertIsNone(find_login_entry('nobody'))
+
+    def test_shared_email_is_ambiguous_but_username_still_wins(self):
+        other = CustomUser.objects.create_user(
+            username='index.user@example.com', email='index.user@example.com', password='x', tenant=self.tenant,
+        )
+        self.assertEqual(find_login_entry('index.user@example.com').user_id, other.pk)
+
+        CustomUser.objects.create_user(username='second', email='shared@example.com', password='x', tenant=self.tenant)
+        CustomUser.objects.create_user(username='third', email='shared@example.com', password='x', tenant=self.tenant)
+        self.assertIsNone(find_login_entry('shared@example.com'))
+
+    def test_index_follows_tenant_change_rename_and_delete(self):
+        other = self.other_tenant()
+        self.user.tenant = other
+        self.user.username = 'renamed-user'
+        self.user.save()
+        entry = UserTenantIndex.objects.get(user_id=self.user.pk)
+        self.assertEqual((entry.username, entry.tenant_id), ('renamed-user', other.pk))
+        self.assertIsNone(find_login_entry('index-user'))
+
+        self.user.tenant = None
+        self.user.save()
+        self.assertFalse(UserTenantIndex.objects.filter(user_id=self.user.pk).exists())
+
+        self.user.tenant = self.tenant
+        self.user.save()
+        self.user.delete()
+        self.assertFalse(UserTenantIndex.objects.filter(user_id=self.user.pk).exists())
+
+    def test_last_login_updates_skip_the_index(self):
+        UserTenantIndex.objects.filter(user_id=self.user.pk).delete()
+        self.user.save(update_fields=['last_login'])
+        self.assertFalse(UserTenantIndex.objects.filter(user_id=self.user.pk).exists())
+
+
+class SessionAuthenticationTests(AccountsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='header-user', password='x', tenant=self.tenant)
+        self.cookie_user = CustomUser.objects.create_user(username='cookie-user', password='x', tenant=self.tenant)
+
+    def authenticate(self, session_id=None):
+        headers = {'HTTP_X_SESSION_ID': session_id} if session_id else {}
+        request = APIRequestFactory().get('/dealership/api/vehicles/', **headers)
+        request.tenant = self.tenant
+        request.user = self.cookie_user  # What AuthenticationMiddleware resolved from the cookie
+        result = CustomSessionAuthentication().authenticate(Request(request))
+        return result[0] if result else None
+
+    def test_header_session_takes_precedence_over_the_cookie(self):
+        self.assertEqual(self.authenticate(self.start_session(self.user)), self.user)
+        self.assertEqual(self.authenticate(), self.cookie_user)
+        self.assertEqual(self.authenticate('no-such-session'), self.cookie_user)
+
+    def test_header_session_of_another_tenant_is_rejected(self):
+        self.user.tenant = self.other_tenant()
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(self.start_session(self.user))
+
+    def test_user_changes_apply_to_open_sessions(self):
+        session_id = self.start_session(self.user)
+        self.assertTrue(get_session_user(session_id).is_active)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(get_session_user(session_id).is_active)
+        self.assertEqual(self.authenticate(session_id), self.cookie_user)
+
+        self.user.is_active = True
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertIsNone(get_session_user(session_id))
+
+    def test_logout_deletes_the_header_session(self):
+        session_id = self.start_session(self.user)
+        request = APIRequestFactory().post('/accounts/api/logout/', HTTP_X_SESSION_ID=session_id)
+        request.session = SessionStore()
+        force_authenticate(request, user=self.user)
+        self.assertEqual(logout_user(request).status_code, 200)
+        self.assertFalse(SessionStore().exists(session_id))
+        self.assertIsNone(get_session_user(session_id))
+
+
+class TenantTokenTests(AccountsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='token-user', password='x', tenant=self.tenant)
+        self.factory = APIRequestFactory()
+
+    def issue(self, user=None):
+        request = self.factory.get('/accounts/api/get-token/')
+        force_authenticate(request, user=user or self.user)
+        return get_access_token(request).data
+
+    def refresh(self, raw_refresh):
+        request = self.factory.post('/accounts/api/token/refresh/', {'refresh': raw_refresh}, format='json')
+        return refresh_access_token(request)
+
+    def authenticate(self, raw_access):
+        request = self.factory.get('/dealership/api/vehicles/', HTTP_AUTHORIZATION=f'Bearer {raw_access}')
+        request.tenant = self.tenant
+        return TenantJWTAuthentication().authenticate(Request(request))[0]
+
+    def test_issued_tokens_carry_tenant_claims(self):
+        user = self.authenticate(self.issue()['access'])
+        self.assertIsInstance(user, TenantTokenUser)
+        self.assertEqual((user.tenant_id, user.schema_name), (self.tenant.pk, self.tenant.schema_name))
+
+    def test_refresh_rotates_and_denies_the_old_token(self):
+        tokens = self.issue()
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], tokens['refresh'])
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_revoked_refresh_token_is_denied(self):
+        tokens = self.issue()
+        request = self.factory.post('/accounts/api/token/revoke/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(revoke_access_token(request).status_code, 200)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_permission_change_and_delete_revoke_access_tokens(self):
+        access = self.issue()['access']
+        self.user.user_permissions.add(Permission.objects.get(codename='add_vehicle'))
+        with self.assertRaises(TokenError):
+            TenantAccessToken(access)
+        fresh = CustomUser.objects.get(pk=self.user.pk)
+        self.assertIn('dealership.add_vehicle', self.authenticate(self.issue(fresh)['access']).permission_codenames)
+
+        access = self.issue()['access']
+        self.user.delete()
+        with self.assertRaises(TokenError):
+            TenantAccessToken(access)
+
+    def test_tenantless_superuser_is_loaded_from_the_database(self):
+        admin = CustomUser.objects.create_superuser(username='root', email='root@example.com', password='x')
+        user = self.authenticate(self.issue(admin)['access'])
+        self.assertIsInstance(user, CustomUser)
+        self.assertEqual(user.pk, admin.pk)
+
+    def test_middleware_resolves_the_tenant_from_the_token(self):
+        self.addCleanup(connection.set_tenant, self.tenant)
+        raw_access = self.issue()['access']
+        request = self.factory.get('/dealership/api/vehicles/', HTTP_AUTHORIZATION=f'Bearer {raw_access}',
+                                   HTTP_HOST=self.get_test_tenant_domain())
+        HeaderTenantMiddleware(lambda request: None).process_request(request)
+        self.assertEqual(request.tenant.pk, self.tenant.pk)
+        self.assertEqual(request.validated_jwt[0], raw_access)
+
+
+class AuthorizationCacheTests(AccountsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='authz-user', password='x', tenant=self.tenant)
+
+    def fresh_user(self):
+        # A new request loads a new user object, so only the shared cache carries over
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_second_request_checks_without_queries(self):
+        self.assertFalse(has_perm_or_group(self.fresh_user(), 'dealership.add_vehicle'))
+        user = self.fresh_user()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(has_perm_or_group(user, 'dealership.add_vehicle'))
+            self.assertFalse(get_authorization(user).has_perm('dealership.delete_vehicle'))
+        self.assertEqual(data_queries(queries), [])
+
+    def test_group_and_permission_changes_invalidate(self):
+        self.assertFalse(has_perm_or_group(self.fresh_user(), 'dealership.add_vehicle'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(Permission.objects.get(codename='add_vehicle'))
+        self.assertTrue(get_authorization(self.fresh_user()).has_perm('dealership.add_vehicle'))
+
+        group = Group.objects.create(name='salesperson')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(group)
+        self.assertTrue(has_perm_or_group(self.fresh_user(), 'dealership.delete_vehicle'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.permissions.add(Permission.objects.get(codename='change_vehicle'))
+        self.assertTrue(get_authorization(self.fresh_user()).has_perm('dealership.change_vehicle'))
+
+    def test_token_claims_are_used_without_queries(self):
+        user = TenantTokenUser({'user_id': self.user.pk, 'groups': [], 'perms': ['dealership.delete_vehicle']})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(has_perm_or_group(user, 'dealership.delete_vehicle'))
+            self.assertFalse(has_perm_or_group(user, 'dealership.add_vehicle'))
+        self.assertEqual(data_queries(queries), [])
+
+    def test_view_denial_keeps_the_error_shape(self):
+        request = APIRequestFactory().delete('/dealership/delete-vehicle/1/')
+        force_authenticate(request, user=self.fresh_user())
+        response = DeleteVehicleAPIView.as_view()(request, vehicle_id=1)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data, {'error': 'You do not have permission to delete vehicles.'})
+
+    def test_per_process_cache_is_flagged(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['accounts.W001'])
+
+
+class BulkUserTests(AccountsTestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            username='bulk-admin', email='admin@example.com', password='x', tenant=self.tenant, is_tenant_admin=True,
+        )
+
+    def post(self, users, user=None):
+        request = APIRequestFactory().post('/accounts/api/bulk-create-users/', {'users': users}, format='json')
+        force_authenticate(request, user=user or self.admin)
+        return bulk_create_tenant_users(request)
+
+    def test_valid_rows_are_created_and_the_rest_reported(self):
+        response = self.post([
+            {'username': 'staff1', 'email': 'staff1@example.com', 'password': 'secret-1',
+             'permissions': ['dealership.view_vehicle', 'add_vehicle']},
+            {'username': 'bulk-admin', 'email': 'taken@example.com', 'password': 'secret-2'},
+            {'username': 'staff3', 'email': 'staff3@example.com', 'password': 'secret-3',
+             'permissions': ['accounts.add_customuser']},
+            {'username': 'staff1', 'email': 'again@example.com', 'password': 'secret-4'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 3))
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+
+        user = CustomUser.objects.get(username='staff1')
+        self.assertEqual(user.tenant, self.tenant)
+        self.assertTrue(user.check_password('secret-1'))
+        self.assertTrue(user.has_perm('dealership.add_vehicle'))
+        self.assertTrue(UserTenantIndex.objects.filter(username='staff1', tenant=self.tenant).exists())
+
+    def test_only_tenant_admins_can_bulk_create(self):
+        staff = CustomUser(username='staff', tenant=self.tenant)
+        response = self.post([{'username': 'x1', 'email': 'x1@example.com', 'password': 'p'}], user=staff)
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv_lists_are_split_on_semicolons(self):
+        rows = read_user_rows(io.BytesIO(
+            b'Username,Email,Password,Groups,Is Tenant Admin\n'
+            b'csv1,csv1@example.com,pw,Sales; Managers,true\n'
+        ), 'users.csv')
+        self.assertEqual(rows, [(2, {'username': 'csv1', 'email': 'csv1@example.com', 'password': 'pw',
+                                     'groups': ['Sales', 'Managers'], 'is_tenant_admin': 'true'})])
@@ -0,0 +1,141 @@
+# accounts/tokens.py
+import time
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken, TokenError
+
+# Claims embedded in tenant-scoped tokens
+TENANT_SCHEMA_CLAIM = 'schema'
+TENANT_ID_CLAIM = 'tenant_id'
+PERMISSIONS_CLAIM = 'perms'
+GROUPS_CLAIM = 'groups'
+CLAIMS_ISSUED_AT_CLAIM = 'claims_at'  # Sub-second, unlike iat
+
+
+# Revocations live in the default cache, which every worker shares (Redis or the database table)
+def _denylist_key(jti):
+    return f"accounts:jwt-deny:{jti}"
+
+
+def _not_before_key(user_id):
+    return f"accounts:jwt-nbf:{user_id}"
+
+
+def revoke_token(token):
+    """
+    Deny a single token by its jti. The entry only lives until the token would
+    have expired anyway, so the denylist stays as small as the set of
+    revoked-but-unexpired tokens.
+    """
+    remaining = int(token['exp'] - time.time())
+    if remaining > 0:
+        cache.set(_denylist_key(token[api_settings.JTI_CLAIM]), 1, remaining)
+
+
+def revoke_user_tokens(user_id):
+    """
+    Reject access tokens issued to ``user_id`` before now, e.g. after a
+    permission change. Clients recover by refreshing, which re-reads the
+    user's claims from the database.
+    """
+    cache.set(_not_before_key(user_id), time.time(), int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()))
+
+
+class DenylistMixin:
+    def verify(self):
+        super().verify()
+        jti_key = _denylist_key(self.payload.get(api_settings.JTI_CLAIM))
+        keys = [jti_key]
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if self.token_type == 'access' and user_id is not None:
+            keys.append(_not_before_key(user_id))
+
+        found = cache.get_many(keys)
+        if jti_key in found:
+            raise TokenError('Token has been revoked')
+        not_before = found.get(_not_before_key(user_id))
+        issued_at = self.payload.get(CLAIMS_ISSUED_AT_CLAIM, self.payload.get('iat', 0))
+        if not_before is not None and issued_at < not_before:
+            raise TokenError('Token was issued before the latest permission change')
+
+
+class TenantAccessToken(DenylistMixin, AccessToken):
+    pass
+
+
+class TenantRefreshToken(DenylistMixin, RefreshToken):
+    """
+    Refresh token whose claims (copied into every access token it mints) carry
+    the tenant schema, tenant id, group names and permission codenames, so an
+    authenticated request can be served without loading the user or tenant.
+    """
+    access_token_class = TenantAccessToken
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        tenant = user.tenant
+        token['username'] = user.username
+        token['is_tenant_admin'] = user.is_tenant_admin
+        token['is_superuser'] = user.is_superuser
+        if tenant is None:
+            # No tenant claims: a tenantless user (e.g. a superadmin) is loaded from the
+            # database per request, as before tenant-scoped tokens
+            return token
+        token[TENANT_ID_CLAIM] = tenant.id
+        token[TENANT_SCHEMA_CLAIM] = tenant.schema_name
+        token[GROUPS_CLAIM] = sorted(user.groups.values_list('name', flat=True))
+        token[PERMISSIONS_CLAIM] = sorted(user.get_all_permissions())
+        token[CLAIMS_ISSUED_AT_CLAIM] = time.time()
+        return token
+
+
+class TenantTokenUser(TokenUser):
+    """
+    Stateless user backed by the claims of a verified tenant-scoped token.
+    """
+
+    @cached_property
+    def tenant_id(self):
+        return self.token.get(TENANT_ID_CLAIM)
+
+    @cached_property
+    def schema_name(self):
+        return self.token.get(TENANT_SCHEMA_CLAIM)
+
+    @cached_property
+    def tenant(self):
+        from tenants.cache import tenant_cache
+        return tenant_cache.get_tenant_for_schema(self.schema_name) if self.schema_name else None
+
+    @cached_property
+    def is_tenant_admin(self):
+        return self.token.get('is_tenant_admin', False)
+
+    @cached_property
+    def group_names(self):
+        return frozenset(self.token.get(GROUPS_CLAIM, ()))
+
+    @cached_property
+    def permission_codenames(self):
+        return frozenset(self.token.get(PERMISSIONS_CLAIM, ()))
+
+    @property
+    def groups(self):
+        # Real queryset so existing groups.filter(name__in=...) checks stay correct
+        return Group.objects.filter(name__in=self.group_names)
+
+    def get_all_permissions(self, obj=None):
+        return set(self.permission_codenames)
+
+    def has_perm(self, perm, obj=None):
+        return self.is_superuser or perm in self.permission_codenames
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, module):
+        return self.is_superuser or any(perm.startswith(f"{module}.") for perm in self.permission_codenames)
@@ -1,15 +1,20 @@
 from django.urls import path
-from .views import get_csrf_token, create_tenant_user, get_dealership_permissions, get_dealership_users, assign_permission, remove_permission, get_access_token, auth_debug
+from .views import get_csrf_token, create_tenant_user, bulk_create_tenant_users, provision_tenants_view, get_dealership_permissions, get_dealership_users, assign_permission, remove_permission, get_access_token, refresh_access_token, revoke_access_token, auth_debug, logout_user
 
 
 urlpatterns = [
 
     path('api/create-user/', create_tenant_user, name='create_tenant_user'),
+    path('api/bulk-create-users/', bulk_create_tenant_users, name='bulk_create_tenant_users'),
+    path('api/provision-tenants/', provision_tenants_view, name='provision_tenants'),
     path('api/permissions/', get_dealership_permissions, name='get_dealership_permissions'),
     path('api/dealership-users/', get_dealership_users, name='get_dealership_users'),
     path('api/assign-permission/', assign_permission, name='assign_permission'),
     path('api/remove-permission/', remove_permission, name='remove_permission'),
     path("api/csrf/", get_csrf_token, name="get_csrf_token"),
     path('api/get-token/', get_access_token, name='get_access_token'),
+    path('api/token/refresh/', refresh_access_token, name='refresh_access_token'),
+    path('api/token/revoke/', revoke_access_token, name='revoke_access_token'),
     path('api/auth-debug/', auth_debug, name='auth_debug'),
+    path('api/logout/', logout_user, name='logout_user'),
 ]
@@ -0,0 +1,79 @@
+# accounts/user_index.py
+from django.db.models import Q
+from .models import UserTenantIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def index_user(user):
+    """
+    Create or refresh the index row for a single user. Users without a
+    tenant (e.g. superadmins) are removed from the index.
+    """
+    if not user.tenant_id:
+        unindex_user(user)
+        return
+
+    # A renamed user may collide with a stale row left behind by a deleted one
+    UserTenantIndex.objects.filter(username=user.username).exclude(user_id=user.pk).delete()
+    UserTenantIndex.objects.update_or_create(
+        user_id=user.pk,
+        defaults={
+            'username': user.username,
+            'email': (user.email or '').lower(),
+            'tenant_id': user.tenant_id,
+        }
+    )
+
+
+def index_users(users):
+    """
+    Bulk upsert index rows for an iterable of users in a single statement.
+    Returns the number of rows written.
+    """
+    entries = [
+        UserTenantIndex(
+            username=user.username,
+            email=(user.email or '').lower(),
+            user_id=user.pk,
+            tenant_id=user.tenant_id,
+        )
+        for user in users if user.tenant_id
+    ]
+    if not entries:
+        return 0
+    UserTenantIndex.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['username'],
+        update_fields=['email', 'user_id', 'tenant'],
+    )
+    return len(entries)
+
+
+def unindex_user(user):
+    UserTenantIndex.objects.filter(user_id=user.pk).delete()
+
+
+def find_login_entry(identifier):
+    """
+    Resolve a login identifier (username or email) to its index row, with the
+    tenant already joined. An exact username match wins over an email match;
+    an email shared by several users is treated as ambiguous.
+    """
+    if not identifier:
+        return None
+
+    entries = list(
+        UserTenantIndex.objects.select_related('tenant')
+        .filter(Q(username=identifier) | Q(email=identifier.lower()))[:3]
+    )
+    for entry in entries:
+        if entry.username == identifier:
+            return entry
+    if len(entries) == 1:
+        return entries[0]
+    if entries:
+        logger.warning(f"Ambiguous login identifier matched {len(entries)} users")
+    return None
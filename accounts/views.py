@@ -1,7 +1,7 @@
 # accounts/views.py
 
-from django.contrib.auth import authenticate, login
-from rest_framework.decorators import api_view, permission_classes
+from django.contrib.auth import authenticate, login, logout
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
@@ -13,14 +13,20 @@ from django_tenants.utils import schema_context
 from rest_framework.response import Response
 from rest_framework import status
 from tenants.models import Client, Domain
+from tenants.provisioning import provision_tenants, template_is_current
 from django_tenants.utils import get_tenant_domain_model
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_tenants.utils import tenant_context
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from accounts.models import CustomUser
 from .serializers import CustomUserSerializer
+from .user_index import find_login_entry
+from .authz import has_perm_or_group
+from .bulk_users import BulkUserFileError, provision_users, read_user_rows, rows_from_list
+from .authentication import SessionStore
+from .tokens import TenantRefreshToken, revoke_token
 import logging
-from rest_framework_simplejwt.tokens import RefreshToken
 from cryptography.fernet import Fernet
 import base64
 
@@ -38,86 +44,82 @@ def universal_login(request):
             
             logger.debug(f"Login attempt for username: {username}")
             
-            # Get all non-public tenants
-            tenants = Client.objects.exclude(schema_name='public')
-            
-            for tenant in tenants:
+            # Resolve the tenant through the public-schema login index
+            entry = find_login_entry(username)
+            if entry is not None:
+                tenant = entry.tenant
                 with tenant_context(tenant):
-                    try:
-                        user = CustomUser.objects.get(username=username)
-                        if user.check_password(password) and user.tenant == tenant:
-                            # Log in user and set session
-                            login(request, user)
-                            logger.debug(f"User {username} logged in for tenant: {tenant.name}")
-                            
-                            # Get tenant domain
-                            domain = Domain.objects.get(tenant=tenant)
-                            
-                            # Store comprehensive session data
-                            request.session['tenant_id'] = tenant.id
-                            request.session['tenant_schema'] = tenant.schema_name
-                            request.session['tenant_domain'] = domain.domain
-                            request.session['user_id'] = user.id
-                            request.session.modified = True
-                            request.session.save()
-                            
-                            session_key = request.session.session_key
-                            
-                            # Determine API base URL for production
-                            environment = os.getenv('ENVIRONMENT', 'development')
-                            if environment == 'production':
-                                api_base_url = "https://dms-g5l7.onrender.com"
-                            else:
-                                api_base_url = "http://127.0.0.1:8000"
-                            
-                            response_data = {
-                                'success': True,
-                                'message': f'Welcome to {tenant.name}',
-                                'user': {
-                                    'id': user.id,
-                                    'uuid': str(user.uuid),
-                                    'username': user.username,
-                                    'email': user.email
-                                },
-                                'tenant': {
-                                    'id': tenant.id,
-                                    'schema_name': tenant.schema_name,
-                                    'name': tenant.name,
-                                    'domain': domain.domain,
-                                    'api_base_url': api_base_url
-                                },
-                                'session_id': session_key,
-                                'auth_headers': {
-                                    'X-Tenant-Domain': domain.domain,
-                                    'X-Session-ID': session_key
-                                }
+                    user = CustomUser.objects.filter(pk=entry.user_id).first()
+                    if user and user.tenant_id == tenant.id and user.check_password(password):
+                        # Log in user and set session
+                        login(request, user)
+                        logger.debug(f"User {username} logged in for tenant: {tenant.name}")
+
+                        # Get tenant domain
+                        domain = Domain.objects.get(tenant=tenant)
+
+                        # Store comprehensive session data
+                        request.session['tenant_id'] = tenant.id
+                        request.session['tenant_schema'] = tenant.schema_name
+                        request.session['tenant_domain'] = domain.domain
+                        request.session['user_id'] = user.id
+                        request.session.modified = True
+                        request.session.save()
+
+                        session_key = request.session.session_key
+
+                        # Determine API base URL for production
+                        environment = os.getenv('ENVIRONMENT', 'development')
+                        if environment == 'production':
+                            api_base_url = "https://dms-g5l7.onrender.com"
+                        else:
+                            api_base_url = "http://127.0.0.1:8000"
+
+                        response_data = {
+                            'success': True,
+                            'message': f'Welcome to {tenant.name}',
+                            'user': {
+                                'id': user.id,
+                                'uuid': str(user.uuid),
+                                'username': user.username,
+                                'email': user.email
+                            },
+                            'tenant': {
+                                'id': tenant.id,
+                                'schema_name': tenant.schema_name,
+                                'name': tenant.name,
+                                'domain': domain.domain,
+                                'api_base_url': api_base_url
+                            },
+                            'session_id': session_key,
+                            'auth_headers': {
+                                'X-Tenant-Domain': domain.domain,
+                                'X-Session-ID': session_key
                             }
-                            
-                            response = JsonResponse(response_data)
-                            
-                            # Set secure cookies for production
-                            cookie_domain = None  # Use default for single domain
-                            if environment == 'production':
-                                cookie_secure = True
-                                cookie_samesite = 'None'
-                            else:
-                                cookie_secure = False
-                                cookie_samesite = 'Lax'
-                            
-                            response.set_cookie(
-                                'sessionid',
-                                session_key,
-                                httponly=True,
-                                samesite=cookie_samesite,
-                                domain=cookie_domain,
-                                secure=cookie_secure
-                            )
-                            
-                            return response
-                            
-                    except CustomUser.DoesNotExist:
-                        continue
-            
+                        }
+
+                        response = JsonResponse(response_data)
+
+                        # Set secure cookies for production
+                        cookie_domain = None  # Use default for single domain
+                        if environment == 'production':
+                            cookie_secure = True
+                            cookie_samesite = 'None'
+                        else:
+                            cookie_secure = False
+                            cookie_samesite = 'Lax'
+
+                        response.set_cookie(
+                            'sessionid',
+                            session_key,
+                            httponly=True,
+                            samesite=cookie_samesite,
+                            domain=cookie_domain,
+                            secure=cookie_secure
+                        )
+
+                        return response
+
             logger.warning(f"Login failed for username: {username}")
             return JsonResponse({'error': 'Invalid credentials'}, status=401)
             
@@ -156,6 +158,20 @@ def get_csrf_token(request):
     return JsonResponse({'csrfToken': get_token(request)})
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_user(request):
+    """
+    End the caller's session. Header-based sessions (X-Session-ID) are deleted
+    from the session store as well, which also evicts them from the cache.
+    """
+    session_id = request.META.get('HTTP_X_SESSION_ID')
+    if session_id:
+        SessionStore(session_key=session_id).delete()
+    logout(request)
+    return Response({'message': 'Logged out successfully.'}, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @csrf_exempt  # 🚨 WARNING: Remove this in production
 # @permission_classes([IsAuthenticated])  # Ensure authentication is required
@@ -199,6 +215,75 @@ def create_tenant_user(request):
     }, status=status.HTTP_201_CREATED)
 
 
+MAX_BULK_USERS = 1000
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_tenant_users(request):
+    """
+    API for a Tenant Admin to create many users in their dealership at once:
+    POST {"users": [{"username", "email", "password", "first_name",
+    "last_name", "is_tenant_admin", "groups", "permissions"}, ...]}, or a
+    CSV/JSON "file" upload with the same columns. See accounts.bulk_users.
+    """
+    if not getattr(request.user, 'is_tenant_admin', False):
+        return Response({'error': 'Only tenant admins can create users.'}, status=status.HTTP_403_FORBIDDEN)
+    tenant = request.user.tenant
+    if not tenant:
+        return Response({'error': 'User does not belong to any tenant.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        upload = request.FILES.get('file')
+        if upload is not None:
+            rows = read_user_rows(upload, upload.name)
+        else:
+            rows = rows_from_list(request.data.get('users'))
+    except BulkUserFileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not rows:
+        return Response({'error': 'No users given.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > MAX_BULK_USERS:
+        return Response({'error': f'At most {MAX_BULK_USERS} users can be created per request.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    report = provision_users(tenant, rows)
+    return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+MAX_PROVISION_BATCH = 50
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def provision_tenants_view(request):
+    """
+    API for platform admins to onboard dealerships in bulk: POST
+    {"tenants": [{"schema_name", "name", "domain", "description"}, ...]}.
+    Each schema is cloned from the template schema; see tenants.provisioning.
+    Answers 409 while the template is missing or has pending migrations.
+    """
+    if not request.user.is_superuser:
+        return Response({'error': 'Only platform admins can provision tenants.'}, status=status.HTTP_403_FORBIDDEN)
+
+    specs = request.data.get('tenants')
+    if not isinstance(specs, list) or not specs or not all(isinstance(spec, dict) for spec in specs):
+        return Response({'error': 'tenants must be a non-empty list of objects.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(specs) > MAX_PROVISION_BATCH:
+        return Response({'error': f'At most {MAX_PROVISION_BATCH} tenants can be provisioned per request.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    if not template_is_current():
+        return Response({'error': 'The tenant template schema is not up to date. '
+                                  'Run manage.py provision_tenants --refresh-template, then retry.'},
+                        status=status.HTTP_409_CONFLICT)
+
+    results = provision_tenants(specs, refresh_template=False)
+    created = sum(1 for result in results if result['status'] == 'created')
+    logger.info(f"{request.user.username} provisioned {created} of {len(results)} tenant(s)")
+    return Response({'created': created, 'results': results},
+                    status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_dealership_permissions(request):
@@ -208,7 +293,7 @@ def get_dealership_permissions(request):
     user = request.user
 
     # Check if user has permission to view permissions (using Django's permission system)
-    if not (user.has_perm('accounts.view_permission') or user.groups.filter(name='sub-admins').exists()):
+    if not has_perm_or_group(user, 'accounts.view_permission', groups=['sub-admins']):
         return Response({'error': 'You do not have permission to view permissions.'}, 
                        status=status.HTTP_403_FORBIDDEN)
 
@@ -227,7 +312,7 @@ def get_dealership_users(request):
     user = request.user
 
     # Check if user has permission to view users (using Django's permission system)
-    if not (user.has_perm('accounts.view_customuser') or user.groups.filter(name='sub-admins').exists()):
+    if not has_perm_or_group(user, 'accounts.view_customuser', groups=['sub-admins']):
         return Response({'error': 'You do not have permission to view users.'}, 
                        status=status.HTTP_403_FORBIDDEN)
 
@@ -245,7 +330,7 @@ def assign_permission(request):
     user = request.user
 
     # Check if user has permission to change permissions (using Django's permission system)
-    if not (user.has_perm('accounts.change_customuser') or user.groups.filter(name='sub-admins').exists()):
+    if not has_perm_or_group(user, 'accounts.change_customuser', groups=['sub-admins']):
         return Response({'error': 'You do not have permission to assign permissions.'}, 
                        status=status.HTTP_403_FORBIDDEN)
 
@@ -314,12 +399,60 @@ def remove_permission(request):
 @permission_classes([IsAuthenticated])
 def get_access_token(request):
     user = request.user
-    refresh = RefreshToken.for_user(user)
+    if not isinstance(user, CustomUser):
+        # Authenticated with a token; claims are always re-read from the database
+        user = CustomUser.objects.select_related('tenant').get(pk=user.pk)
+    refresh = TenantRefreshToken.for_user(user)
     return Response({
         "access": str(refresh.access_token),
         "refresh": str(refresh),
     }, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def refresh_access_token(request):
+    """
+    Rotate a refresh token: the presented token is revoked and a new pair is
+    issued with tenant, group and permission claims re-read from the database.
+    """
+    raw_token = request.data.get('refresh')
+    if not raw_token:
+        return Response({'error': 'Refresh token is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        refresh = TenantRefreshToken(raw_token)
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+    user = (CustomUser.objects.select_related('tenant')
+            .filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first())
+    if user is None or not user.is_active:
+        return Response({'error': 'User not found or inactive.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    revoke_token(refresh)
+    new_refresh = TenantRefreshToken.for_user(user)
+    return Response({
+        "access": str(new_refresh.access_token),
+        "refresh": str(new_refresh),
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def revoke_access_token(request):
+    """Revoke a refresh token and, if the request used one, its access token."""
+    raw_token = request.data.get('refresh')
+    if raw_token:
+        try:
+            revoke_token(TenantRefreshToken(raw_token))
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.auth is not None and 'jti' in request.auth:
+        revoke_token(request.auth)
+
+    return Response({'message': 'Token revoked.'}, status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 def auth_debug(request):
     """Debug endpoint to check authentication status"""
@@ -10,8 +10,17 @@ pip install -r requirements.txt
 echo "Collecting static files..."
 python manage.py collectstatic --no-input
 
+echo "Creating cache table..."
+python manage.py createcachetable
+
 echo "Running migrations..."
-python manage.py migrate --run-syncdb
+python manage.py migrate_tenants_parallel
+
+echo "Refreshing tenant template schema..."
+python manage.py provision_tenants --refresh-template
+
+echo "Backfilling login index..."
+python manage.py backfill_user_index
 
 echo "Creating public tenant..."
 python manage.py create_public_tenant --domain=dms-g5l7.onrender.com
@@ -0,0 +1,157 @@
+# dealership/catalogue.py
+"""
+Per-tenant materialized catalogue.
+
+The catalogue is kept in the cache as pre-rendered JSON bytes plus an ETag,
+one document per (schema, media base URL), so serving it costs one cache
+lookup and no serializer work. Writes to Vehicle, VehicleImage and
+OutboundVehicle patch only the affected vehicle's entry (see signals.py).
+Bulk writes that bypass signals must call schedule_catalogue_update() for
+each vehicle they touch, or invalidate_catalogue().
+
+Cache layout, per schema:
+    ...:bases           media bases a document has been built for
+    ...:<base>:doc      (etag, body) served by the list view
+    ...:<base>:items    {vehicle_id: item}, used by the detail view and to
+                        patch the document
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django_tenants.utils import schema_context
+from rest_framework.renderers import JSONRenderer
+from .models import Vehicle
+from .serializers import CatalogueSerializer
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl():
+    return getattr(settings, 'CATALOGUE_SNAPSHOT_TTL', 86400)
+
+
+def _prefix(schema_name):
+    return f"dealership:catalogue:{schema_name}"
+
+
+def _base_prefix(schema_name, media_base):
+    digest = hashlib.md5(media_base.encode()).hexdigest()[:12]
+    return f"{_prefix(schema_name)}:{digest}"
+
+
+def _render(data):
+    body = JSONRenderer().render(data)
+    return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+
+def _catalogue_queryset():
+    return Vehicle.objects.filter(inventory_status="IN").prefetch_related('images')
+
+
+def _serialize(vehicles, media_base):
+    return CatalogueSerializer(vehicles, many=True, context={'media_base': media_base}).data
+
+
+def _store(schema_name, media_base, items):
+    prefix = _base_prefix(schema_name, media_base)
+    etag, body = _render([items[vehicle_id] for vehicle_id in sorted(items)])
+    cache.set_many({
+        f"{prefix}:items": items,
+        f"{prefix}:doc": (etag, body),
+    }, _ttl())
+    return etag, body
+
+
+def _remember_base(schema_name, media_base):
+    key = f"{_prefix(schema_name)}:bases"
+    bases = cache.get(key) or set()
+    if media_base not in bases:
+        bases.add(media_base)
+        cache.set(key, bases, None)
+
+
+def build_catalogue(schema_name, media_base):
+    """Serialize the whole catalogue for one tenant and store it."""
+    with schema_context(schema_name):
+        data = _serialize(_catalogue_queryset(), media_base)
+    items = {item['vehicle_id']: item for item in data}
+    _remember_base(schema_name, media_base)
+    logger.debug(f"Catalogue snapshot built for {schema_name} ({len(items)} vehicles)")
+    return _store(schema_name, media_base, items)
+
+
+def get_catalogue(schema_name, media_base):
+    """Return (etag, body) for the catalogue list, building it on a miss."""
+    document = cache.get(f"{_base_prefix(schema_name, media_base)}:doc")
+    if document is None:
+        document = build_catalogue(schema_name, media_base)
+    return document
+
+
+def get_catalogue_item(schema_name, media_base, vehicle_id):
+    """
+    Return (etag, body) for one in-inventory vehicle, or None if it is not in
+    the catalogue (the caller falls back to the database).
+    """
+    items = cache.get(f"{_base_prefix(schema_name, media_base)}:items")
+    if items is None:
+        build_catalogue(schema_name, media_base)
+        items = cache.get(f"{_base_prefix(schema_name, media_base)}:items") or {}
+    item = items.get(vehicle_id)
+    return _render(item) if item is not None else None
+
+
+def update_catalogue_vehicle(schema_name, vehicle_id):
+    """
+    Patch one vehicle into every stored document for the tenant. If another
+    process is patching the same tenant, the documents are dropped instead
+    and rebuilt on the next read, so concurrent writes never lose an update.
+    """
+    bases = cache.get(f"{_prefix(schema_name)}:bases") or set()
+    if not bases:
+        return
+
+    lock_key = f"{_prefix(schema_name)}:lock"
+    conflict_key = f"{_prefix(schema_name)}:conflict"
+    if not cache.add(lock_key, 1, 30):
+        # Tell the lock holder its documents may be missing this change
+        cache.set(conflict_key, 1, 30)
+        invalidate_catalogue(schema_name)
+        return
+    try:
+        with schema_context(schema_name):
+            vehicle = _catalogue_queryset().filter(vehicle_id=vehicle_id).first()
+            for media_base in bases:
+                items = cache.get(f"{_base_prefix(schema_name, media_base)}:items")
+                if items is None:
+                    continue  # Not built yet; the next read builds it
+                if vehicle is None:
+                    items.pop(vehicle_id, None)
+                else:
+                    items[vehicle_id] = _serialize([vehicle], media_base)[0]
+                _store(schema_name, media_base, items)
+        if cache.get(conflict_key):
+            cache.delete(conflict_key)
+            invalidate_catalogue(schema_name)
+    finally:
+        cache.delete(lock_key)
+
+
+def schedule_catalogue_update(vehicle_id):
+    """Patch a vehicle into the current tenant's catalogue once the transaction commits."""
+    # Capture the schema now; on_commit callbacks may run under another one
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: update_catalogue_vehicle(schema_name, vehicle_id))
+
+
+def invalidate_catalogue(schema_name=None):
+    """Drop every catalogue document of a tenant (default: the current schema)."""
+    schema_name = schema_name or connection.schema_name
+    bases = cache.get(f"{_prefix(schema_name)}:bases") or set()
+    keys = []
+    for media_base in bases:
+        prefix = _base_prefix(schema_name, media_base)
+        keys += [f"{prefix}:doc", f"{prefix}:items"]
+    cache.delete_many(keys)
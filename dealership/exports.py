@@ -0,0 +1,224 @@
+# dealership/exports.py
+"""
+Excel export engine.
+
+Rows are read with ``values_list(...).iterator()`` (a server-side cursor on
+PostgreSQL) and appended to a write-only openpyxl worksheet, which streams
+cells to disk instead of keeping a cell object per value. The finished
+workbook is spooled to a temporary file and served with FileResponse, so
+memory stays flat however many rows a tenant has.
+"""
+import tempfile
+import openpyxl
+from django.core.files import File
+from django.http import FileResponse
+from django.utils import timezone
+from django_tenants.utils import tenant_context
+from tenants.models import ExportJob
+from .models import Vehicle, MaintenanceRecord, Payment, OutboundVehicle
+import logging
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ExcelExport:
+    """
+    One worksheet built from a values_list projection. Subclasses declare the
+    sheet title, download filename, column headers and projected fields, and
+    may override format_row() to post-process each tuple.
+    """
+    title = None
+    filename = None
+    headers = ()
+    fields = ()
+    chunk_size = 2000
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def format_row(self, row):
+        return row
+
+    def rows(self):
+        queryset = self.get_queryset().values_list(*self.fields)
+        for row in queryset.iterator(chunk_size=self.chunk_size):
+            yield self.format_row(row)
+
+    def write(self, fileobj, progress=None):
+        """
+        Write the workbook to ``fileobj``. ``progress`` is called with the
+        number of rows written every chunk_size rows. Returns the row count.
+        """
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(self.title)
+        ws.append(list(self.headers))
+        count = 0
+        for row in self.rows():
+            ws.append(row)
+            count += 1
+            if progress and count % self.chunk_size == 0:
+                progress(count)
+        wb.save(fileobj)
+        return count
+
+    def response(self):
+        spool = tempfile.TemporaryFile()
+        self.write(spool)
+        spool.seek(0)
+        # FileResponse streams the file in blocks and closes it when done
+        return FileResponse(spool, as_attachment=True, filename=self.filename, content_type=XLSX_CONTENT_TYPE)
+
+
+class MaintenanceRecordExport(ExcelExport):
+    title = "Maintenance Records"
+    filename = "maintenance_records.xlsx"
+    headers = (
+        "ID", "Vehicle ID", "Maintenance Type", "Maintenance Date",
+        "Cost", "Person in Charge", "Receipt", "Created At",
+    )
+    # vehicle_id is the FK column itself, so no join or per-row lookup
+    fields = (
+        'id', 'vehicle_id', 'maintenance_type', 'maintenance_date',
+        'cost', 'person_in_charge', 'receipt', 'created_at',
+    )
+
+    def get_queryset(self):
+        return MaintenanceRecord.objects.order_by('id')
+
+    def format_row(self, row):
+        record_id, vehicle_id, maintenance_type, maintenance_date, cost, person_in_charge, receipt, created_at = row
+        return (
+            record_id,
+            vehicle_id,
+            maintenance_type,
+            str(maintenance_date) if maintenance_date else "",
+            cost,
+            person_in_charge if person_in_charge else "",
+            receipt if receipt else "No Receipt",
+            str(created_at) if created_at else "",
+        )
+
+
+class VehicleInventoryExport(ExcelExport):
+    title = "Vehicle Inventory"
+    filename = "vehicle_inventory.xlsx"
+    headers = (
+        "Vehicle ID", "Type", "Make", "Model", "Year",
+        "Chassis", "Plate", "Odometer", "Color", "Fuel",
+        "Transmission", "Seller", "Mobile", "Email",
+        "Condition", "Tires", "Damage", "Engine",
+        "Interior", "Arrival", "Price", "Storage", "Notes",
+    )
+    fields = (
+        'vehicle_id', 'vehicle_type', 'vehicle_make', 'vehicle_model', 'year_of_manufacturing',
+        'chassis_number', 'license_plate_number', 'odometer_reading_kms', 'color', 'fuel_type',
+        'transmission_type', 'seller_name_company_name', 'mobile_number', 'email_address',
+        'condition_grade', 'tires_condition', 'damage_details_if_any', 'engine_condition',
+        'interior_condition', 'arrival_date', 'purchase_price', 'storage_location', 'notes',
+    )
+
+    def get_queryset(self):
+        return Vehicle.objects.order_by('vehicle_id')
+
+    def format_row(self, row):
+        row = list(row)
+        row[18] = str(row[18])              # Interior
+        row[19] = str(row[19] or "")        # Arrival
+        row[20] = str(row[20] or "")        # Price
+        row[22] = row[22] or ""             # Notes
+        return row
+
+
+class PaymentExport(ExcelExport):
+    title = "Payments"
+    filename = "payments.xlsx"
+    headers = (
+        "ID", "Vehicle ID", "Plate", "Payment Type", "Slot",
+        "Amount Paid", "Date of Payment", "Payment Mode", "Remark",
+    )
+    fields = (
+        'id', 'vehicle_id', 'vehicle__license_plate_number', 'payment_type', 'slot_number',
+        'amount_paid', 'date_of_payment', 'payment_mode', 'payment_remark',
+    )
+
+    def get_queryset(self):
+        return Payment.objects.order_by('id')
+
+    def format_row(self, row):
+        row = list(row)
+        row[6] = str(row[6] or "")          # Date of Payment
+        row[7] = row[7] or ""               # Payment Mode
+        row[8] = row[8] or ""               # Remark
+        return row
+
+
+class OutboundSalesExport(ExcelExport):
+    title = "Outbound Sales"
+    filename = "outbound_sales.xlsx"
+    headers = (
+        "Vehicle ID", "Plate", "Make", "Model", "Buyer", "Contact", "Address",
+        "Delivery Status", "Outbound Date", "Estimated Delivery", "Selling Price",
+        "Other Expense", "Created At",
+    )
+    fields = (
+        'vehicle_id', 'vehicle__license_plate_number', 'vehicle__vehicle_make', 'vehicle__vehicle_model',
+        'buyers_name', 'buyers_contact_details', 'buyers_address', 'delivery_status', 'outbound_date',
+        'estimated_delivery_date', 'selling_price', 'other_expense', 'created_at',
+    )
+
+    def get_queryset(self):
+        return OutboundVehicle.objects.order_by('id')
+
+    def format_row(self, row):
+        row = list(row)
+        row[6] = row[6] or ""               # Address
+        row[8] = str(row[8] or "")          # Outbound Date
+        row[9] = str(row[9] or "")          # Estimated Delivery
+        row[11] = row[11] or 0              # Other Expense
+        row[12] = str(row[12] or "")        # Created At
+        return row
+
+
+# ExportJob.kind -> export
+EXPORTS = {
+    'inventory': VehicleInventoryExport,
+    'maintenance': MaintenanceRecordExport,
+    'payments': PaymentExport,
+    'outbound': OutboundSalesExport,
+}
+
+
+def run_export_job(job_id):
+    """
+    Build the file for a claimed ExportJob inside its tenant's schema,
+    recording progress as rows are written. Runs in a worker process.
+    """
+    job = ExportJob.objects.select_related('tenant').get(pk=job_id)
+    export = EXPORTS[job.kind]()
+
+    def progress(rows_written):
+        ExportJob.objects.filter(pk=job.pk).update(rows_written=rows_written)
+
+    try:
+        with tenant_context(job.tenant):
+            total = export.get_queryset().count()
+            ExportJob.objects.filter(pk=job.pk).update(total_rows=total)
+            with tempfile.TemporaryFile() as spool:
+                rows_written = export.write(spool, progress=progress)
+                spool.seek(0)
+                job.file.save(export.filename, File(spool), save=False)
+    except Exception as e:
+        logger.error(f"Export job {job.pk} ({job.kind}) failed: {str(e)}", exc_info=True)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+        )
+        return False
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.STATUS_DONE, file=job.file.name,
+        rows_written=rows_written, total_rows=rows_written, finished_at=timezone.now(),
+    )
+    logger.debug(f"Export job {job.pk} ({job.kind}) wrote {rows_written} rows to {job.file.name}")
+    return True
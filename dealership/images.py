@@ -0,0 +1,115 @@
+# dealership/images.py
+"""
+Vehicle image variants.
+
+Uploads are stored as-is and queued as ImageJobs (public schema); the
+run_image_worker command renders them in a process pool. Every image gets
+a thumbnail and a medium rendition, each encoded as JPEG and WebP, rotated
+according to its EXIF orientation and written without EXIF or any other
+metadata. Serializers fall back to the original until the variants exist.
+"""
+import io
+import os
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.utils import tenant_context
+from PIL import Image, ImageOps
+from tenants.models import ImageJob
+from .models import VehicleImage
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Variant -> bounding box; aspect ratio is kept and images are never upscaled
+VARIANT_SIZES = {
+    'thumbnail': (320, 240),
+    'medium': (1024, 768),
+}
+VARIANT_FIELDS = ('thumbnail', 'thumbnail_webp', 'medium', 'medium_webp')
+JPEG_OPTIONS = {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}
+WEBP_OPTIONS = {'format': 'WEBP', 'quality': 80, 'method': 4}
+
+
+def _encode(image, options):
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def render_variants(fileobj):
+    """{VehicleImage field: (extension, encoded bytes)} for every variant of the image in ``fileobj``."""
+    with Image.open(fileobj) as original:
+        # Let the JPEG decoder downscale while reading; a square box survives EXIF rotation
+        largest = max(max(size) for size in VARIANT_SIZES.values())
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image.info = {}  # Drop EXIF, ICC, XMP and comments
+
+    rendered = {}
+    for name, size in VARIANT_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.LANCZOS)
+        rendered[name] = ('jpg', _encode(variant.convert('RGB'), JPEG_OPTIONS))
+        rendered[f'{name}_webp'] = ('webp', _encode(variant.convert('RGBA' if has_alpha else 'RGB'), WEBP_OPTIONS))
+    return rendered
+
+
+def process_image(vehicle_image):
+    """Render and store the variants of a VehicleImage in the current schema."""
+    with vehicle_image.image.open('rb') as fileobj:
+        rendered = render_variants(fileobj)
+
+    stem = os.path.splitext(os.path.basename(vehicle_image.image.name))[0]
+    for field, (extension, data) in rendered.items():
+        variant = field.replace('_webp', '')
+        getattr(vehicle_image, field).save(f'{stem}_{variant}.{extension}', ContentFile(data), save=False)
+    vehicle_image.processed_at = timezone.now()
+    # A regular save, so the catalogue snapshot picks up the new URLs
+    vehicle_image.save(update_fields=[*VARIANT_FIELDS, 'processed_at'])
+
+
+def queue_image_processing(images):
+    """Queue variant rendering for ``images`` once the current transaction commits."""
+    jobs = [ImageJob(tenant=connection.tenant, image_id=image.pk) for image in images if image.image]
+    if jobs:
+        transaction.on_commit(lambda: ImageJob.objects.bulk_create(jobs))
+
+
+def run_image_job(job_id):
+    """Render the variants for a claimed ImageJob inside its tenant's schema. Runs in a worker process."""
+    job = ImageJob.objects.select_related('tenant').get(pk=job_id)
+    try:
+        with tenant_context(job.tenant):
+            vehicle_image = VehicleImage.objects.filter(pk=job.image_id).first()
+            # The image may have been deleted while the job was queued
+            if vehicle_image is not None and vehicle_image.image:
+                process_image(vehicle_image)
+    except Exception as e:
+        logger.error(f"Image job {job.pk} (image {job.image_id}) failed: {str(e)}", exc_info=True)
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+        )
+        return False
+
+    ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.STATUS_DONE, finished_at=timezone.now())
+    logger.debug(f"Image job {job.pk} rendered variants for image {job.image_id}")
+    return True
+
+
+def variant_urls(vehicle_image, absolute):
+    """
+    {'original', 'thumbnail', 'medium', 'thumbnail_webp', 'medium_webp'} URLs
+    for a VehicleImage, passed through ``absolute``. Variants not rendered
+    yet fall back to the original.
+    """
+    if not vehicle_image.image:
+        return None
+    original = absolute(vehicle_image.image.url)
+    urls = {'original': original}
+    for field in VARIANT_FIELDS:
+        variant = getattr(vehicle_image, field)
+        urls[field] = absolute(variant.url) if variant else original
+    return urls
@@ -0,0 +1,222 @@
+# dealership/imports.py
+"""
+Bulk vehicle import from CSV or XLSX.
+
+Rows are streamed from the file (csv.reader, or openpyxl in read-only
+mode) and handled in chunks. Each chunk is validated with
+VehicleImportSerializer. Plate, engine and OSN numbers are then checked
+against earlier rows of the file and, with one query per chunk, against
+the database. The valid rows are inserted with a single bulk_create. The
+result is a per-row error report plus throughput figures.
+
+bulk_create skips model signals, so the dashboard rollups, the new
+vehicles' ledgers, the catalogue snapshot and the inquiry matches are
+refreshed once the import finishes.
+"""
+import csv
+import io
+import time
+from datetime import datetime
+import openpyxl
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .catalogue import invalidate_catalogue
+from .ledger import refresh_ledgers
+from .matching import schedule_matching
+from .models import Vehicle
+from .rollups import rebuild_rollups
+from .serializers import VehicleImportSerializer
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_FIELDS = ('license_plate_number', 'engine_number', 'osn_number')
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFileError(ValueError):
+    """The uploaded file cannot be read as a vehicle import."""
+
+
+def _column(header):
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def _cell(value):
+    """Normalise a spreadsheet cell for the serializer; None means the column is left out."""
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)  # Excel stores 2020 and 9876543210 as floats
+    return value
+
+
+def _records(header, rows):
+    columns = [_column(name) for name in header]
+    if not any(columns):
+        raise ImportFileError("The file has no header row")
+    # The header is row 1, so data rows are numbered as a spreadsheet shows them
+    for row_number, values in enumerate(rows, start=2):
+        data = {}
+        for column, value in zip(columns, values):
+            value = _cell(value)
+            if column and value is not None:
+                data[column] = value
+        if data:
+            yield row_number, data
+
+
+def read_rows(fileobj, filename):
+    """Yield (row number, {column: value}) for each non-empty row of a CSV or XLSX file."""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        reader = csv.reader(io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+        yield from _records(next(reader, []), reader)
+    elif name.endswith('.xlsx'):
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            yield from _records(next(rows, ()), rows)
+        finally:
+            wb.close()
+    else:
+        raise ImportFileError("Only .csv and .xlsx files can be imported")
+
+
+class VehicleImport:
+    """
+    One import run. ``added_by_id`` is recorded on every created vehicle;
+    with ``dry_run`` rows are validated and checked but nothing is written.
+    """
+
+    def __init__(self, added_by_id=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+        self.added_by_id = added_by_id
+        self.chunk_size = max(1, chunk_size)
+        self.dry_run = dry_run
+        # One serializer validates every row, so its fields are only built once
+        self.serializer = VehicleImportSerializer()
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.rows = 0
+        self.valid = 0
+        self.created_ids = []
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def check_unique(self, valid):
+        """Drop rows whose plate, engine or OSN number is already taken, in the file or the database."""
+        values = {
+            field: {attrs[field] for _, attrs in valid if attrs.get(field)}
+            for field in UNIQUE_FIELDS
+        }
+        lookup = Q()
+        for field, field_values in values.items():
+            if field_values:
+                lookup |= Q(**{f'{field}__in': field_values})
+        existing = {field: set() for field in UNIQUE_FIELDS}
+        if lookup:
+            for row in Vehicle.objects.filter(lookup).values_list(*UNIQUE_FIELDS):
+                for field, value in zip(UNIQUE_FIELDS, row):
+                    existing[field].add(value)
+
+        unique = []
+        for row_number, attrs in valid:
+            errors = {}
+            for field in UNIQUE_FIELDS:
+                value = attrs.get(field)
+                if not value:
+                    continue
+                verbose_name = Vehicle._meta.get_field(field).verbose_name
+                if value in existing[field]:
+                    errors[field] = [f"vehicle with this {verbose_name} already exists."]
+                elif value in self.seen[field]:
+                    errors[field] = [f"Duplicate {verbose_name} earlier in the file."]
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+            for field in UNIQUE_FIELDS:
+                if attrs.get(field):
+                    self.seen[field].add(attrs[field])
+            unique.append((row_number, attrs))
+        return unique
+
+    def insert(self, valid):
+        vehicles = [Vehicle(**attrs, added_by_id=self.added_by_id) for _, attrs in valid]
+        try:
+            with transaction.atomic():
+                Vehicle.objects.bulk_create(vehicles)
+        except IntegrityError:
+            # Another writer took one of the values since check_unique; find it row by row
+            vehicles = []
+            for row_number, attrs in valid:
+                vehicle = Vehicle(**attrs, added_by_id=self.added_by_id)
+                try:
+                    with transaction.atomic():
+                        Vehicle.objects.bulk_create([vehicle])
+                except IntegrityError as e:
+                    self.add_error(row_number, {"non_field_errors": [str(e).splitlines()[0]]})
+                else:
+                    vehicles.append(vehicle)
+        self.created_ids.extend(vehicle.pk for vehicle in vehicles)
+
+    def process_chunk(self, chunk):
+        self.rows += len(chunk)
+        valid = []
+        for row_number, data in chunk:
+            try:
+                valid.append((row_number, self.serializer.run_validation(data)))
+            except ValidationError as e:
+                self.add_error(row_number, as_serializer_error(e))
+
+        valid = self.check_unique(valid)
+        self.valid += len(valid)
+        if valid and not self.dry_run:
+            self.insert(valid)
+
+    def run(self, rows):
+        started = time.monotonic()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.process_chunk(chunk)
+
+        if self.created_ids:
+            rebuild_rollups()
+            refresh_ledgers(self.created_ids)
+            invalidate_catalogue()
+            schedule_matching(self.created_ids, new=True)
+
+        seconds = time.monotonic() - started
+        logger.debug(f"Vehicle import: {self.rows} rows, {len(self.created_ids)} created, "
+                     f"{self.failed} failed in {seconds:.2f}s")
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "created": len(self.created_ids),
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds else self.rows,
+        }
+
+
+def import_vehicles(fileobj, filename, **options):
+    """Import vehicles from a CSV or XLSX file into the current schema. See VehicleImport for options."""
+    return VehicleImport(**options).run(read_rows(fileobj, filename))
@@ -0,0 +1,127 @@
+# dealership/ledger.py
+"""
+Per-vehicle payment and cost ledger.
+
+VehicleLedger stores each vehicle's payment totals, balances and
+maintenance cost so the summary endpoints read a single row (or, for a
+list of vehicles, a single query) instead of aggregating payments and
+maintenance records on every request. Writes to Vehicle, Payment,
+MaintenanceRecord and OutboundVehicle schedule refresh_ledgers() for the
+affected vehicle once their transaction commits (see signals.py).
+
+Writes that bypass model signals (queryset.update(), bulk_create()) must
+be followed by refresh_ledgers() for the vehicles they touched.
+"""
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Vehicle, Payment, MaintenanceRecord, VehicleLedger
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FIELDS = (
+    'purchase_price', 'total_purchase_paid', 'purchase_balance',
+    'selling_price', 'total_selling_received', 'selling_balance',
+    'total_maintenance_cost', 'total_cost',
+)
+
+AMOUNT = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _total(queryset, field):
+    """Correlated subquery summing ``field`` over ``queryset``'s rows for the outer vehicle."""
+    summed = (queryset.filter(vehicle=OuterRef('pk'))
+              .order_by().values('vehicle')
+              .annotate(total=Sum(field)).values('total'))
+    return Coalesce(Subquery(summed, output_field=AMOUNT), Value(0), output_field=AMOUNT)
+
+
+def refresh_ledgers(vehicle_ids=None):
+    """
+    Recompute the ledgers of ``vehicle_ids`` (every vehicle if None) from
+    the source tables in one query and upsert them. Returns the number of
+    ledgers written.
+    """
+    vehicles = Vehicle.objects.all()
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(pk__in=list(vehicle_ids))
+
+    rows = vehicles.annotate(
+        ledger_purchase_price=Coalesce(F('purchase_price'), Value(0), output_field=AMOUNT),
+        ledger_selling_price=Coalesce(F('outboundvehicle__selling_price'), Value(0), output_field=AMOUNT),
+        ledger_purchase_paid=_total(Payment.objects.filter(payment_type='purchase'), 'amount_paid'),
+        ledger_selling_received=_total(Payment.objects.filter(payment_type='selling'), 'amount_paid'),
+        ledger_maintenance_cost=_total(MaintenanceRecord.objects.all(), 'cost'),
+    ).values_list(
+        'pk', 'ledger_purchase_price', 'ledger_selling_price',
+        'ledger_purchase_paid', 'ledger_selling_received', 'ledger_maintenance_cost',
+    )
+
+    ledgers = [
+        VehicleLedger(
+            vehicle_id=vehicle_id,
+            purchase_price=purchase_price,
+            total_purchase_paid=purchase_paid,
+            purchase_balance=purchase_price - purchase_paid,
+            selling_price=selling_price,
+            total_selling_received=selling_received,
+            selling_balance=selling_price - selling_received,
+            total_maintenance_cost=maintenance_cost,
+            total_cost=purchase_price + maintenance_cost,
+        )
+        for vehicle_id, purchase_price, selling_price, purchase_paid, selling_received, maintenance_cost in rows
+    ]
+    VehicleLedger.objects.bulk_create(
+        ledgers, batch_size=1000,
+        update_conflicts=True, unique_fields=['vehicle'], update_fields=[*LEDGER_FIELDS, 'updated_at'],
+    )
+    logger.debug(f"Refreshed {len(ledgers)} vehicle ledger(s)")
+    return len(ledgers)
+
+
+def get_ledgers(vehicle_ids):
+    """
+    {vehicle_id: VehicleLedger} for the given vehicles that exist. Ledgers
+    missing for existing vehicles (data from before the ledger) are built
+    on the way.
+    """
+    vehicle_ids = set(vehicle_ids)
+    ledgers = {ledger.vehicle_id: ledger for ledger in VehicleLedger.objects.filter(vehicle_id__in=vehicle_ids)}
+    missing = vehicle_ids - set(ledgers)
+    if missing and refresh_ledgers(missing):
+        ledgers.update((ledger.vehicle_id, ledger) for ledger in VehicleLedger.objects.filter(vehicle_id__in=missing))
+    return ledgers
+
+
+def _or_zero(amount):
+    # The views used to fall back to int 0 ("... or 0"), which renders as 0 rather than "0.00"
+    return amount or 0
+
+
+def payment_summary(ledger):
+    """VehiclePaymentSummaryAPIView's response shape, with its zero values."""
+    purchase_price = _or_zero(ledger.purchase_price)
+    total_purchase_paid = _or_zero(ledger.total_purchase_paid)
+    selling_price = _or_zero(ledger.selling_price)
+    total_selling_received = _or_zero(ledger.total_selling_received)
+    return {
+        "vehicle_id": ledger.vehicle_id,
+        "purchase_price": purchase_price,
+        "total_purchase_paid": total_purchase_paid,
+        "purchase_balance": purchase_price - total_purchase_paid,
+        "selling_price": selling_price,
+        "total_selling_received": total_selling_received,
+        "selling_balance": selling_price - total_selling_received,
+    }
+
+
+def cost_summary(ledger):
+    """VehicleCostAPIView's response shape, with its zero values."""
+    purchase_price = _or_zero(ledger.purchase_price)
+    total_maintenance_cost = _or_zero(ledger.total_maintenance_cost)
+    return {
+        "vehicle_id": ledger.vehicle_id,
+        "purchase_price": purchase_price,
+        "total_maintenance_cost": total_maintenance_cost,
+        "total_cost": purchase_price + total_maintenance_cost,
+    }
@@ -0,0 +1,612 @@
+# dealership/matching.py
+"""
+Inquiry-to-inventory matching.
+
+A VehicleInquiry stores the customer's wishes as free text. parse_inquiry()
+turns that text into match criteria:
+- make and model terms, normalized with MAKE_ALIASES so that spellings such
+  as "Maruti Suzuki" and "VW" fold together;
+- a budget range in rupees, e.g. "5-7 lakh", "under 8L" or "around 12,00,000";
+- an optional model year.
+
+Inquiries are matched against an InventoryIndex. The index holds the
+tenant's in-inventory vehicles in process memory, with a term -> vehicle id
+map and a price-sorted list, so scoring an inquiry never runs a query.
+inventory_indexes keeps one index per schema.
+
+Vehicle writes append the vehicle's id to a per-tenant change journal in the
+shared cache (see signals.py). Positions in the journal are reserved in the
+tenants.MatchingJournal table, because cache incr() is only atomic on Redis,
+so concurrent writes never share an entry. On its next lookup each process
+replays the journal and reloads only the vehicles that changed. It rebuilds
+the whole index if the journal has expired or fallen too far behind. Writes
+that skip signals must call schedule_matching() themselves. An index older
+than InventoryIndexCache.max_age is rebuilt anyway, so changes whose journal
+entries were evicted are picked up eventually.
+
+When vehicles arrive, schedule_matching() queues a MatchingJob. The worker
+(manage.py run_matching_worker) runs match_new_vehicles(), which scores
+every open inquiry against an index of just those vehicles and records the
+results as InquiryMatch rows.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django_tenants.utils import tenant_context
+from tenants.models import Client, MatchingJob, MatchingJournal
+from .models import Vehicle, VehicleInquiry, InquiryMatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Normalized phrase -> canonical make, applied before splitting into terms
+MAKE_ALIASES = {
+    'maruti suzuki': 'maruti',
+    'suzuki': 'maruti',
+    'mercedes benz': 'mercedes',
+    'benz': 'mercedes',
+    'merc': 'mercedes',
+    'mahindra and mahindra': 'mahindra',
+    'm and m': 'mahindra',
+    'vw': 'volkswagen',
+    'chevy': 'chevrolet',
+    'tata motors': 'tata',
+    'land rover': 'landrover',
+}
+STOP_WORDS = {'a', 'an', 'and', 'any', 'car', 'cars', 'for', 'hand', 'in', 'model', 'new', 'or',
+              'second', 'the', 'used', 'vehicle', 'with'}
+
+BUDGET_UNITS = {
+    'k': 1e3, 'thousand': 1e3,
+    'l': 1e5, 'lac': 1e5, 'lacs': 1e5, 'lakh': 1e5, 'lakhs': 1e5,
+    'cr': 1e7, 'crore': 1e7, 'crores': 1e7,
+}
+AMOUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(k|thousand|lakhs?|lacs?|l|crores?|cr)?(?![a-z])')
+YEAR_RE = re.compile(r'\b(19[89]\d|20\d\d)\b')
+UPPER_BOUND_RE = re.compile(r'\b(under|below|upto|up to|max|maximum|within|less than)\b|<')
+LOWER_BOUND_RE = re.compile(r'\b(above|over|min|minimum|at least|more than|starting)\b|>|\+')
+APPROXIMATE_RE = re.compile(r'\b(around|approx|approximately|about|near)\b|~')
+# Amounts without a unit below this are read as lakh ("budget 6")
+BARE_LAKH_LIMIT = 1000
+
+MAKE_WEIGHT = 0.4
+MODEL_WEIGHT = 0.4
+BUDGET_WEIGHT = 0.2
+YEAR_WEIGHT = 0.1
+BUDGET_TOLERANCE = 0.1  # Vehicles priced up to 10% outside the budget still match, with a lower score
+APPROXIMATE_SPREAD = 0.1
+DEFAULT_LIMIT = 10
+
+Criteria = namedtuple('Criteria', 'terms budget_min budget_max year')
+Entry = namedtuple('Entry', 'vehicle_id make_terms model_terms model_key price year '
+                            'vehicle_make vehicle_model license_plate_number estimated_selling_price')
+ENTRY_FIELDS = ('vehicle_id', 'vehicle_make', 'vehicle_model', 'year_of_manufacturing',
+                'license_plate_number', 'estimated_selling_price')
+
+
+def normalize(text):
+    """Lower-case ``text``, strip punctuation and fold make aliases."""
+    text = re.sub(r'[^a-z0-9]+', ' ', str(text or '').lower().replace('&', ' and ')).strip()
+    for phrase in sorted(MAKE_ALIASES, key=len, reverse=True):
+        text = re.sub(rf'\b{phrase}\b', MAKE_ALIASES[phrase], text)
+    return text
+
+
+def terms(text):
+    """Match terms of ``text``: its words plus adjacent pairs run together ("xuv 700" -> "xuv700")."""
+    words = [word for word in normalize(text).split() if word not in STOP_WORDS and not YEAR_RE.fullmatch(word)]
+    return set(words) | {first + second for first, second in zip(words, words[1:])}
+
+
+def parse_budget(text):
+    """(low, high) rupees for a free-text budget; either end may be None. (None, None) if unreadable."""
+    text = re.sub(r'(?<=\d),(?=\d)', '', str(text or '').lower())
+    amounts = []
+    for number, unit in AMOUNT_RE.findall(YEAR_RE.sub(' ', text)):
+        amounts.append([float(number), unit])
+    if not amounts:
+        return None, None
+    # "5-7 lakh": a unit written once applies to the amounts before it
+    for index in range(len(amounts) - 2, -1, -1):
+        if not amounts[index][1]:
+            amounts[index][1] = amounts[index + 1][1]
+    values = []
+    for number, unit in amounts:
+        if unit:
+            values.append(number * BUDGET_UNITS[unit])
+        else:
+            values.append(number * 1e5 if number < BARE_LAKH_LIMIT else number)
+
+    if len(values) >= 2:
+        return min(values[:2]), max(values[:2])
+    value = values[0]
+    if APPROXIMATE_RE.search(text):
+        return value * (1 - APPROXIMATE_SPREAD), value * (1 + APPROXIMATE_SPREAD)
+    if LOWER_BOUND_RE.search(text) and not UPPER_BOUND_RE.search(text):
+        return value, None
+    return None, value
+
+
+def parse_inquiry(inquiry):
+    """Criteria for a VehicleInquiry (or any object with Vehicle_name, model and budget)."""
+    wanted = f"{inquiry.Vehicle_name or ''} {inquiry.model or ''}"
+    year = YEAR_RE.search(wanted)
+    budget_min, budget_max = parse_budget(inquiry.budget)
+    return Criteria(frozenset(terms(wanted)), budget_min, budget_max, int(year.group(1)) if year else None)
+
+
+def make_entry(row):
+    model = normalize(row['vehicle_model'])
+    price = row['estimated_selling_price']
+    return Entry(
+        vehicle_id=row['vehicle_id'],
+        make_terms=frozenset(normalize(row['vehicle_make']).split()),
+        model_terms=frozenset(model.split()) - STOP_WORDS,
+        model_key=model.replace(' ', ''),
+        price=float(price) if price is not None else None,
+        year=row['year_of_manufacturing'],
+        vehicle_make=row['vehicle_make'],
+        vehicle_model=row['vehicle_model'],
+        license_plate_number=row['license_plate_number'],
+        estimated_selling_price=price,
+    )
+
+
+def budget_fit(price, criteria):
+    """1.0 inside the budget, falling to 0 at BUDGET_TOLERANCE outside it, None beyond that."""
+    if price is None:
+        return 0.0
+    if criteria.budget_max is not None and price > criteria.budget_max:
+        miss = (price - criteria.budget_max) / criteria.budget_max
+    elif criteria.budget_min is not None and price < criteria.budget_min:
+        miss = (criteria.budget_min - price) / criteria.budget_min
+    else:
+        return 1.0
+    return 1 - miss / BUDGET_TOLERANCE if miss <= BUDGET_TOLERANCE else None
+
+
+def price_window(criteria):
+    """Prices that can still match the budget, as (low, high); either may be None."""
+    low = criteria.budget_min * (1 - BUDGET_TOLERANCE) if criteria.budget_min is not None else None
+    high = criteria.budget_max * (1 + BUDGET_TOLERANCE) if criteria.budget_max is not None else None
+    return low, high
+
+
+class PriceList:
+    """Entries of one model year, sorted by price (unpriced ones apart)."""
+
+    def __init__(self):
+        self.keys = []  # [(price, vehicle_id)]
+        self.entries = []
+        self.unpriced = {}  # vehicle_id -> Entry
+
+    def __len__(self):
+        return len(self.keys) + len(self.unpriced)
+
+    def add(self, entry):
+        if entry.price is None:
+            self.unpriced[entry.vehicle_id] = entry
+            return
+        key = (entry.price, entry.vehicle_id)
+        position = bisect.bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, entry)
+
+    def discard(self, entry):
+        if entry.price is None:
+            self.unpriced.pop(entry.vehicle_id, None)
+            return
+        position = bisect.bisect_left(self.keys, (entry.price, entry.vehicle_id))
+        if position < len(self.keys) and self.keys[position][1] == entry.vehicle_id:
+            del self.keys[position]
+            del self.entries[position]
+
+    def position(self, price, after=False):
+        """Index of the first entry priced at ``price`` (above it if ``after``)."""
+        if price is None:
+            return len(self.keys) if after else 0
+        return bisect.bisect_right(self.keys, (price, float('inf'))) if after else bisect.bisect_left(self.keys, (price, -1))
+
+    def best(self, criteria, limit):
+        """
+        The entries that can rank in this list's top ``limit`` for the
+        budget. Inside the budget and in the band above it, cheaper ranks
+        higher; in the band below it, dearer ranks higher.
+        """
+        if criteria.budget_min is None and criteria.budget_max is None:
+            yield from self.entries[:limit]
+        else:
+            low, high = price_window(criteria)
+            inside_start = self.position(criteria.budget_min)
+            inside_end = self.position(criteria.budget_max, after=True)
+            yield from self.entries[inside_start:inside_end][:limit]
+            if criteria.budget_max is not None:
+                yield from self.entries[inside_end:self.position(high, after=True)][:limit]
+            if criteria.budget_min is not None:
+                below = self.entries[self.position(low):inside_start]
+                yield from reversed(below[-limit:] if limit else below)
+        yield from self.unpriced.values()
+
+
+class Stock:
+    """Entries grouped by model year, each year sorted by price."""
+
+    def __init__(self):
+        self.years = {}  # year -> PriceList
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, entry):
+        self.years.setdefault(entry.year, PriceList()).add(entry)
+        self.size += 1
+
+    def discard(self, entry):
+        prices = self.years.get(entry.year)
+        if prices is not None:
+            before = len(prices)
+            prices.discard(entry)
+            self.size -= before - len(prices)
+            if not len(prices):
+                del self.years[entry.year]
+
+
+class ModelGroup(Stock):
+    """The vehicles of one make and model; they share a make/model score."""
+
+    def __init__(self, entry):
+        super().__init__()
+        self.make_terms = entry.make_terms
+        self.model_terms = entry.model_terms
+        self.model_key = entry.model_key
+
+    @property
+    def terms(self):
+        return self.make_terms | self.model_terms | {self.model_key}
+
+    def term_score(self, criteria):
+        """Weighted make/model agreement with ``criteria.terms``, or None if neither matches."""
+        make = bool(self.make_terms) and self.make_terms <= criteria.terms
+        if self.model_key in criteria.terms:
+            model = 1.0
+        else:
+            model = len(self.model_terms & criteria.terms) / len(self.model_terms) if self.model_terms else 0.0
+        if not make and not model:
+            return None
+        # Naming the model alone ("Scorpio") is as specific as naming both
+        make = make or model == 1.0
+        return MAKE_WEIGHT * make + MODEL_WEIGHT * model
+
+
+class InventoryIndex:
+    """
+    In-memory match structures over a set of vehicles (rows of ENTRY_FIELDS):
+    make/model groups reachable by term, plus the whole stock for inquiries
+    that name only a budget. Within a group and model year, entries are
+    sorted by price, so an inquiry looks at no more than ``limit`` entries
+    per year and budget band, however large the inventory.
+    """
+
+    def __init__(self, rows=()):
+        self.entries = {}
+        self.groups = {}  # (make_terms, model_key) -> ModelGroup
+        self.by_term = defaultdict(set)  # term -> group keys
+        self.stock = Stock()
+        for row in rows:
+            self.add(row)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, row):
+        self.discard(row['vehicle_id'])
+        entry = make_entry(row)
+        self.entries[entry.vehicle_id] = entry
+        key = (entry.make_terms, entry.model_key)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = ModelGroup(entry)
+            for term in group.terms:
+                self.by_term[term].add(key)
+        group.add(entry)
+        self.stock.add(entry)
+
+    def discard(self, vehicle_id):
+        entry = self.entries.pop(vehicle_id, None)
+        if entry is None:
+            return
+        key = (entry.make_terms, entry.model_key)
+        group = self.groups[key]
+        group.discard(entry)
+        self.stock.discard(entry)
+        if not len(group):
+            del self.groups[key]
+            for term in group.terms:
+                self.by_term[term].discard(key)
+                if not self.by_term[term]:
+                    del self.by_term[term]
+
+    def _sources(self, criteria, budgeted):
+        """[(make/model score, Stock)] to draw candidates from."""
+        if not criteria.terms:
+            return [(0.0, self.stock)] if budgeted else []
+        keys = set()
+        for term in criteria.terms:
+            keys |= self.by_term.get(term, set())
+        sources = []
+        for key in keys:
+            earned = self.groups[key].term_score(criteria)
+            if earned is not None:
+                sources.append((earned, self.groups[key]))
+        return sources
+
+    def match(self, criteria, limit=DEFAULT_LIMIT):
+        """
+        [(score, Entry)] best first: higher score, then newer, then cheaper.
+        Without a ``limit`` every match is returned.
+
+        Each (group, model year) bucket has a best possible score, so the
+        buckets are visited best first and the search stops at the first
+        one that cannot beat the current ``limit``-th match.
+        """
+        budgeted = criteria.budget_min is not None or criteria.budget_max is not None
+        possible = (MAKE_WEIGHT + MODEL_WEIGHT if criteria.terms else 0.0) + (BUDGET_WEIGHT if budgeted else 0.0)
+        if criteria.year:
+            possible += YEAR_WEIGHT
+
+        def year_credit(year):
+            if not criteria.year:
+                return 0.0
+            return YEAR_WEIGHT * max(0.0, min(1.0, 1 - (criteria.year - (year or 0)) * 0.25))
+
+        buckets = []
+        for earned, source in self._sources(criteria, budgeted):
+            for year, prices in source.years.items():
+                ceiling = earned + (BUDGET_WEIGHT if budgeted else 0.0) + year_credit(year)
+                buckets.append((round(ceiling / possible, 4), year or 0, earned, prices))
+        buckets.sort(key=lambda bucket: bucket[:2], reverse=True)
+
+        ranked = []  # Min-heap of (score, year, -price, -vehicle_id, entry) when limited
+        for ceiling, year, earned, prices in buckets:
+            if limit and len(ranked) >= limit and (ceiling, year) < ranked[0][:2]:
+                break
+            credit = year_credit(year)
+            for entry in prices.best(criteria, limit):
+                value = earned + credit
+                if budgeted:
+                    fit = budget_fit(entry.price, criteria)
+                    if fit is None:
+                        continue
+                    value += BUDGET_WEIGHT * fit
+                price = -entry.price if entry.price is not None else float('-inf')
+                item = (round(value / possible, 4), year, price, -entry.vehicle_id, entry)
+                if not limit:
+                    ranked.append(item)
+                elif len(ranked) < limit:
+                    heapq.heappush(ranked, item)
+                elif item[:4] > ranked[0][:4]:
+                    heapq.heapreplace(ranked, item)
+        return [(item[0], item[-1]) for item in sorted(ranked, key=lambda item: item[:4], reverse=True)]
+
+
+def load_rows(vehicle_ids=None):
+    vehicles = Vehicle.objects.filter(inventory_status='IN')
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(vehicle_id__in=list(vehicle_ids))
+    return vehicles.values(*ENTRY_FIELDS)
+
+
+class InventoryIndexCache:
+    """
+    One InventoryIndex per schema for this process, brought up to date from
+    the shared change journal before each use.
+    """
+    journal_ttl = 86400
+    max_replay = 1000  # Further behind than this, rebuilding is cheaper than replaying
+    max_age = 3600  # Seconds before an index is rebuilt, and an unused one dropped
+    probe = 8  # Journal entries read past the published position
+
+    def __init__(self):
+        self._indexes = {}  # schema -> (journal position, InventoryIndex, built at)
+        self._lock = threading.Lock()
+
+    def _sequence_key(self, schema_name):
+        return f"dealership:matching:{schema_name}:seq"
+
+    def _change_key(self, schema_name, position):
+        return f"dealership:matching:{schema_name}:change:{position}"
+
+    def _reserved(self, schema_name):
+        """The journal's last reserved position, from the database."""
+        journal = MatchingJournal.objects.filter(schema_name=schema_name)
+        return journal.values_list('position', flat=True).first() or 0
+
+    def _published(self, schema_name):
+        """
+        The journal position announced in the shared cache. Writers publish
+        out of order, so it can lag behind the entries already written.
+        """
+        key = self._sequence_key(schema_name)
+        position = cache.get(key)
+        if position is None:
+            position = self._reserved(schema_name)
+            cache.add(key, position, None)
+        return position
+
+    def record_changes(self, schema_name, vehicle_ids):
+        """Append ``vehicle_ids`` to the tenant's change journal."""
+        vehicle_ids = list(vehicle_ids)
+        if not vehicle_ids:
+            return
+        # Cache incr() is a get-then-set outside Redis; reserve under a row lock
+        with transaction.atomic():
+            journal, _ = MatchingJournal.objects.select_for_update().get_or_create(schema_name=schema_name)
+            MatchingJournal.objects.filter(pk=journal.pk).update(position=F('position') + len(vehicle_ids))
+        end = journal.position + len(vehicle_ids)
+        if len(vehicle_ids) <= self.max_replay:
+            start = end - len(vehicle_ids) + 1
+            cache.set_many({self._change_key(schema_name, position): vehicle_id
+                            for position, vehicle_id in zip(range(start, end + 1), vehicle_ids)}, self.journal_ttl)
+        cache.set(self._sequence_key(schema_name), end, None)
+
+    def _changes(self, schema_name, seen):
+        """
+        (position, changed vehicle ids) journalled after position ``seen``,
+        or None if the journal cannot be replayed from there. Entries past
+        the published position are read too, up to the first missing one.
+        """
+        published = self._published(schema_name)
+        if published - seen > self.max_replay:
+            return None
+        keys = [self._change_key(schema_name, n) for n in range(seen + 1, max(published, seen) + self.probe + 1)]
+        found = cache.get_many(keys)
+        position, changed = seen, set()
+        for n, key in enumerate(keys, seen + 1):
+            if key not in found:
+                if n <= published:
+                    return None  # Expired, evicted or never written
+                break
+            position = n
+            changed.add(found[key])
+        return position, changed
+
+    def _current(self):
+        schema_name = connection.schema_name
+        now = time.monotonic()
+        for schema, (_, _, built_at) in list(self._indexes.items()):
+            if now - built_at > self.max_age:
+                del self._indexes[schema]
+        seen, index, built_at = self._indexes.get(schema_name, (None, None, now))
+
+        changes = None if index is None else self._changes(schema_name, seen)
+        if changes is None:
+            # Read the position first, so changes during the load are replayed
+            position = self._reserved(schema_name)
+            index, built_at = InventoryIndex(load_rows()), now
+            logger.debug(f"Inventory index built for {schema_name} ({len(index)} vehicles)")
+        else:
+            position, changed = changes
+            for vehicle_id in changed:
+                index.discard(vehicle_id)
+            if changed:
+                for row in load_rows(changed):
+                    index.add(row)
+        self._indexes[schema_name] = (position, index, built_at)
+        return index
+
+    def match(self, criteria_list, limit=DEFAULT_LIMIT):
+        """Matches for each Criteria against the current schema's inventory."""
+        with self._lock:
+            index = self._current()
+            results = {}  # Inquiries often share criteria
+            for criteria in criteria_list:
+                if criteria not in results:
+                    results[criteria] = index.match(criteria, limit)
+            return [results[criteria] for criteria in criteria_list]
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+inventory_indexes = InventoryIndexCache()
+
+
+def match_data(entry, value):
+    return {
+        "vehicle_id": entry.vehicle_id,
+        "score": value,
+        "vehicle_make": entry.vehicle_make,
+        "vehicle_model": entry.vehicle_model,
+        "year_of_manufacturing": entry.year,
+        "license_plate_number": entry.license_plate_number,
+        "estimated_selling_price": entry.estimated_selling_price,
+    }
+
+
+def criteria_data(criteria):
+    return {
+        "terms": sorted(criteria.terms),
+        "budget_min": criteria.budget_min,
+        "budget_max": criteria.budget_max,
+        "year": criteria.year,
+    }
+
+
+def match_inquiries(inquiries, limit=DEFAULT_LIMIT):
+    """{inquiry id: [(score, Entry)]} for ``inquiries`` in the current schema."""
+    inquiries = list(inquiries)
+    results = inventory_indexes.match([parse_inquiry(inquiry) for inquiry in inquiries], limit)
+    return {inquiry.pk: matches for inquiry, matches in zip(inquiries, results)}
+
+
+def match_new_vehicles(vehicle_ids, limit=DEFAULT_LIMIT):
+    """
+    Score every open inquiry against the in-inventory vehicles among
+    ``vehicle_ids`` and record up to ``limit`` best matches per inquiry.
+    Returns the number recorded.
+    """
+    index = InventoryIndex(load_rows(vehicle_ids))
+    if not len(index):
+        return 0
+    matches = []
+    inquiries = VehicleInquiry.objects.filter(status=VehicleInquiry.STATUS_OPEN).only(
+        'id', 'Vehicle_name', 'model', 'budget'
+    )
+    for inquiry in inquiries.iterator(chunk_size=2000):
+        for value, entry in index.match(parse_inquiry(inquiry), limit):
+            matches.append(InquiryMatch(inquiry_id=inquiry.pk, vehicle_id=entry.vehicle_id, score=value))
+    InquiryMatch.objects.bulk_create(matches, batch_size=1000, update_conflicts=True,
+                                     unique_fields=['inquiry', 'vehicle'], update_fields=['score'])
+    logger.debug(f"Matched {len(index)} new vehicle(s) to {len(matches)} open inquiry match(es) "
+                 f"in {connection.schema_name}")
+    return len(matches)
+
+
+def run_matching_job(job_id):
+    """Match a claimed MatchingJob's vehicles to its tenant's open inquiries. Runs in a worker process."""
+    job = MatchingJob.objects.select_related('tenant').get(pk=job_id)
+    try:
+        with tenant_context(job.tenant):
+            recorded = match_new_vehicles(job.vehicle_ids)
+    except Exception as e:
+        logger.error(f"Matching job {job.pk} ({len(job.vehicle_ids)} vehicles) failed: {str(e)}", exc_info=True)
+        MatchingJob.objects.filter(pk=job.pk).update(
+            status=MatchingJob.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+        )
+        return False
+
+    MatchingJob.objects.filter(pk=job.pk).update(status=MatchingJob.STATUS_DONE, finished_at=timezone.now())
+    logger.debug(f"Matching job {job.pk} recorded {recorded} match(es)")
+    return True
+
+
+def schedule_matching(vehicle_ids, new=False):
+    """
+    Once the current transaction commits, journal ``vehicle_ids`` for the
+    inventory indexes and, if they are ``new`` arrivals, queue a MatchingJob
+    for manage.py run_matching_worker to match them to the open inquiries.
+    Failures are logged rather than raised, as the write has committed.
+    """
+    vehicle_ids = list(vehicle_ids)
+    if not vehicle_ids:
+        return
+    schema_name = connection.schema_name
+
+    def journal_changes():
+        inventory_indexes.record_changes(schema_name, vehicle_ids)
+
+    def queue_matching():
+        MatchingJob.objects.create(tenant=Client.objects.get(schema_name=schema_name), vehicle_ids=vehicle_ids)
+
+    transaction.on_commit(journal_changes, robust=True)
+    if new:
+        transaction.on_commit(queue_matching, robust=True)
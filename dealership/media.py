@@ -0,0 +1,143 @@
+# dealership/media.py
+"""
+Reference counting and garbage collection for content-addressed media.
+
+MEDIA_FIELDS lists every file field stored in dealership.storage. Model
+signals (see signals.py) add a reference when a field starts pointing at a
+file and drop one when it stops, or when the row is deleted. Once a delete
+commits, files left without references are removed right away.
+
+Refcounts are the fast path, not the last word. Before a file is removed,
+collect_garbage() checks every media field for remaining references. This
+covers writes that bypass signals, such as bulk_create() or
+queryset.update(). Files written within MEDIA_GC_GRACE_SECONDS are left
+alone, because an upload is stored before the row that references it is
+saved. gc_media sweeps whatever the delete path skipped.
+"""
+from collections import Counter
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django_tenants.utils import schema_context
+from .models import Vehicle, VehicleImage, MaintenanceRecord, OutboundVehicle, MediaBlob
+from .storage import media_storage
+import logging
+
+logger = logging.getLogger(__name__)
+
+MEDIA_FIELDS = {
+    Vehicle: ('proof_of_ownership_document', 'proof_of_ownership', 'purchase_agreement'),
+    VehicleImage: ('image', 'thumbnail', 'thumbnail_webp', 'medium', 'medium_webp'),
+    MaintenanceRecord: ('receipt',),
+    OutboundVehicle: ('vehicle_current_images', 'buyers_proof_of_identity'),
+}
+
+
+def _grace():
+    return timedelta(seconds=getattr(settings, 'MEDIA_GC_GRACE_SECONDS', 3600))
+
+
+def file_names(instance, fields=None):
+    """Stored file names referenced by ``instance``'s media fields."""
+    fields = fields or MEDIA_FIELDS[type(instance)]
+    return [getattr(instance, field).name for field in fields if getattr(instance, field)]
+
+
+def load_file_names(instance, fields):
+    """File names currently stored in the database for ``instance``, or [] if it is new."""
+    if instance._state.adding or instance.pk is None:
+        return []
+    row = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+    return [name for name in row or () if name]
+
+
+def adjust_references(added=(), removed=()):
+    """Add one reference per name in ``added`` and drop one per name in ``removed``."""
+    delta = Counter(added)
+    delta.subtract(removed)
+    for name, change in delta.items():
+        if change:
+            MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + change)
+
+
+def retain_media(instances):
+    """Count the references of rows written with bulk_create(), which skips signals."""
+    adjust_references(added=[name for instance in instances for name in file_names(instance)])
+
+
+def referenced_names(names):
+    """The subset of ``names`` still referenced by any media field."""
+    names = set(names)
+    referenced = set()
+    for model, fields in MEDIA_FIELDS.items():
+        for field in fields:
+            referenced.update(model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    return referenced
+
+
+def remove_files(names):
+    """
+    Delete the files of blobs whose rows are gone. A name stored again since
+    then is skipped: its writer re-created the row. The placeholder row taken
+    here makes a concurrent writer wait until the file is gone, and then
+    store it afresh.
+    """
+    for name in names:
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.get_or_create(
+                name=name, defaults={'last_written_at': timezone.now() - _grace()}
+            )
+            if created:
+                media_storage.delete(name)
+                blob.delete()
+
+
+def collect_garbage(names=None, grace=None):
+    """
+    Delete unreferenced blobs of the current schema (only those in ``names``
+    if given) last written before the grace period. Their files are removed
+    once the deletion commits. Returns the number of blobs deleted.
+    """
+    cutoff = timezone.now() - (_grace() if grace is None else grace)
+    with transaction.atomic():
+        candidates = MediaBlob.objects.select_for_update(skip_locked=True).filter(
+            refcount__lte=0, last_written_at__lt=cutoff
+        )
+        if names is not None:
+            candidates = candidates.filter(name__in=list(names))
+        candidates = {blob.name: blob for blob in candidates}
+        if not candidates:
+            return 0
+
+        still_used = referenced_names(candidates)
+        for name in still_used:
+            # Referenced by a write that skipped signals; repair the count instead
+            blob = candidates.pop(name)
+            blob.refcount = sum(
+                model.objects.filter(**{field: name}).count()
+                for model, fields in MEDIA_FIELDS.items() for field in fields
+            )
+            blob.save(update_fields=['refcount'])
+
+        removed = len(candidates)
+        MediaBlob.objects.filter(name__in=list(candidates)).delete()
+        # A rollback keeps the rows, so their files must survive it
+        transaction.on_commit(partial(_in_schema, connection.schema_name, remove_files, list(candidates)))
+
+    logger.debug(f"Removed {removed} unreferenced media file(s) from {connection.schema_name}")
+    return removed
+
+
+def _in_schema(schema_name, function, *args):
+    with schema_context(schema_name):
+        function(*args)
+
+
+def schedule_garbage_collection(names):
+    """Collect ``names`` once the current transaction commits."""
+    if not names:
+        return
+    transaction.on_commit(partial(_in_schema, connection.schema_name, collect_garbage, names))
@@ -1,6 +1,7 @@
 # dealership/middleware.py
 from django.core.exceptions import PermissionDenied
 from rest_framework.views import APIView
+from accounts.authz import get_authorization
 
 class AutoPermissionMiddleware:
     def __init__(self, get_response):
@@ -22,5 +23,5 @@ class AutoPermissionMiddleware:
         if not permission:
             return None
             
-        if not request.user.has_perm(permission):
+        if not get_authorization(request.user).has_perm(permission):
             raise PermissionDenied("You don't have permission to access this resource")
\ No newline at end of file
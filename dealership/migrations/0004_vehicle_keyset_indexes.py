@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 17:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0003_remove_vehicle_upload_image_of_vehicle_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['arrival_date', 'vehicle_id'], name='vehicle_arrival_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['inventory_status', 'vehicle_id'], name='vehicle_status_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['inventory_status', 'arrival_date', 'vehicle_id'], name='vehicle_status_arrival_idx'),
+        ),
+    ]
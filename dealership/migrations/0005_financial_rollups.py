@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0004_vehicle_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vehicles_total', models.IntegerField(default=0)),
+                ('vehicles_in_inventory', models.IntegerField(default=0)),
+                ('vehicles_out_of_inventory', models.IntegerField(default=0)),
+                ('purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('maintenance_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('outbound_total', models.IntegerField(default=0)),
+                ('selling_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('other_expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('outbound_count', models.IntegerField(default=0)),
+                ('selling_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('other_expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('maintenance_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-18 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0005_financial_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleLedger',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='dealership.vehicle')),
+                ('purchase_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_purchase_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('purchase_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('selling_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_selling_received', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('selling_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_maintenance_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
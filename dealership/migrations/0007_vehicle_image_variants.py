@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0006_vehicle_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='medium',
+            field=models.ImageField(blank=True, null=True, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='medium_webp',
+            field=models.ImageField(blank=True, null=True, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, null=True, upload_to='vehicle_images/variants/'),
+        ),
+    ]
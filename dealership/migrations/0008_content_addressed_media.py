@@ -0,0 +1,84 @@
+# Generated by Django 5.1 on 2026-10-18 17:49
+
+import dealership.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0007_vehicle_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='maintenancerecord',
+            name='receipt',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='maintenance_receipts/'),
+        ),
+        migrations.AlterField(
+            model_name='outboundvehicle',
+            name='buyers_proof_of_identity',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='buyer_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='outboundvehicle',
+            name='vehicle_current_images',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='outbound_vehicle_images/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='proof_of_ownership',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='ownership_documents/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='proof_of_ownership_document',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='ownership_documents/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='purchase_agreement',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='purchase_agreements/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='image',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='vehicle_images/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='medium',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='medium_webp',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=dealership.storage.get_media_storage, upload_to='vehicle_images/variants/'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_written_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refcount', 'last_written_at'], name='mediablob_gc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1 on 2026-10-18 17:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+# Keep the column list in step with dealership.search.SEARCH_FIELDS
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION dealership_vehicle_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.vehicle_make, NEW.vehicle_model,
+                                                   NEW.license_plate_number)), 'A') ||
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.chassis_number, NEW.engine_number,
+                                                   NEW.osn_number)), 'B') ||
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.seller_name_company_name, NEW.color,
+                                                   NEW.fuel_type, NEW.vehicle_type)), 'C') ||
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.storage_location, NEW.notes)), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER dealership_vehicle_search_vector_trigger
+BEFORE INSERT OR UPDATE OF vehicle_make, vehicle_model, license_plate_number, chassis_number,
+    engine_number, osn_number, seller_name_company_name, color, fuel_type, vehicle_type,
+    storage_location, notes
+ON dealership_vehicle FOR EACH ROW EXECUTE FUNCTION dealership_vehicle_search_vector();
+
+-- Index the existing inventory through the trigger
+UPDATE dealership_vehicle SET vehicle_make = vehicle_make;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS dealership_vehicle_search_vector_trigger ON dealership_vehicle;
+DROP FUNCTION IF EXISTS dealership_vehicle_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0009_upload_sessions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_FUNCTION, DROP_SEARCH_VECTOR_FUNCTION),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='vehicle_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('license_plate_number'), name='gin_trgm_ops'), name='vehicle_plate_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('chassis_number'), name='gin_trgm_ops'), name='vehicle_chassis_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 18:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0010_vehicle_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleinquiry',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='InquiryMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('inquiry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='dealership.vehicleinquiry')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inquiry_matches', to='dealership.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='inquirymatch_created_idx')],
+                'constraints': [models.UniqueConstraint(fields=('inquiry', 'vehicle'), name='inquirymatch_inquiry_vehicle_uniq')],
+            },
+        ),
+    ]
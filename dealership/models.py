@@ -1,9 +1,28 @@
-from django.db import models
+import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from accounts.models import CustomUser  # Import your user model
 from django.conf import settings
 from django.utils import timezone
+from .storage import get_media_storage
 
-class Vehicle(models.Model):
+
+class AtomicSaveModel(models.Model):
+    """
+    Saves in a transaction, so rows locked by pre_save handlers stay locked
+    until post_save has run (see dealership.rollups.load_snapshot).
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class Vehicle(AtomicSaveModel):
     VEHICLE_TYPES = [
         ('car', 'Car'),
         ('bus', 'Bus'),
@@ -43,7 +62,7 @@ class Vehicle(models.Model):
     seller_name_company_name = models.CharField(max_length=100, null=False, blank=False)
     mobile_number = models.CharField(max_length=15, null=False, blank=False)
     email_address = models.EmailField(null=True, blank=True)
-    proof_of_ownership_document = models.FileField(upload_to='ownership_documents/', blank=True, null=True)
+    proof_of_ownership_document = models.FileField(upload_to='ownership_documents/', storage=get_media_storage, max_length=255, blank=True, null=True)
 
     # Condition and Inspection
     inspection_date = models.DateField(null=True, blank=True)
@@ -65,13 +84,13 @@ class Vehicle(models.Model):
         choices=[('Excellent', 'Excellent'), ('Good', 'Good'), ('Fair', 'Fair'), ('Poor', 'Poor')],
         default='Good', null=True, blank=True
     )
-    proof_of_ownership = models.FileField(upload_to='ownership_documents/', blank=True, null=True)
+    proof_of_ownership = models.FileField(upload_to='ownership_documents/', storage=get_media_storage, max_length=255, blank=True, null=True)
 
     # Purchase Information
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     date_of_purchase = models.DateField(null=True, blank=True)
     payment_method = models.CharField(max_length=30, null=True, blank=True)
-    purchase_agreement = models.FileField(upload_to='purchase_agreements/', blank=True, null=True)
+    purchase_agreement = models.FileField(upload_to='purchase_agreements/', storage=get_media_storage, max_length=255, blank=True, null=True)
     arrival_date = models.DateField(null=True, blank=True)
     storage_location = models.CharField(max_length=100, null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
@@ -83,6 +102,20 @@ class Vehicle(models.Model):
         null=True, 
         blank=True
     )
+    # Weighted tsvector written by a database trigger (migration 0010); see dealership.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        # Composite indexes for keyset pagination (dealership.pagination)
+        indexes = [
+            models.Index(fields=['arrival_date', 'vehicle_id'], name='vehicle_arrival_keyset_idx'),
+            models.Index(fields=['inventory_status', 'vehicle_id'], name='vehicle_status_keyset_idx'),
+            models.Index(fields=['inventory_status', 'arrival_date', 'vehicle_id'], name='vehicle_status_arrival_idx'),
+            # Inventory search (dealership.search); the trigram indexes serve icontains lookups
+            GinIndex(fields=['search_vector'], name='vehicle_search_vector_idx'),
+            GinIndex(OpClass(Upper('license_plate_number'), name='gin_trgm_ops'), name='vehicle_plate_trgm_idx'),
+            GinIndex(OpClass(Upper('chassis_number'), name='gin_trgm_ops'), name='vehicle_chassis_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehicle_make} - {self.vehicle_model} ({self.license_plate_number})"
@@ -93,9 +126,16 @@ class VehicleImage(models.Model):
         on_delete=models.CASCADE,
         related_name='images'
     )
-    image = models.ImageField(upload_to='vehicle_images/', blank=True, null=True)
+    image = models.ImageField(upload_to='vehicle_images/', storage=get_media_storage, max_length=255, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Resized, EXIF-free renditions written by dealership.images; empty until processed
+    thumbnail = models.ImageField(upload_to='vehicle_images/variants/', storage=get_media_storage, max_length=255, blank=True, null=True)
+    thumbnail_webp = models.ImageField(upload_to='vehicle_images/variants/', storage=get_media_storage, max_length=255, blank=True, null=True)
+    medium = models.ImageField(upload_to='vehicle_images/variants/', storage=get_media_storage, max_length=255, blank=True, null=True)
+    medium_webp = models.ImageField(upload_to='vehicle_images/variants/', storage=get_media_storage, max_length=255, blank=True, null=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"Image for {self.vehicle.vehicle_make} - {self.vehicle.vehicle_model}"
         
@@ -139,7 +179,7 @@ class Payment(models.Model):
     def __str__(self):
         return f"{self.vehicle.license_plate_number} - {self.slot_number} - {self.payment_type} - ₹{self.amount_paid} - {self.payment_mode}"
 
-class MaintenanceRecord(models.Model):
+class MaintenanceRecord(AtomicSaveModel):
     MAINTENANCE_TYPES = [
         ('oil_change', 'Oil Change'),
         ('tire_replacement', 'Tire Replacement'),
@@ -159,7 +199,7 @@ class MaintenanceRecord(models.Model):
     maintenance_date = models.DateField()
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     person_in_charge = models.CharField(max_length=100, null=True, blank=True)
-    receipt = models.FileField(upload_to='maintenance_receipts/', blank=True, null=True)
+    receipt = models.FileField(upload_to='maintenance_receipts/', storage=get_media_storage, max_length=255, blank=True, null=True)
     payment_mode = models.CharField(max_length=50, null=True, blank=True)  # ✅ New Field for Payment Mode
     created_at = models.DateTimeField(default=timezone.now)  # Allows manual modification if needed
    
@@ -167,9 +207,9 @@ class MaintenanceRecord(models.Model):
         return f"Maintenance for {self.vehicle.vehicle_make} - {self.maintenance_type}"
 
 
-class OutboundVehicle(models.Model):
+class OutboundVehicle(AtomicSaveModel):
     vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE)  # Connects to the existing vehicle
-    vehicle_current_images = models.ImageField(upload_to="outbound_vehicle_images/", blank=True, null=True)
+    vehicle_current_images = models.ImageField(upload_to="outbound_vehicle_images/", storage=get_media_storage, max_length=255, blank=True, null=True)
     vehicle_current_condition = models.CharField(
         max_length=20,
         choices=[('Excellent', 'Excellent'), ('Good', 'Good'), ('Bad', 'Bad'), ('Worse', 'Worse')],
@@ -179,7 +219,7 @@ class OutboundVehicle(models.Model):
     buyers_name = models.CharField(max_length=100)
     buyers_contact_details = models.CharField(max_length=15)
     buyers_address = models.TextField(blank=True, null=True)
-    buyers_proof_of_identity = models.FileField(upload_to="buyer_proofs/", blank=True, null=True)
+    buyers_proof_of_identity = models.FileField(upload_to="buyer_proofs/", storage=get_media_storage, max_length=255, blank=True, null=True)
     delivery_status = models.CharField(max_length=50, default="Pending")
     outbound_date = models.DateField()
     estimated_delivery_date = models.DateField(blank=True, null=True)
@@ -205,15 +245,40 @@ class Inquirybroker(models.Model):
     contact=models.CharField(null=False,max_length=255)
 
 class VehicleInquiry(models.Model):
+    STATUS_OPEN = 'open'
+    STATUS_CLOSED = 'closed'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_CLOSED, 'Closed'),
+    ]
+
     name=models.CharField(null=True,max_length=255)
     contact=models.CharField(null=True,max_length=255)
     Vehicle_name=models.CharField(null=True,max_length=255)
     budget=models.CharField(null=True,max_length=255)
     model=models.CharField(null=True,max_length=255)
+    # Open inquiries are re-matched when vehicles arrive (dealership.matching)
+    status=models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_OPEN)
 
     def __str__(self):
         return f"{self.name} -{self.Vehicle_name}"
 
+
+class InquiryMatch(models.Model):
+    """A vehicle that arrived matching an open inquiry, recorded by dealership.matching."""
+    inquiry = models.ForeignKey(VehicleInquiry, on_delete=models.CASCADE, related_name='matches')
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='inquiry_matches')
+    score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inquiry', 'vehicle'], name='inquirymatch_inquiry_vehicle_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='inquirymatch_created_idx'),
+        ]
+
 # bill record 
 class ElectricityBill(models.Model):
     """Model to store electricity bill details"""
@@ -299,4 +364,131 @@ class Invoice(models.Model):
 
     def __str__(self):
         return f"Invoice {self.invoice_no} - {self.invoice_name}"
-    
\ No newline at end of file
+    
+
+# Dashboard rollups, maintained incrementally by dealership.rollups
+class FinancialRollup(models.Model):
+    """Running totals for the tenant's dashboard. A single row (pk=1) per schema."""
+    vehicles_total = models.IntegerField(default=0)
+    vehicles_in_inventory = models.IntegerField(default=0)
+    vehicles_out_of_inventory = models.IntegerField(default=0)
+    purchase_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    maintenance_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    outbound_total = models.IntegerField(default=0)
+    selling_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    other_expense_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Financial rollup (updated {self.updated_at})"
+
+
+class MonthlyRollup(models.Model):
+    """Per calendar month totals; ``month`` is the first day of the month."""
+    month = models.DateField(unique=True)
+    outbound_count = models.IntegerField(default=0)
+    selling_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    other_expense_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    maintenance_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['month']
+
+    def __str__(self):
+        return f"Rollup for {self.month.strftime('%B %Y')}"
+
+
+class VehicleLedger(models.Model):
+    """Denormalized payment and cost totals for one vehicle, kept current by dealership.ledger."""
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='ledger')
+    purchase_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_purchase_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    purchase_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_selling_received = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    selling_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_maintenance_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Ledger for vehicle {self.vehicle_id}"
+
+
+class MediaBlob(models.Model):
+    """
+    One content-addressed file in dealership.storage, shared by every field
+    value with the same content. ``refcount`` is maintained by dealership.media.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_written_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['refcount', 'last_written_at'], name='mediablob_gc_idx')]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} reference(s))"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload (dealership.uploads). The file arrives as
+    fixed-size parts, in any order and possibly in parallel, written into a
+    staging file; on completion it is attached to the vehicle, either as a
+    new VehicleImage or as one of its document fields.
+    """
+    TARGET_IMAGE = 'image'
+    TARGET_CHOICES = [
+        (TARGET_IMAGE, 'Vehicle Image'),
+        ('proof_of_ownership_document', 'Proof of Ownership Document'),
+        ('proof_of_ownership', 'Proof of Ownership'),
+        ('purchase_agreement', 'Purchase Agreement'),
+    ]
+    STATUS_OPEN = 'open'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='upload_sessions')
+    target = models.CharField(max_length=30, choices=TARGET_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    part_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    vehicle_image = models.ForeignKey(VehicleImage, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.size // self.part_size))
+
+    def part_length(self, number):
+        """Expected size in bytes of part ``number`` (0-based)."""
+        return min(self.part_size, self.size - number * self.part_size)
+
+    def __str__(self):
+        return f"Upload {self.pk} ({self.filename}, {self.status})"
+
+
+class UploadPart(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='parts')
+    number = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'number'], name='uploadpart_session_number_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Part {self.number} of upload {self.session_id}"
@@ -0,0 +1,213 @@
+# dealership/pagination.py
+import base64
+import json
+from datetime import date
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class VehicleKeysetPagination(BasePagination):
+    """
+    Keyset pagination for vehicle lists.
+
+    Pages are located with a WHERE clause on the last row seen (ordering value,
+    vehicle_id) instead of an OFFSET, so each page costs the same index range
+    scan however deep the client has scrolled. Cursors are opaque base64
+    tokens; ``?count=false`` skips the COUNT query.
+
+    Pagination is opt-in (``cursor`` or ``page_size`` in the query string) so
+    existing clients keep receiving a plain list.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+
+    # Each non-pk ordering is backed by a composite (field, vehicle_id) index
+    ordering_fields = ('vehicle_id', 'arrival_date')
+    filter_fields = ('inventory_status',)
+    default_ordering = 'vehicle_id'
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be an integer.'})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be at least 1.'})
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({self.ordering_query_param: f"Must be one of: {', '.join(self.ordering_fields)} (prefix '-' for descending)."})
+        return ordering
+
+    # Cursor encoding
+
+    def encode_cursor(self, ordering, value, pk, reverse=False):
+        if isinstance(value, date):
+            value = value.isoformat()
+        payload = {'o': ordering, 'v': value, 'p': pk}
+        if reverse:
+            payload['r'] = 1
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+    def decode_cursor(self, request, ordering):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            if payload['o'] != ordering:
+                raise ValueError('ordering changed')
+            value = payload['v']
+            if value is not None and ordering.lstrip('-') == 'arrival_date':
+                value = date.fromisoformat(value)
+            return value, int(payload['p']), bool(payload.get('r'))
+        except (ValueError, KeyError, TypeError):
+            raise NotFound('Invalid cursor')
+
+    # Keyset filtering
+
+    @staticmethod
+    def _after(field, descending, value, pk):
+        """
+        Q for rows strictly after (value, pk) in the given ordering. PostgreSQL
+        sorts NULLs last ascending and first descending, which this mirrors.
+        """
+        if field == 'vehicle_id':
+            return Q(vehicle_id__lt=pk) if descending else Q(vehicle_id__gt=pk)
+
+        if descending:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'vehicle_id__lt': pk}) | Q(**{f'{field}__isnull': False})
+            return Q(**{f'{field}__lt': value}) | Q(**{field: value, 'vehicle_id__lt': pk})
+
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'vehicle_id__gt': pk})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'vehicle_id__gt': pk}) | Q(**{f'{field}__isnull': True})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+
+        for name in self.filter_fields:
+            value = request.query_params.get(name)
+            if value:
+                queryset = queryset.filter(**{name: value})
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, 'true').lower() not in ('false', '0'):
+            self.count = queryset.count()
+
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        cursor = self.decode_cursor(request, self.ordering)
+        reverse = bool(cursor and cursor[2])
+
+        # Walking backwards is the same scan with the ordering flipped
+        scan_descending = descending != reverse
+        order_by = [] if field == 'vehicle_id' else [F(field).desc() if scan_descending else F(field).asc()]
+        order_by.append('-vehicle_id' if scan_descending else 'vehicle_id')
+        queryset = queryset.order_by(*order_by)
+        if cursor:
+            queryset = queryset.filter(self._after(field, scan_descending, cursor[0], cursor[1]))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if has_more or reverse:
+                self.next_cursor = self.encode_cursor(self.ordering, getattr(last, field), last.pk)
+            if cursor and (has_more or not reverse):
+                self.previous_cursor = self.encode_cursor(self.ordering, getattr(first, field), first.pk, reverse=True)
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self._link(self.next_cursor),
+            'previous': self._link(self.previous_cursor),
+            'results': data,
+        }
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+
+class VehicleSearchPagination(BasePagination):
+    """
+    Page-number pagination for ranked search results (dealership.search).
+
+    A rank has no stable key to seek on, so pages are OFFSET slices. The
+    total comes from the facet query, so no separate COUNT is run: set
+    ``count`` before paginating.
+    """
+    page_size = 25
+    max_page_size = 100
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, count=0):
+        self.count = count
+
+    def _positive_int(self, request, param, default):
+        value = request.query_params.get(param)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({param: 'Must be an integer.'})
+        if value < 1:
+            raise ValidationError({param: 'Must be at least 1.'})
+        return value
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = min(self._positive_int(request, self.page_size_query_param, self.page_size),
+                             self.max_page_size)
+        self.page = self._positive_int(request, self.page_query_param, 1)
+        offset = (self.page - 1) * self.page_size
+        if offset >= self.count:
+            return []
+        return list(queryset[offset:offset + self.page_size])
+
+    def _link(self, page):
+        if page < 1 or (page - 1) * self.page_size >= self.count:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, page)
+
+    def get_paginated_response(self, data, facets=None):
+        return Response({
+            'count': self.count,
+            'page': self.page,
+            'next': self._link(self.page + 1),
+            'previous': self._link(self.page - 1),
+            'results': data,
+            'facets': facets or {},
+        })
@@ -0,0 +1,135 @@
+# dealership/request_log.py
+"""
+Structured request logging.
+
+RequestLogMiddleware writes one record per request to the
+"dealership.requests" logger. It replaces the header, session and cookie
+dumps that views used to format on every call, whether or not DEBUG
+logging was on. The middleware costs one isEnabledFor() check when the
+logger is off. With the logger on, only a sample of requests is logged
+(REQUEST_LOG_SAMPLE_RATE), but server errors and requests slower than
+REQUEST_LOG_SLOW_MS are always logged. The record is built only for a
+request that is logged. Header and cookie details are added only at DEBUG
+level, with credentials redacted. Nothing here reads the session or
+authenticates a user that the view did not.
+
+RequestContextFilter adds the current request id and tenant to the records
+of the handlers it is attached to (in settings, the "requests" handler)
+while a request is handled. JSONFormatter renders records as one JSON
+object per line.
+"""
+import json
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+import logging
+
+logger = logging.getLogger('dealership.requests')
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REDACTED_HEADERS = {'authorization', 'proxy-authorization', 'cookie', 'x-csrftoken', 'x-session-id',
+                    'x-encrypted-uid', 'x-api-key'}
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_current_request = ContextVar('current_request', default=None)
+
+
+def request_id(request):
+    """The client's X-Request-ID, or a new id, generated on first use."""
+    if not hasattr(request, '_request_id'):
+        request._request_id = request.headers.get(REQUEST_ID_HEADER, '')[:64] or uuid.uuid4().hex
+    return request._request_id
+
+
+def _tenant_schema(request):
+    tenant = getattr(request, 'tenant', None)
+    return getattr(tenant, 'schema_name', None)
+
+
+def _user_id(request):
+    # Only report a user someone already loaded; resolving it here would read the session
+    user = request.__dict__.get('user')
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+def request_details(request):
+    """Headers and cookie names for DEBUG records, without credentials."""
+    return {
+        'headers': {name: '[redacted]' if name.lower() in REDACTED_HEADERS else value
+                    for name, value in request.headers.items()},
+        'cookies': sorted(request.COOKIES),
+    }
+
+
+class RequestLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_LOG_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'REQUEST_LOG_SLOW_MS', 1000)
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            if not logger.isEnabledFor(logging.INFO):
+                return self.get_response(request)
+            sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if sampled or response.status_code >= 500 or duration_ms >= self.slow_ms:
+                self.log(request, response, duration_ms)
+            return response
+        finally:
+            _current_request.reset(token)
+
+    def log(self, request, response, duration_ms):
+        context = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'user_id': _user_id(request),
+        }
+        if logger.isEnabledFor(logging.DEBUG):
+            context.update(request_details(request))
+        level = logging.ERROR if response.status_code >= 500 else logging.INFO
+        logger.log(level, "%s %s %s", request.method, request.path, response.status_code, extra=context)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds ``request_id`` and ``tenant`` to records logged during a request.
+    Attach it to a handler, not a logger, so that it also sees records
+    propagated from child loggers.
+    """
+
+    def filter(self, record):
+        request = _current_request.get()
+        if request is not None:
+            record.request_id = request_id(request)
+            record.tenant = _tenant_schema(request)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any ``extra`` fields at the top level."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
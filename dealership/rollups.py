@@ -0,0 +1,180 @@
+# dealership/rollups.py
+"""
+Incrementally maintained dashboard rollups.
+
+FinancialRollup holds the tenant's running totals and MonthlyRollup the
+per-calendar-month buckets. Saves and deletes of Vehicle, OutboundVehicle and
+MaintenanceRecord apply the difference between the row's old and new
+contribution with F() updates (see signals.py), so the dashboard reads a
+handful of rows however much history a tenant has. The old values are read
+with the source row locked, so concurrent writes to one row are applied in
+turn. rebuild_rollups() recomputes everything from the source tables, and
+runs automatically the first time a tenant's rollup is read.
+
+Writes that bypass model signals (queryset.update(), bulk_create()) must be
+followed by rebuild_rollups().
+"""
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import Vehicle, OutboundVehicle, MaintenanceRecord, FinancialRollup, MonthlyRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PK = 1
+
+# Fields whose values feed the rollups, per model
+TRACKED_FIELDS = {
+    Vehicle: ('inventory_status', 'purchase_price'),
+    OutboundVehicle: ('outbound_date', 'selling_price', 'other_expense'),
+    MaintenanceRecord: ('maintenance_date', 'cost'),
+}
+
+
+def _amount(value):
+    return Decimal(str(value)) if value not in (None, '') else Decimal('0')
+
+
+def _month(value):
+    value = models.DateField().to_python(value)
+    return value.replace(day=1) if value else None
+
+
+def _contribution(model, values):
+    """(totals, {month: totals}) a single row with ``values`` adds to the rollups."""
+    if values is None:
+        return {}, {}
+    if model is Vehicle:
+        status = values['inventory_status']
+        return {
+            'vehicles_total': 1,
+            'vehicles_in_inventory': 1 if status == 'IN' else 0,
+            'vehicles_out_of_inventory': 1 if status == 'OUT' else 0,
+            'purchase_total': _amount(values['purchase_price']),
+        }, {}
+    if model is OutboundVehicle:
+        sale = {
+            'selling_total': _amount(values['selling_price']),
+            'other_expense_total': _amount(values['other_expense']),
+        }
+        month = _month(values['outbound_date'])
+        return {'outbound_total': 1, **sale}, ({month: {'outbound_count': 1, **sale}} if month else {})
+    if model is MaintenanceRecord:
+        cost = _amount(values['cost'])
+        month = _month(values['maintenance_date'])
+        return {'maintenance_total': cost}, ({month: {'maintenance_total': cost}} if month else {})
+    raise ValueError(f"{model.__name__} does not feed the rollups")
+
+
+def _subtract(new, old):
+    delta = {key: new.get(key, 0) - old.get(key, 0) for key in set(new) | set(old)}
+    return {key: value for key, value in delta.items() if value}
+
+
+def snapshot(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS[type(instance)]}
+
+
+def load_snapshot(instance):
+    """
+    Values currently stored in the database for ``instance``, or None if it
+    is new. Must run in a transaction: the row stays locked until it ends, so
+    a concurrent save or delete of the same row waits and then reads the
+    committed values instead of applying its change to the same old ones.
+    """
+    if instance._state.adding or instance.pk is None:
+        return None
+    model = type(instance)
+    return model.objects.select_for_update().filter(pk=instance.pk).values(*TRACKED_FIELDS[model]).first()
+
+
+def apply_change(model, old, new):
+    """
+    Apply the change of one row from ``old`` to ``new`` (either may be None
+    for a create or delete). Skipped while the tenant has no rollup yet; the
+    first read builds it from scratch.
+    """
+    old_totals, old_months = _contribution(model, old)
+    new_totals, new_months = _contribution(model, new)
+    totals = _subtract(new_totals, old_totals)
+    months = {}
+    for month in set(old_months) | set(new_months):
+        delta = _subtract(new_months.get(month, {}), old_months.get(month, {}))
+        if delta:
+            months[month] = delta
+    if not totals and not months:
+        return
+
+    with transaction.atomic():
+        updated = FinancialRollup.objects.filter(pk=ROLLUP_PK).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in totals.items()}
+        )
+        if not updated:
+            return
+        for month, delta in months.items():
+            MonthlyRollup.objects.get_or_create(month=month)
+            MonthlyRollup.objects.filter(month=month).update(
+                **{field: F(field) + value for field, value in delta.items()}
+            )
+
+
+def rebuild_rollups():
+    """Recompute the current schema's rollups from the source tables."""
+    with transaction.atomic():
+        rollup, _ = FinancialRollup.objects.get_or_create(pk=ROLLUP_PK)
+        # Writers block on this row lock until the rebuild commits
+        FinancialRollup.objects.select_for_update().filter(pk=ROLLUP_PK).get()
+
+        vehicles = Vehicle.objects.aggregate(
+            total=Count('pk'),
+            in_inventory=Count('pk', filter=Q(inventory_status='IN')),
+            out_of_inventory=Count('pk', filter=Q(inventory_status='OUT')),
+            purchase=Sum('purchase_price'),
+        )
+        months = {}
+        sales = (OutboundVehicle.objects
+                 .annotate(month=TruncMonth('outbound_date')).values('month')
+                 .annotate(count=Count('pk'), selling=Sum('selling_price'), other=Sum('other_expense'))
+                 .order_by())
+        for row in sales:
+            months[row['month']] = MonthlyRollup(
+                month=row['month'], outbound_count=row['count'],
+                selling_total=row['selling'] or 0, other_expense_total=row['other'] or 0,
+            )
+        maintenance = (MaintenanceRecord.objects
+                       .annotate(month=TruncMonth('maintenance_date')).values('month')
+                       .annotate(cost=Sum('cost'))
+                       .order_by())
+        for row in maintenance:
+            months.setdefault(row['month'], MonthlyRollup(month=row['month'])).maintenance_total = row['cost'] or 0
+
+        buckets = list(months.values())
+        rollup.vehicles_total = vehicles['total']
+        rollup.vehicles_in_inventory = vehicles['in_inventory']
+        rollup.vehicles_out_of_inventory = vehicles['out_of_inventory']
+        rollup.purchase_total = vehicles['purchase'] or 0
+        rollup.outbound_total = sum(bucket.outbound_count for bucket in buckets)
+        rollup.selling_total = sum((bucket.selling_total for bucket in buckets), Decimal('0'))
+        rollup.other_expense_total = sum((bucket.other_expense_total for bucket in buckets), Decimal('0'))
+        rollup.maintenance_total = sum((bucket.maintenance_total for bucket in buckets), Decimal('0'))
+        rollup.save()
+
+        MonthlyRollup.objects.all().delete()
+        MonthlyRollup.objects.bulk_create(buckets)
+
+    logger.debug(f"Rebuilt rollups: {rollup.vehicles_total} vehicles, {len(buckets)} months")
+    return rollup
+
+
+def get_rollup():
+    """The current schema's FinancialRollup, built on first use."""
+    return FinancialRollup.objects.filter(pk=ROLLUP_PK).first() or rebuild_rollups()
+
+
+def get_monthly_rollups(first_month, last_month):
+    """{month start: MonthlyRollup} for months in [first_month, last_month]."""
+    return {bucket.month: bucket for bucket in MonthlyRollup.objects.filter(month__range=(first_month, last_month))}
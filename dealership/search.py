@@ -0,0 +1,104 @@
+# dealership/search.py
+"""
+Inventory search.
+
+Vehicle.search_vector is a weighted tsvector of SEARCH_FIELDS. A database
+trigger (migration 0010) maintains it, so rows written with bulk_create()
+or queryset.update() are indexed too. Every search term is matched as a
+prefix, so "toyo cor" finds a Toyota Corolla. License plate and chassis
+numbers also match on any substring, using the trigram indexes on
+UPPER(field).
+
+A search runs two queries. The first is a single GROUP BY over the facet
+fields, which yields every facet's counts and the total. The second
+fetches the requested page, ranked by ts_rank plus license plate
+similarity.
+"""
+import re
+from collections import Counter
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+from .models import Vehicle
+
+# Weight A to D, as written by the trigger in migration 0010
+SEARCH_FIELDS = (
+    ('vehicle_make', 'vehicle_model', 'license_plate_number'),
+    ('chassis_number', 'engine_number', 'osn_number'),
+    ('seller_name_company_name', 'color', 'fuel_type', 'vehicle_type'),
+    ('storage_location', 'notes'),
+)
+FACET_FIELDS = ('vehicle_type', 'fuel_type', 'inventory_status')
+SUBSTRING_FIELDS = ('license_plate_number', 'chassis_number')
+MIN_SUBSTRING_LENGTH = 3  # Shorter needles cannot use a trigram index
+MAX_TERMS = 8
+
+
+def prefix_query(text):
+    """A tsquery matching every word of ``text`` as a prefix, or None if it has no words."""
+    terms = re.findall(r'[^\W_]+', text.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+
+
+def facet_counts(vehicles, filters):
+    """
+    (total, facets) for ``vehicles`` narrowed by ``filters``, from one
+    GROUP BY over the combinations of facet values. Each facet is counted
+    with the other facets' filters applied but not its own, so clients can
+    offer the alternatives to a selected value.
+    """
+    total = 0
+    counters = {field: Counter() for field in FACET_FIELDS}
+    for row in vehicles.order_by().values(*FACET_FIELDS).annotate(count=Count('pk')):
+        mismatched = {field for field, value in filters.items() if row[field] != value}
+        if not mismatched:
+            total += row['count']
+        for field in FACET_FIELDS:
+            if mismatched <= {field}:
+                counters[field][row[field]] += row['count']
+    facets = {
+        field: [
+            {"value": value, "count": count}
+            for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0] or ''))
+        ]
+        for field, counter in counters.items()
+    }
+    return total, facets
+
+
+def search_vehicles(text='', filters=None):
+    """
+    (vehicles, total, facets) for the search ``text`` and ``filters``
+    ({facet field: value}) in the current schema. ``vehicles`` is an
+    unevaluated queryset annotated with ``rank``, best match first.
+    """
+    filters = {field: value for field, value in (filters or {}).items() if field in FACET_FIELDS and value}
+    vehicles = Vehicle.objects.defer('search_vector')
+    rank = None
+
+    text = text.strip()
+    if text:
+        match = Q()
+        query = prefix_query(text)
+        if query is not None:
+            match |= Q(search_vector=query)
+            rank = SearchRank(F('search_vector'), query)
+        needle = ''.join(text.split())
+        if len(needle) >= MIN_SUBSTRING_LENGTH:
+            for field in SUBSTRING_FIELDS:
+                match |= Q(**{f'{field}__icontains': needle})
+            similarity = TrigramSimilarity('license_plate_number', needle)
+            rank = similarity if rank is None else rank + similarity
+        if not match:
+            return Vehicle.objects.none(), 0, facet_counts(Vehicle.objects.none(), filters)[1]
+        vehicles = vehicles.filter(match)
+
+    total, facets = facet_counts(vehicles, filters)
+    vehicles = vehicles.filter(**filters)
+    if rank is None:
+        vehicles = vehicles.annotate(rank=Value(0.0, output_field=FloatField())).order_by('-vehicle_id')
+    else:
+        vehicles = vehicles.annotate(rank=Coalesce(rank, 0.0, output_field=FloatField())).order_by('-rank', '-vehicle_id')
+    return vehicles, total, facets
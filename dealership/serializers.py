@@ -5,15 +5,19 @@ from .models import Vehicle, VehicleImage, MaintenanceRecord, OutboundVehicle, P
 from rest_framework.serializers import Serializer
 User = get_user_model()
 from django.db.models import Sum
+from django.db import transaction
+from .images import queue_image_processing, variant_urls
+from .ledger import refresh_ledgers
 
 
 class VehicleImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = VehicleImage
-        fields = ['id', 'image', 'image_url', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = ['id', 'image', 'image_url', 'variants', 'uploaded_at', 'processed_at']
+        read_only_fields = ['id', 'uploaded_at', 'processed_at']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -21,6 +25,13 @@ class VehicleImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_variants(self, obj):
+        """Thumbnail and medium URLs (JPEG and WebP); the original until they are rendered."""
+        request = self.context.get('request')
+        if not request:
+            return None
+        return variant_urls(obj, request.build_absolute_uri)
+
         
 class CombinedVehicleSerializer(serializers.ModelSerializer):
     proof_of_ownership_url = serializers.SerializerMethodField()
@@ -64,12 +75,32 @@ class CombinedVehicleSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         images_data = self.context['request'].FILES.getlist('vehicle_images', [])
         validated_data.pop('vehicle_images', None)  # Remove vehicle_images if present
-        vehicle = Vehicle.objects.create(**validated_data, added_by=self.context['request'].user)
-        for image_data in images_data:
-            VehicleImage.objects.create(vehicle=vehicle, image=image_data)
+        vehicle = Vehicle.objects.create(**validated_data, added_by_id=self.context['request'].user.pk)
+        images = [VehicleImage.objects.create(vehicle=vehicle, image=image_data) for image_data in images_data]
+        queue_image_processing(images)
         return vehicle
 
 
+class VehicleImportSerializer(CombinedVehicleSerializer):
+    """
+    CombinedVehicleSerializer's rules for one row of a bulk import. File and
+    image fields are not importable, and the per-row uniqueness queries are
+    dropped because dealership.imports checks plates, engine and OSN numbers
+    for a whole chunk at once.
+    """
+    class Meta(CombinedVehicleSerializer.Meta):
+        fields = [
+            field for field in CombinedVehicleSerializer.Meta.fields
+            if field not in ('vehicle_id', 'proof_of_ownership_document', 'proof_of_ownership_url',
+                             'vehicle_images', 'purchase_agreement', 'purchase_agreement_url')
+        ]
+        extra_kwargs = {
+            'license_plate_number': {'validators': []},
+            'engine_number': {'validators': []},
+            'osn_number': {'validators': []},
+        }
+
+
 class OutboundVehicleSerializer(serializers.ModelSerializer):
     # Vehicle details
     vehicle_make = serializers.CharField(source='Vehicle.vehicle_make', read_only=True)
@@ -124,7 +155,7 @@ class VehicleUpdateSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Vehicle
-        exclude = ['added_by']  # Exclude fields that shouldn't be updated via API
+        exclude = ['added_by', 'search_vector']  # Exclude fields that shouldn't be updated via API
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -197,6 +228,19 @@ class VehicleListSerializer(serializers.ModelSerializer):
         model = Vehicle
         fields = ['vehicle_make', 'vehicle_model', 'license_plate_number', 'odometer_reading_kms', 'condition_grade']
 
+class VehicleSearchSerializer(serializers.ModelSerializer):
+    # Annotated by dealership.search.search_vehicles
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Vehicle
+        fields = [
+            'vehicle_id', 'vehicle_type', 'vehicle_make', 'vehicle_model', 'year_of_manufacturing',
+            'license_plate_number', 'chassis_number', 'fuel_type', 'transmission_type', 'color',
+            'odometer_reading_kms', 'inventory_status', 'estimated_selling_price',
+            'seller_name_company_name', 'rank',
+        ]
+
 class MaintenanceRecordSerializer(serializers.ModelSerializer):
     # Accept vehicle_id directly from the payload
     vehicle_id = serializers.IntegerField(write_only=True)  # Input only
@@ -297,12 +341,29 @@ class OutboundVehicleSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]  # Ensures created_at is not modifiable by users
 
         
+class PaymentListSerializer(serializers.ListSerializer):
+    """
+    Writes a validated list of payments with one bulk INSERT in a single
+    transaction. bulk_create skips model signals, so the affected vehicle
+    ledgers are refreshed here.
+    """
+    batch_size = 1000
+
+    def create(self, validated_data):
+        payments = [Payment(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            Payment.objects.bulk_create(payments, batch_size=self.batch_size)
+            refresh_ledgers({payment.vehicle_id for payment in payments})
+        return payments
+
+
 class PaymentSerializer(serializers.ModelSerializer):
     vehicle_id = serializers.IntegerField()
 
     class Meta:
         model = Payment
         fields = ['vehicle_id', 'slot_number', 'amount_paid',"payment_mode", 'date_of_payment', 'payment_remark','payment_type']
+        list_serializer_class = PaymentListSerializer
 
 class CatalogueSerializer(serializers.ModelSerializer):
     """
@@ -310,13 +371,14 @@ class CatalogueSerializer(serializers.ModelSerializer):
     """
     selling_price = serializers.SerializerMethodField()
     vehicle_image_urls = serializers.SerializerMethodField()  # Changed to plural since we'll return multiple URLs
+    vehicle_images = serializers.SerializerMethodField()
 
     class Meta:
         model = Vehicle
         fields = [
             "vehicle_id", "vehicle_make", "vehicle_model", "year_of_manufacturing",
             "odometer_reading_kms", "fuel_type", "transmission_type",
-            "condition_grade", 'vehicle_image_urls', "selling_price"
+            "condition_grade", 'vehicle_image_urls', 'vehicle_images', "selling_price"
         ]
 
     def get_selling_price(self, obj):
@@ -325,14 +387,41 @@ class CatalogueSerializer(serializers.ModelSerializer):
         """
         return obj.estimated_selling_price if obj.estimated_selling_price else "Price on Request"
 
+    def get_media_base(self):
+        """
+        Scheme and host prefixed to relative media URLs. Taken from the
+        ``media_base`` context entry if given, otherwise derived from the
+        request once per serializer rather than once per image.
+        """
+        if not hasattr(self, '_media_base'):
+            media_base = self.context.get('media_base')
+            if media_base is None:
+                request = self.context.get('request')
+                media_base = request.build_absolute_uri('/')[:-1] if request else None
+            self._media_base = media_base
+        return self._media_base
+
+    def absolute_url(self, url):
+        return self.get_media_base() + url if url.startswith('/') else url
+
+    def get_vehicle_images(self, obj):
+        """
+        Variant URLs for every vehicle image. Reads obj.images.all() so a
+        prefetch_related('images') is used.
+        """
+        if self.get_media_base() is None:
+            return None
+        variants = [variant_urls(image, self.absolute_url) for image in obj.images.all()]
+        return [urls for urls in variants if urls] or None
+
     def get_vehicle_image_urls(self, obj):
         """
-        Return URLs for all vehicle images from VehicleImage model.
+        Medium-size URL of each vehicle image, or the original while its
+        variants are still being rendered.
         """
-        request = self.context.get('request')
-        if obj.images.exists() and request:
-            return [request.build_absolute_uri(image.image.url) for image in obj.images.all()]
-        return None
+        variants = self.get_vehicle_images(obj)
+        return [urls['medium'] for urls in variants] if variants else None
+
 class UpdateCatalogueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vehicle
@@ -409,7 +498,7 @@ class VehicleInquirySerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = VehicleInquiry
-        fields = ['id', 'name', 'contact', 'Vehicle_name', 'budget', 'model']
+        fields = ['id', 'name', 'contact', 'Vehicle_name', 'budget', 'model', 'status']
         
 class ElectricityBillSerializer(serializers.ModelSerializer):
     """Serializer for Electricity Bill"""
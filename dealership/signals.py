@@ -0,0 +1,136 @@
+# dealership/signals.py
+from django.db import connection, transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django_tenants.utils import schema_context
+from .catalogue import schedule_catalogue_update
+from .ledger import refresh_ledgers
+from .matching import ENTRY_FIELDS, schedule_matching
+from .media import MEDIA_FIELDS, adjust_references, file_names, load_file_names, schedule_garbage_collection
+from .models import Vehicle, VehicleImage, OutboundVehicle, MaintenanceRecord, Payment
+from .rollups import TRACKED_FIELDS, apply_change, load_snapshot, snapshot
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def patch_catalogue_for_vehicle(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_catalogue_update(instance.pk)
+
+
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_save, sender=OutboundVehicle)
+@receiver(post_delete, sender=OutboundVehicle)
+def patch_catalogue_for_related(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_catalogue_update(instance.vehicle_id)
+
+
+def _touches_rollup(sender, update_fields):
+    return update_fields is None or bool(set(TRACKED_FIELDS[sender]).intersection(update_fields))
+
+
+@receiver(pre_save, sender=Vehicle)
+@receiver(pre_save, sender=OutboundVehicle)
+@receiver(pre_save, sender=MaintenanceRecord)
+@receiver(pre_delete, sender=Vehicle)
+@receiver(pre_delete, sender=OutboundVehicle)
+@receiver(pre_delete, sender=MaintenanceRecord)
+def remember_rollup_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _touches_rollup(sender, update_fields):
+        instance._rollup_old = load_snapshot(instance)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=OutboundVehicle)
+@receiver(post_save, sender=MaintenanceRecord)
+def update_rollups_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches_rollup(sender, update_fields):
+        return
+    apply_change(sender, instance.__dict__.pop('_rollup_old', None), snapshot(instance))
+
+
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=OutboundVehicle)
+@receiver(post_delete, sender=MaintenanceRecord)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # The stored values, which a stale instance may not hold
+    apply_change(sender, instance.__dict__.pop('_rollup_old', None), None)
+
+
+def _refresh_ledger_on_commit(schema_name, vehicle_id):
+    with schema_context(schema_name):
+        refresh_ledgers([vehicle_id])
+
+
+def _schedule_ledger_refresh(vehicle_id):
+    # After commit, so cascaded deletes don't recreate a ledger for a vehicle being removed
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: _refresh_ledger_on_commit(schema_name, vehicle_id))
+
+
+@receiver(post_save, sender=Vehicle)
+def refresh_ledger_for_vehicle(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or 'purchase_price' in update_fields):
+        _schedule_ledger_refresh(instance.pk)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=MaintenanceRecord)
+@receiver(post_delete, sender=MaintenanceRecord)
+@receiver(post_save, sender=OutboundVehicle)
+@receiver(post_delete, sender=OutboundVehicle)
+def refresh_ledger_for_related(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _schedule_ledger_refresh(instance.vehicle_id)
+
+
+def _media_fields(sender, update_fields):
+    fields = MEDIA_FIELDS[sender]
+    return fields if update_fields is None else tuple(field for field in fields if field in update_fields)
+
+
+@receiver(pre_save, sender=Vehicle)
+@receiver(pre_save, sender=VehicleImage)
+@receiver(pre_save, sender=MaintenanceRecord)
+@receiver(pre_save, sender=OutboundVehicle)
+def remember_media_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = _media_fields(sender, update_fields)
+    if not raw and fields:
+        instance._media_old = load_file_names(instance, fields)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_save, sender=MaintenanceRecord)
+@receiver(post_save, sender=OutboundVehicle)
+def count_media_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = _media_fields(sender, update_fields)
+    if raw or not fields:
+        return
+    old = instance.__dict__.pop('_media_old', [])
+    new = file_names(instance, fields)
+    adjust_references(added=new, removed=old)
+    schedule_garbage_collection(set(old) - set(new))
+
+
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_delete, sender=MaintenanceRecord)
+@receiver(post_delete, sender=OutboundVehicle)
+def release_media_references(sender, instance, **kwargs):
+    names = file_names(instance)
+    adjust_references(removed=names)
+    schedule_garbage_collection(names)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def update_inventory_index(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {*ENTRY_FIELDS, 'inventory_status'}.intersection(update_fields):
+        return
+    schedule_matching([instance.pk], new=created)
@@ -0,0 +1,59 @@
+# dealership/stats.py
+"""
+Dashboard aggregation engine.
+
+Dashboard figures are read from the tenant's incrementally maintained
+rollups (see rollups.py): one FinancialRollup row for the all-time totals
+and one MonthlyRollup row per calendar month for the revenue series.
+"""
+from datetime import date
+from django.utils import timezone
+from .rollups import get_rollup, get_monthly_rollups
+
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+
+
+def month_starts(months, today=None):
+    """First day of each of the last ``months`` calendar months, oldest first, ending with the current month."""
+    today = today or timezone.localdate()
+    year, month = today.year, today.month
+    starts = []
+    for _ in range(months):
+        starts.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+def sales_stats(months=DEFAULT_MONTHS, today=None):
+    """Figures for SalesStatsAPIView, in its response shape."""
+    rollup = get_rollup()
+    starts = month_starts(months, today)
+    by_month = get_monthly_rollups(starts[0], starts[-1])
+
+    return {
+        "total_vehicles": rollup.vehicles_total,
+        "total_in_inventory": rollup.vehicles_in_inventory,
+        "total_outbound": rollup.outbound_total,
+        "total_sales_revenue": rollup.selling_total,
+        "total_other_expenses": rollup.other_expense_total,
+        "total_purchase_price": rollup.purchase_total,
+        "monthly_sales": [
+            by_month[start].selling_total if start in by_month else 0
+            for start in starts
+        ],
+    }
+
+
+def vehicle_statistics():
+    """Figures for VehicleStatisticsAPIView, in its response shape."""
+    rollup = get_rollup()
+    return {
+        "total_vehicles_added": rollup.vehicles_total,
+        "current_in_inventory": rollup.vehicles_in_inventory,
+        "total_outbound_vehicles": rollup.outbound_total,
+        "total_selling_price": rollup.selling_total,
+        "total_purchase_price": rollup.purchase_total,
+        "total_maintenance_cost": rollup.maintenance_total,
+        "final_profit": rollup.selling_total - (rollup.purchase_total + rollup.maintenance_total),
+    }
@@ -0,0 +1,74 @@
+# dealership/storage.py
+"""
+Content-addressed media storage.
+
+Files are named after the SHA-256 of their contents, under the tenant's
+schema: ``cas/<schema>/ab/cdef....jpg``. The field's upload_to is ignored, so
+the same bytes uploaded twice (to any field) are stored once and the second
+save just returns the existing name. The hash is computed while the upload
+is streamed to a temporary file, so the file is read once.
+
+Every stored file has a MediaBlob row; dealership.media keeps its reference
+count and removes files nothing points at any more.
+"""
+import hashlib
+import os
+import tempfile
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+CAS_PREFIX = 'cas'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # _save() picks the final name from the content, and identical content may share it
+        return name
+
+    def content_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f"{CAS_PREFIX}/{connection.schema_name}/{digest[:2]}/{digest[2:]}{extension}"
+
+    def _save(self, name, content):
+        directory = self.path(f"{CAS_PREFIX}/{connection.schema_name}")
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        # Stream into a temp file beside the target, so the final rename stays on one filesystem
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.upload-', delete=False) as spool:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    spool.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                os.unlink(spool.name)
+                raise
+
+        name = self.content_name(digest.hexdigest(), name)
+        # Touch the blob before looking for the file: garbage collection skips
+        # recently written blobs, and waits for (or is waited on by) this row
+        MediaBlob = apps.get_model('dealership', 'MediaBlob')
+        MediaBlob.objects.update_or_create(name=name, defaults={'size': size, 'last_written_at': timezone.now()})
+
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(spool.name)  # Already stored: a repeat upload writes nothing
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(spool.name, self.file_permissions_mode)
+            os.replace(spool.name, path)
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    return media_storage
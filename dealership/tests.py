@@ -1,3 +1,945 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+import openpyxl
+from PIL import Image
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from accounts.authentication import SessionStore
+from accounts.models import CustomUser
+from accounts.tokens import TenantTokenUser
+from tenants.management.commands.run_export_worker import Command as ExportWorkerCommand
+from tenants.models import Client, ExportJob, MatchingJob
+from .catalogue import build_catalogue
+from .exports import XLSX_CONTENT_TYPE, MaintenanceRecordExport, VehicleInventoryExport, run_export_job
+from .models import (Vehicle, VehicleImage, OutboundVehicle, MaintenanceRecord, Payment, MediaBlob, UploadSession,
+                     VehicleInquiry, InquiryMatch)
+from .images import render_variants
+from .imports import import_vehicles
+from .ledger import get_ledgers
+from .media import collect_garbage
+from .pagination import VehicleKeysetPagination
+from .matching import DEFAULT_LIMIT, inventory_indexes, match_inquiries, parse_budget, run_matching_job
+from .request_log import JSONFormatter, RequestLogMiddleware
+from .rollups import get_rollup, rebuild_rollups
+from .search import search_vehicles
+from .stats import DEFAULT_MONTHS, MAX_MONTHS, month_starts
+from .uploads import UploadError, complete_upload, received_parts, start_upload, staging_path, write_part
+from .views import (CatalogueAPIView, CreatePaymentAPIView, ExportJobDetailView, ExportJobDownloadView,
+                    ExportJobListCreateView, SalesStatsAPIView, UploadSessionCreateView, UploadSessionDetailView,
+                    VehicleCostAPIView, VehicleImageAPIView, VehiclePaymentSummaryAPIView,
+                    VehiclePaymentSummaryBatchAPIView, VehicleStatisticsAPIView)
+
+
+NON_DATA_SQL = ('SET search_path', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def data_queries(queries):
+    # django-tenants re-issues SET search_path as needed, and without REDIS_URL the cache is a
+    # database table written in savepoints; count data queries only
+    return [q['sql'] for q in queries.captured_queries
+            if not q['sql'].startswith(NON_DATA_SQL) and '"django_cache"' not in q['sql']]
+
+
+VEHICLE_DEFAULTS = {
+    'vehicle_make': 'Make', 'vehicle_model': 'Model', 'year_of_manufacturing': 2020, 'chassis_number': 'C1',
+    'license_plate_number': 'TEST1', 'odometer_reading_kms': 1000, 'color': 'White', 'fuel_type': 'Petrol',
+    'transmission_type': 'Manual', 'seller_name_company_name': 'Seller', 'mobile_number': '9999999999',
+}
+
+
+def make_vehicle(**overrides):
+    return Vehicle.objects.create(**{**VEHICLE_DEFAULTS, **overrides})
+
+
+class DealershipTestCase(TenantTestCase):
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Test Dealership'
+
+
+class KeysetPaginationTests(DealershipTestCase):
+    def setUp(self):
+        arrivals = [date(2024, 1, 5), None, date(2024, 1, 3), date(2024, 1, 5), None, date(2024, 1, 1)]
+        self.vehicles = [make_vehicle(license_plate_number=f'PAG{i}', arrival_date=arrival)
+                         for i, arrival in enumerate(arrivals)]
+
+    def page(self, **params):
+        paginator = VehicleKeysetPagination()
+        request = Request(APIRequestFactory().get('/dealership/vehicles/', params))
+        rows = paginator.paginate_queryset(Vehicle.objects.all(), request)
+        return [vehicle.pk for vehicle in rows], paginator
+
+    def walk(self, ordering):
+        """Every page forwards from the start, then backwards from the last one."""
+        forward, cursor = [], None
+        while True:
+            params = {'ordering': ordering, 'page_size': 4}
+            if cursor:
+                params['cursor'] = cursor
+            rows, paginator = self.page(**params)
+            forward.append(rows)
+            cursor, previous = paginator.next_cursor, paginator.previous_cursor
+            if cursor is None:
+                break
+        backward = [forward[-1]]
+        while previous:
+            rows, paginator = self.page(ordering=ordering, page_size=4, cursor=previous)
+            backward.insert(0, rows)
+            previous = paginator.previous_cursor
+        return forward, backward
+
+    def expected(self, descending):
+        # PostgreSQL sorts NULLs last ascending and first descending
+        key = lambda vehicle: (vehicle.arrival_date is None, vehicle.arrival_date or date.min, vehicle.pk)
+        ordered = [vehicle.pk for vehicle in sorted(self.vehicles, key=key)]
+        return ordered[::-1] if descending else ordered
+
+    def test_cursors_walk_both_ways_with_null_arrival_dates(self):
+        for ordering in ('arrival_date', '-arrival_date', '-vehicle_id'):
+            with self.subTest(ordering=ordering):
+                forward, backward = self.walk(ordering)
+                if ordering.endswith('arrival_date'):
+                    expected = self.expected(ordering.startswith('-'))
+                else:
+                    expected = sorted((vehicle.pk for vehicle in self.vehicles), reverse=True)
+                self.assertEqual(forward, [expected[:4], expected[4:]])
+                self.assertEqual(backward, forward)
+
+    def test_count_and_filters(self):
+        Vehicle.objects.filter(pk=self.vehicles[0].pk).update(inventory_status='OUT')
+        rows, paginator = self.page(page_size=10, inventory_status='OUT')
+        self.assertEqual((rows, paginator.count), ([self.vehicles[0].pk], 1))
+        self.assertIsNone(self.page(page_size=10, count='false')[1].count)
+
+    def test_invalid_cursors_and_parameters_are_rejected(self):
+        _, paginator = self.page(page_size=2, ordering='arrival_date')
+        with self.assertRaises(NotFound):
+            self.page(cursor=paginator.next_cursor, ordering='-arrival_date')
+        with self.assertRaises(NotFound):
+            self.page(cursor='not-a-cursor')
+        with self.assertRaises(ValidationError):
+            self.page(ordering='purchase_price')
+        with self.assertRaises(ValidationError):
+            self.page(page_size=0)
+
+
+class CatalogueTests(DealershipTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser(username='catalogue-tester', tenant=self.tenant)
+        self.factory = APIRequestFactory()
+        self.media_base = f'http://{self.get_test_tenant_domain()}'
+
+    def add_vehicles(self, count, images_per_vehicle=2):
+        start = Vehicle.objects.count()
+        vehicles = []
+        for i in range(start, start + count):
+            vehicle = make_vehicle(license_plate_number=f'CAT{i}', inventory_status='IN')
+            for j in range(images_per_vehicle):
+                VehicleImage.objects.create(vehicle=vehicle, image=f'vehicle_images/{i}-{j}.jpg')
+            vehicles.append(vehicle)
+        return vehicles
+
+    def get_catalogue(self, **headers):
+        request = self.factory.get('/dealership/catalogue/', HTTP_HOST=self.get_test_tenant_domain(), **headers)
+        request.tenant = self.tenant
+        request.session = SessionStore()
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = CatalogueAPIView.as_view()(request)
+        return response, data_queries(queries)
+
+    def test_build_query_count_is_constant(self):
+        self.add_vehicles(3)
+        with CaptureQueriesContext(connection) as small:
+            build_catalogue(self.tenant.schema_name, self.media_base)
+
+        self.add_vehicles(12)
+        with CaptureQueriesContext(connection) as large:
+            build_catalogue(self.tenant.schema_name, self.media_base)
+
+        self.assertEqual(len(data_queries(small)), len(data_queries(large)))
+        self.assertEqual(len(data_queries(large)), 2)  # vehicles, then all of their images
+
+    def test_image_urls_are_absolute(self):
+        self.add_vehicles(1, images_per_vehicle=1)
+        response, _ = self.get_catalogue()
+        url = json.loads(response.content)[0]['vehicle_image_urls'][0]
+        self.assertTrue(url.startswith(f'{self.media_base}/'))
+        self.assertTrue(url.endswith('.jpg'))
+
+    def test_reads_are_served_from_snapshot(self):
+        self.add_vehicles(2)
+        response, _ = self.get_catalogue()
+        self.assertEqual(response.status_code, 200)
+
+        response, queries = self.get_catalogue()
+        self.assertEqual(queries, [])
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+        response, _ = self.get_catalogue(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_snapshot_is_patched_on_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, = self.add_vehicles(1)
+        response, _ = self.get_catalogue()
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_vehicles(1)
+        response, _ = self.get_catalogue(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.inventory_status = 'OUT'
+            first.save()
+        response, _ = self.get_catalogue()
+        ids = [item['vehicle_id'] for item in json.loads(response.content)]
+        self.assertNotIn(first.vehicle_id, ids)
+
+    def test_snapshot_is_patched_on_image_upload(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle, = self.add_vehicles(1, images_per_vehicle=0)
+        response, _ = self.get_catalogue()
+        self.assertFalse(json.loads(response.content)[0]['vehicle_image_urls'])
+
+        request = self.factory.post(f'/dealership/vehicles/{vehicle.vehicle_id}/images/',
+                                    {'images': [SimpleUploadedFile('front.jpg', b'front'),
+                                                SimpleUploadedFile('back.jpg', b'back')]},
+                                    HTTP_HOST=self.get_test_tenant_domain())
+        request.tenant = self.tenant
+        force_authenticate(request, user=CustomUser.objects.create_superuser('uploader', 'u@example.com', 'x'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(VehicleImageAPIView.as_view()(request, vehicle_id=vehicle.vehicle_id).status_code, 201)
+        response, _ = self.get_catalogue()
+        self.assertEqual(len(json.loads(response.content)[0]['vehicle_image_urls']), 2)
+
+    def test_if_none_match_lists_and_wildcard(self):
+        self.add_vehicles(1)
+        etag = self.get_catalogue()[0]['ETag']
+        for header in (f'"stale", {etag}', f'W/{etag}', '*'):
+            self.assertEqual(self.get_catalogue(HTTP_IF_NONE_MATCH=header)[0].status_code, 304, header)
+        for header in (f'"x{etag[1:]}', etag[:-2] + '"'):
+            self.assertEqual(self.get_catalogue(HTTP_IF_NONE_MATCH=header)[0].status_code, 200, header)
+
+
+class RollupTests(DealershipTestCase):
+    def add_vehicle(self, plate, purchase_price):
+        return make_vehicle(license_plate_number=plate, inventory_status='IN', purchase_price=Decimal(purchase_price))
+
+    def assertRollupMatchesRebuild(self):
+        fields = ('vehicles_total', 'vehicles_in_inventory', 'vehicles_out_of_inventory', 'outbound_total',
+                  'purchase_total', 'maintenance_total', 'selling_total', 'other_expense_total')
+        incremental = get_rollup()
+        incremental = {field: getattr(incremental, field) for field in fields}
+        rebuilt = rebuild_rollups()
+        self.assertEqual(incremental, {field: getattr(rebuilt, field) for field in fields})
+
+    def test_rollup_tracks_writes(self):
+        get_rollup()
+        vehicle = self.add_vehicle('ROLL1', '1000.50')
+        self.add_vehicle('ROLL2', '700')
+        MaintenanceRecord.objects.create(vehicle=vehicle, maintenance_type='Service',
+                                         maintenance_date=date(2024, 3, 2), cost=Decimal('50'))
+        OutboundVehicle.objects.create(vehicle=vehicle, buyers_name='Buyer', buyers_contact_details='1',
+                                       delivery_status='Pending', outbound_date=date(2024, 3, 9),
+                                       selling_price=Decimal('2000'), other_expense=Decimal('10'))
+        vehicle.inventory_status = 'OUT'
+        vehicle.save()
+
+        rollup = get_rollup()
+        self.assertEqual(rollup.vehicles_total, 2)
+        self.assertEqual(rollup.vehicles_in_inventory, 1)
+        self.assertEqual(rollup.selling_total, Decimal('2000'))
+        self.assertRollupMatchesRebuild()
+
+        vehicle.delete()  # cascades to the sale and maintenance record
+        rollup = get_rollup()
+        self.assertEqual(rollup.vehicles_total, 1)
+        self.assertEqual(rollup.selling_total, 0)
+        self.assertRollupMatchesRebuild()
+
+    def test_old_values_are_read_from_the_locked_row(self):
+        get_rollup()
+        vehicle = self.add_vehicle('LOCK1', '1000')
+        stale = Vehicle.objects.get(pk=vehicle.pk)
+
+        vehicle.purchase_price = Decimal('2500')
+        with CaptureQueriesContext(connection) as queries:
+            vehicle.save()
+        self.assertTrue(any('FOR UPDATE' in sql for sql in data_queries(queries)))
+
+        stale.delete()  # still holds the old price
+        self.assertEqual(get_rollup().purchase_total, 0)
+        self.assertRollupMatchesRebuild()
+
+
+class LedgerTests(DealershipTestCase):
+    def add_vehicle(self, plate):
+        return make_vehicle(license_plate_number=plate, purchase_price=Decimal('1000'))
+
+    def get_summaries(self, ids):
+        request = APIRequestFactory().get('/dealership/vehicle-payment-summaries/', {'ids': ids})
+        request.tenant = self.tenant
+        force_authenticate(request, user=CustomUser(username='ledger-tester', tenant=self.tenant))
+        with CaptureQueriesContext(connection) as queries:
+            response = VehiclePaymentSummaryBatchAPIView.as_view()(request)
+        return response, data_queries(queries)
+
+    def test_batch_summary_reads_ledgers_in_one_query(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicles = [self.add_vehicle(f'LDG{i}') for i in range(3)]
+            Payment.objects.create(vehicle=vehicles[0], payment_type='purchase', slot_number='Slot 1',
+                                   amount_paid=Decimal('300'), date_of_payment=date(2024, 3, 2))
+            MaintenanceRecord.objects.create(vehicle=vehicles[0], maintenance_type='Service',
+                                             maintenance_date=date(2024, 3, 2), cost=Decimal('50'))
+
+        response, queries = self.get_summaries(','.join(str(v.pk) for v in vehicles))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        first = response.data[0]
+        self.assertEqual(first['vehicle_id'], vehicles[0].pk)
+        self.assertEqual(first['purchase_balance'], Decimal('700'))
+        self.assertEqual(first['total_cost'], Decimal('1050'))
+
+        response, _ = self.get_summaries('1,x')
+        self.assertEqual(response.status_code, 400)
+
+    def post_payments(self, vehicle, slots):
+        request = APIRequestFactory().post('/dealership/payments/', {'vehicle_id': vehicle.pk, 'payment_slots': slots},
+                                           format='json')
+        request.tenant = self.tenant
+        request.session = SessionStore()
+        force_authenticate(request, user=CustomUser(username='ledger-tester', tenant=self.tenant))
+        return CreatePaymentAPIView.as_view()(request)
+
+    def test_payment_slots_are_written_together(self):
+        vehicle = self.add_vehicle('PAY1')
+        slots = [{'slot_number': f'Slot {i}', 'amount_paid': '100', 'date_of_payment': '2024-03-02',
+                  'payment_type': 'purchase'} for i in range(1, 4)]
+
+        response = self.post_payments(vehicle, slots + [{'slot_number': 'Slot 99'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payment.objects.filter(vehicle=vehicle).exists())
+
+        response = self.post_payments(vehicle, slots)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['data']), 3)
+        self.assertEqual(get_ledgers([vehicle.pk])[vehicle.pk].purchase_balance, Decimal('700'))
+
+    def get_summary(self, view, vehicle):
+        request = APIRequestFactory().get(f'/dealership/vehicles/{vehicle.pk}/summary/')
+        request.tenant = self.tenant
+        force_authenticate(request, user=CustomUser(username='ledger-tester', tenant=self.tenant))
+        response = view.as_view()(request, vehicle_id=vehicle.pk)
+        # Keep decimals as their JSON text, so 0 and 0.0 differ
+        return json.loads(response.render().content, parse_float=str)
+
+    def test_summaries_render_like_the_previous_aggregates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bare = make_vehicle(license_plate_number='LDG-BARE')
+            paid = self.add_vehicle('LDG-PAID')
+            Payment.objects.create(vehicle=paid, payment_type='purchase', slot_number='Slot 1',
+                                   amount_paid=Decimal('1000'), date_of_payment=date(2024, 3, 2))
+
+        self.assertEqual(self.get_summary(VehiclePaymentSummaryAPIView, bare), {
+            'vehicle_id': bare.pk, 'purchase_price': 0, 'total_purchase_paid': 0, 'purchase_balance': 0,
+            'selling_price': 0, 'total_selling_received': 0, 'selling_balance': 0,
+        })
+        self.assertEqual(self.get_summary(VehicleCostAPIView, bare),
+                         {'vehicle_id': bare.pk, 'purchase_price': 0, 'total_maintenance_cost': 0, 'total_cost': 0})
+        summary = self.get_summary(VehiclePaymentSummaryAPIView, paid)
+        self.assertEqual((summary['purchase_price'], summary['total_purchase_paid'], summary['purchase_balance']),
+                         ('1000.0', '1000.0', '0.0'))
+        self.assertEqual(self.get_summary(VehicleCostAPIView, paid)['total_cost'], '1000.0')
+
+
+class ExcelExportTests(DealershipTestCase):
+    def setUp(self):
+        first = make_vehicle(license_plate_number='EXP1', arrival_date=date(2024, 2, 1), purchase_price=Decimal('999.50'),
+                             email_address='seller@example.com', notes='Spare key')
+        second = make_vehicle(license_plate_number='EXP2')
+        MaintenanceRecord.objects.create(vehicle=first, maintenance_type='oil_change', maintenance_date=date(2024, 3, 2),
+                                         cost=Decimal('50.25'), person_in_charge='Mechanic',
+                                         receipt='maintenance_receipts/receipt.pdf')
+        MaintenanceRecord.objects.create(vehicle=second, maintenance_type='general_service',
+                                         maintenance_date=date(2024, 3, 3), cost=Decimal('80'))
+
+    def read(self, fileobj):
+        fileobj.seek(0)
+        ws = openpyxl.load_workbook(fileobj, read_only=True).active
+        return ws.title, [list(row) for row in ws.iter_rows(values_only=True)]
+
+    def legacy_workbook(self, title, headers, rows):
+        # Built the way the views did before the exports were streamed
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = title
+        for row_index, row in enumerate([headers] + rows, start=1):
+            for col_num, value in enumerate(row, start=1):
+                ws.cell(row=row_index, column=col_num, value=value)
+        fileobj = io.BytesIO()
+        wb.save(fileobj)
+        return self.read(fileobj)
+
+    def export(self, export):
+        export.chunk_size = 1
+        fileobj = io.BytesIO()
+        progress = []
+        self.assertEqual(export.write(fileobj, progress=progress.append), len(progress))
+        return self.read(fileobj)
+
+    def test_maintenance_export_matches_the_previous_workbook(self):
+        rows = [[r.id, r.vehicle.vehicle_id, r.maintenance_type,
+                 str(r.maintenance_date) if r.maintenance_date else "", r.cost,
+                 r.person_in_charge if r.person_in_charge else "", str(r.receipt) if r.receipt else "No Receipt",
+                 str(r.created_at) if r.created_at else ""]
+                for r in MaintenanceRecord.objects.all().order_by('id')]
+        headers = ["ID", "Vehicle ID", "Maintenance Type", "Maintenance Date", "Cost", "Person in Charge", "Receipt",
+                   "Created At"]
+        self.assertEqual(self.export(MaintenanceRecordExport()),
+                         self.legacy_workbook("Maintenance Records", headers, rows))
+
+    def test_inventory_export_matches_the_previous_workbook(self):
+        rows = [[v.vehicle_id, v.vehicle_type, v.vehicle_make, v.vehicle_model, v.year_of_manufacturing,
+                 v.chassis_number, v.license_plate_number, v.odometer_reading_kms, v.color, v.fuel_type,
+                 v.transmission_type, v.seller_name_company_name, v.mobile_number, v.email_address,
+                 v.condition_grade, v.tires_condition, v.damage_details_if_any, v.engine_condition,
+                 str(v.interior_condition), str(v.arrival_date or ""), str(v.purchase_price or ""),
+                 v.storage_location, v.notes or ""]
+                for v in Vehicle.objects.all().order_by("vehicle_id")]
+        headers = ["Vehicle ID", "Type", "Make", "Model", "Year", "Chassis", "Plate", "Odometer", "Color", "Fuel",
+                   "Transmission", "Seller", "Mobile", "Email", "Condition", "Tires", "Damage", "Engine", "Interior",
+                   "Arrival", "Price", "Storage", "Notes"]
+        self.assertEqual(self.export(VehicleInventoryExport()), self.legacy_workbook("Vehicle Inventory", headers, rows))
+
+    def test_response_is_an_xlsx_attachment(self):
+        response = MaintenanceRecordExport().response()
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+        self.assertIn('filename="maintenance_records.xlsx"', response['Content-Disposition'])
+        title, rows = self.read(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((title, len(rows)), ("Maintenance Records", 3))
+
+
+class ExportJobTests(DealershipTestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.user = CustomUser.objects.create_superuser('exporter', 'exporter@example.com', 'x')
+        make_vehicle(license_plate_number='JOB1')
+        make_vehicle(license_plate_number='JOB2')
+        self.worker = ExportWorkerCommand(stdout=io.StringIO())
+
+    def call(self, view, method='get', data=None, tenant=None, **kwargs):
+        request = getattr(APIRequestFactory(), method)('/dealership/exports/', data, format='json',
+                                                       HTTP_HOST=self.get_test_tenant_domain())
+        request.tenant = tenant or self.tenant
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request, **kwargs)
+
+    def test_job_is_queued_claimed_built_and_downloaded(self):
+        response = self.call(ExportJobListCreateView, 'post', {'kind': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        response = self.call(ExportJobListCreateView, 'post', {'kind': 'inventory'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['id']
+        self.assertEqual((response.data['status'], response.data['download_url']), ('queued', None))
+        self.assertEqual(self.call(ExportJobDownloadView, job_id=job_id).status_code, 409)
+
+        self.assertEqual(self.worker.claim_jobs(5), [job_id])
+        self.assertEqual(self.worker.claim_jobs(5), [])
+        self.assertEqual(self.call(ExportJobDownloadView, job_id=job_id).status_code, 409)
+
+        self.assertTrue(run_export_job(job_id))
+        data = self.call(ExportJobDetailView, job_id=job_id).data
+        self.assertEqual((data['status'], data['progress'], data['rows_written']), ('done', 100, 2))
+        self.assertTrue(data['download_url'].endswith(f'/exports/{job_id}/download/'))
+
+        response = self.call(ExportJobDownloadView, job_id=job_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="vehicle_inventory.xlsx"', response['Content-Disposition'])
+        ws = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        self.assertEqual([row[6] for row in ws.iter_rows(min_row=2, values_only=True)], ['JOB1', 'JOB2'])
+
+    def test_jobs_are_visible_to_their_tenant_only(self):
+        connection.set_schema_to_public()
+        self.addCleanup(connection.set_tenant, self.tenant)
+        other = Client(schema_name='other_dealership', name='Other Dealership')
+        other.auto_create_schema = False
+        other.save()
+        job = ExportJob.objects.create(tenant=self.tenant, kind='inventory', status=ExportJob.STATUS_DONE,
+                                       file='exports/test_dealership/inventory.xlsx')
+
+        self.assertEqual(len(self.call(ExportJobListCreateView, tenant=other).data), 0)
+        self.assertEqual(self.call(ExportJobDetailView, tenant=other, job_id=job.id).status_code, 404)
+        self.assertEqual(self.call(ExportJobDownloadView, tenant=other, job_id=job.id).status_code, 404)
+        self.assertEqual([item['id'] for item in self.call(ExportJobListCreateView).data], [job.id])
+
+    def test_failed_and_stale_jobs(self):
+        job = ExportJob.objects.create(tenant=self.tenant, kind='inventory')
+        with mock.patch.object(VehicleInventoryExport, 'write', side_effect=OSError('disk full')), \
+                self.assertLogs('dealership.exports', 'ERROR'):
+            self.assertFalse(run_export_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ExportJob.STATUS_FAILED, 'disk full'))
+
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.STATUS_RUNNING, rows_written=5,
+                                                   started_at=timezone.now() - timedelta(hours=1))
+        self.worker.requeue_stale_jobs(30)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written), (ExportJob.STATUS_QUEUED, 0))
+
+
+class DashboardStatsTests(DealershipTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('stats-tester', 'stats@example.com', 'x')
+        self.this_month, self.two_months_ago = month_starts(3)[2], month_starts(3)[0]
+        first = make_vehicle(license_plate_number='STAT1', purchase_price=Decimal('1000'))
+        second = make_vehicle(license_plate_number='STAT2', purchase_price=Decimal('500'), inventory_status='IN')
+        make_vehicle(license_plate_number='STAT3', inventory_status='IN')
+        MaintenanceRecord.objects.create(vehicle=first, maintenance_type='Service', maintenance_date=date(2024, 3, 2),
+                                         cost=Decimal('40'))
+        for vehicle, sold_on, price in ((first, self.this_month, '1500'), (second, self.two_months_ago, '900')):
+            OutboundVehicle.objects.create(vehicle=vehicle, buyers_name='Buyer', buyers_contact_details='1',
+                                           delivery_status='Pending', outbound_date=sold_on,
+                                           selling_price=Decimal(price), other_expense=Decimal('10'))
+
+    def get(self, view, **params):
+        request = APIRequestFactory().get('/dealership/stats/', params)
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_sales_stats_response(self):
+        response = self.get(SalesStatsAPIView)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(len(data.pop('monthly_sales')), DEFAULT_MONTHS)
+        self.assertEqual(data, {
+            'total_vehicles': Vehicle.objects.count(),
+            'total_in_inventory': Vehicle.objects.filter(inventory_status='IN').count(),
+            'total_outbound': OutboundVehicle.objects.count(),
+            'total_sales_revenue': OutboundVehicle.objects.aggregate(Sum('selling_price'))['selling_price__sum'],
+            'total_other_expenses': OutboundVehicle.objects.aggregate(Sum('other_expense'))['other_expense__sum'],
+            'total_purchase_price': Vehicle.objects.aggregate(Sum('purchase_price'))['purchase_price__sum'],
+        })
+
+        monthly = self.get(SalesStatsAPIView, months=3).data['monthly_sales']
+        self.assertEqual(monthly, [Decimal('900'), 0, Decimal('1500')])
+
+    def test_months_must_be_within_bounds(self):
+        for months in ('0', str(MAX_MONTHS + 1), 'many'):
+            self.assertEqual(self.get(SalesStatsAPIView, months=months).status_code, 400, months)
+        for months in (1, MAX_MONTHS):
+            response = self.get(SalesStatsAPIView, months=months)
+            self.assertEqual(len(response.data['monthly_sales']), months)
+        self.assertEqual(self.get(SalesStatsAPIView, months=1).data['monthly_sales'], [Decimal('1500')])
+
+    def test_month_starts_cross_the_year_boundary(self):
+        self.assertEqual(month_starts(3, today=date(2024, 2, 29)),
+                         [date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)])
+
+    def test_vehicle_statistics_response(self):
+        def expected():
+            # What VehicleStatisticsAPIView computed before the rollups
+            selling = OutboundVehicle.objects.aggregate(total=Sum('selling_price'))['total'] or 0
+            purchase = Vehicle.objects.aggregate(total=Sum('purchase_price'))['total'] or 0
+            maintenance = MaintenanceRecord.objects.aggregate(total=Sum('cost'))['total'] or 0
+            return {
+                'total_vehicles_added': Vehicle.objects.count(),
+                'current_in_inventory': Vehicle.objects.filter(inventory_status='IN').count(),
+                'total_outbound_vehicles': OutboundVehicle.objects.count(),
+                'total_selling_price': selling,
+                'total_purchase_price': purchase,
+                'total_maintenance_cost': maintenance,
+                'final_profit': selling - (purchase + maintenance),
+            }
+
+        response = self.get(VehicleStatisticsAPIView)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, expected())
+        self.assertEqual(response.data['final_profit'], Decimal('860'))
+
+        Vehicle.objects.all().delete()
+        self.assertEqual(self.get(VehicleStatisticsAPIView).data, expected())
+
+
+class VehicleImportTests(DealershipTestCase):
+    header = ('vehicle_make,vehicle_model,year_of_manufacturing,chassis_number,license_plate_number,'
+              'odometer_reading_kms,color,fuel_type,transmission_type,seller_name_company_name,mobile_number,'
+              'purchase_price\n')
+
+    def csv_file(self, *plates, year='2020'):
+        rows = ''.join(f'Make,Model,{year},C1,{plate},1000,White,Petrol,Manual,Seller,9999999999,500\n'
+                       for plate in plates)
+        return io.BytesIO((self.header + rows).encode())
+
+    def test_import_reports_row_errors_and_creates_valid_rows(self):
+        self.assertEqual(import_vehicles(self.csv_file('IMP1'), 'vehicles.csv')['created'], 1)
+
+        upload = io.BytesIO(self.csv_file('IMP1', 'IMP2', 'IMP2', 'IMP3').getvalue()
+                            + b'Make,Model,soon,C1,IMP4,1000,White,Petrol,Manual,Seller,9999999999,500\n')
+        report = import_vehicles(upload, 'vehicles.csv', chunk_size=2)
+
+        self.assertEqual((report['rows'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 4, 6])
+        self.assertIn('license_plate_number', report['errors'][0]['errors'])
+        self.assertIn('year_of_manufacturing', report['errors'][2]['errors'])
+        self.assertEqual(Vehicle.objects.count(), 3)
+        self.assertEqual(get_rollup().vehicles_total, 3)
+
+    def test_dry_run_writes_nothing(self):
+        report = import_vehicles(self.csv_file('DRY1', 'DRY2'), 'vehicles.csv', dry_run=True)
+        self.assertEqual((report['valid'], report['created']), (2, 0))
+        self.assertFalse(Vehicle.objects.exists())
+
+
+class ImageVariantTests(SimpleTestCase):
+    def test_variants_are_resized_rotated_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'Camera maker'
+        upload = io.BytesIO()
+        Image.new('RGB', (4000, 3000), 'red').save(upload, 'JPEG', exif=exif.tobytes())
+        upload.seek(0)
+
+        rendered = render_variants(upload)
+
+        self.assertEqual(set(rendered), {'thumbnail', 'thumbnail_webp', 'medium', 'medium_webp'})
+        for field, (extension, data) in rendered.items():
+            with Image.open(io.BytesIO(data)) as variant:
+                self.assertEqual(variant.format, 'WEBP' if extension == 'webp' else 'JPEG')
+                self.assertEqual(variant.size, (180, 240) if field.startswith('thumbnail') else (576, 768))
+                self.assertEqual(len(variant.getexif()), 0)
+
+
+class ContentAddressedMediaTests(DealershipTestCase):
+    def setUp(self):
+        # TenantTestCase.setUpClass skips class-level override_settings
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_GC_GRACE_SECONDS=0))
+
+    def add_vehicle(self, plate, agreement):
+        return make_vehicle(license_plate_number=plate,
+                            purchase_agreement=SimpleUploadedFile(agreement, b'%PDF-1.4 same agreement'))
+
+    def test_identical_uploads_share_a_file_until_unreferenced(self):
+        first = self.add_vehicle('CAS1', 'agreement.pdf')
+        second = self.add_vehicle('CAS2', 'copy of agreement.PDF')
+
+        self.assertEqual(first.purchase_agreement.name, second.purchase_agreement.name)
+        blob = MediaBlob.objects.get(name=first.purchase_agreement.name)
+        self.assertEqual(blob.refcount, 2)
+        path = first.purchase_agreement.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_files_outlive_a_rolled_back_collection(self):
+        vehicle = self.add_vehicle('CAS3', 'agreement.pdf')
+        path = vehicle.purchase_agreement.path
+        Vehicle.objects.filter(pk=vehicle.pk).update(purchase_agreement='')  # Skips the signals
+        MediaBlob.objects.update(refcount=0)
+
+        with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.assertEqual(collect_garbage(), 1)
+                raise RuntimeError
+        self.assertTrue(MediaBlob.objects.exists())
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(collect_garbage(), 1)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+
+class UploadTests(DealershipTestCase):
+    def setUp(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=os.path.join(root, 'media'),
+                                            UPLOAD_STAGING_ROOT=os.path.join(root, 'staging'),
+                                            UPLOAD_PART_SIZE=1024))
+        self.vehicle = make_vehicle(license_plate_number='UPL1')
+
+    def send(self, session, data, numbers):
+        for number in numbers:
+            part = data[number * session.part_size:(number + 1) * session.part_size]
+            write_part(session, number, io.BytesIO(part), len(part))
+
+    def test_parts_in_any_order_assemble_the_document(self):
+        data = os.urandom(2500)
+        session = start_upload(self.vehicle, 'purchase_agreement', 'deal.pdf', len(data),
+                               sha256=hashlib.sha256(data).hexdigest())
+        self.assertEqual(session.part_count, 3)
+
+        self.send(session, data, [2, 0])
+        self.assertEqual(received_parts(session), [0, 2])
+        with self.assertRaisesMessage(UploadError, 'Missing parts: 1'):
+            complete_upload(session)
+        with self.assertRaises(UploadError):
+            write_part(session, 1, io.BytesIO(b'short'), 5)
+
+        self.send(session, data, [1, 0])
+        session = complete_upload(session)
+        self.assertEqual(session.status, UploadSession.STATUS_COMPLETED)
+        self.assertFalse(os.path.exists(staging_path(session)))
+        self.vehicle.refresh_from_db()
+        with self.vehicle.purchase_agreement.open('rb') as stored:
+            self.assertEqual(stored.read(), data)
+        with self.assertRaises(UploadError):
+            complete_upload(session)
+
+    def test_image_upload_checks_digest_and_creates_vehicle_image(self):
+        data = os.urandom(1500)
+        session = start_upload(self.vehicle, UploadSession.TARGET_IMAGE, 'car.jpg', len(data), sha256='0' * 64)
+        self.send(session, data, [0, 1])
+        with self.assertRaisesMessage(UploadError, 'sha256'):
+            complete_upload(session)
+
+        session.sha256 = ''
+        session.save(update_fields=['sha256'])
+        session = complete_upload(session)
+        self.assertEqual(VehicleImage.objects.get(vehicle=self.vehicle), session.vehicle_image)
+
+    def test_token_user_can_start_and_resume_an_upload(self):
+        owner = CustomUser.objects.create_user(username='uploader', password='x', tenant=self.tenant)
+        token_user = TenantTokenUser({'user_id': owner.pk, 'groups': [], 'perms': ['dealership.add_vehicle']})
+        request = APIRequestFactory().post('/dealership/uploads/', {
+            'vehicle_id': self.vehicle.pk, 'target': 'image', 'filename': 'car.jpg', 'size': 10,
+        }, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=token_user)
+        response = UploadSessionCreateView.as_view()(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(UploadSession.objects.get(pk=response.data['id']).created_by_id, owner.pk)
+
+        request = APIRequestFactory().get(f"/dealership/uploads/{response.data['id']}/")
+        request.tenant = self.tenant
+        force_authenticate(request, user=token_user)
+        self.assertEqual(UploadSessionDetailView.as_view()(request, upload_id=response.data['id']).status_code, 200)
+
+
+class SearchTests(DealershipTestCase):
+    def setUp(self):
+        # bulk_create skips signals; the search vector comes from the database trigger
+        Vehicle.objects.bulk_create([
+            Vehicle(**{**VEHICLE_DEFAULTS, 'vehicle_make': make, 'vehicle_model': model, 'license_plate_number': plate,
+                       'fuel_type': fuel, 'vehicle_type': vehicle_type})
+            for make, model, plate, fuel, vehicle_type in [
+                ('Toyota', 'Corolla', 'MH12AB1234', 'Petrol', 'car'),
+                ('Toyota', 'Innova', 'MH14CD5678', 'Diesel', 'car'),
+                ('Tata', 'Ace', 'KA01EF1234', 'Diesel', 'truck'),
+            ]
+        ])
+
+    def plates(self, vehicles):
+        return [vehicle.license_plate_number for vehicle in vehicles]
+
+    def test_words_match_as_prefixes_and_plates_as_substrings(self):
+        vehicles, total, _ = search_vehicles('toyo cor')
+        self.assertEqual((total, self.plates(vehicles)), (1, ['MH12AB1234']))
+
+        vehicles, total, _ = search_vehicles('AB12')
+        self.assertEqual((total, self.plates(vehicles)), (1, ['MH12AB1234']))
+
+        Vehicle.objects.filter(license_plate_number='KA01EF1234').update(vehicle_model='Prima')
+        self.assertEqual(self.plates(search_vehicles('prima')[0]), ['KA01EF1234'])
+        self.assertEqual(search_vehicles('nothing like it')[1], 0)
+
+    def test_facets_ignore_their_own_filter(self):
+        vehicles, total, facets = search_vehicles('', {'fuel_type': 'Diesel', 'vehicle_type': 'car'})
+        self.assertEqual((total, self.plates(vehicles)), (1, ['MH14CD5678']))
+        self.assertEqual(facets['fuel_type'], [{'value': 'Diesel', 'count': 1}, {'value': 'Petrol', 'count': 1}])
+        self.assertEqual(facets['vehicle_type'], [{'value': 'car', 'count': 1}, {'value': 'truck', 'count': 1}])
+        self.assertEqual(facets['inventory_status'], [{'value': 'IN', 'count': 1}])
+
+
+class InquiryMatchingTests(DealershipTestCase):
+    def setUp(self):
+        # Indexes outlive the per-test rollback; start each test from the database
+        inventory_indexes.clear()
+
+    def add_vehicle(self, plate, make, model, price, year=2020):
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_vehicle(vehicle_make=make, vehicle_model=model, year_of_manufacturing=year,
+                                license_plate_number=plate, estimated_selling_price=Decimal(price))
+
+    def matched_plates(self, inquiry):
+        return [entry.license_plate_number for _, entry in match_inquiries([inquiry])[inquiry.pk]]
+
+    def test_budget_text_is_parsed_into_rupee_ranges(self):
+        self.assertEqual(parse_budget('5-7 lakh'), (500000, 700000))
+        self.assertEqual(parse_budget('under 8L'), (None, 800000))
+        self.assertEqual(parse_budget('Rs. 4,50,000 - 5,00,000'), (450000, 500000))
+        self.assertEqual(parse_budget('above 1.2 cr'), (12000000, None))
+        self.assertEqual(parse_budget('no idea'), (None, None))
+
+    def test_matches_are_ranked_and_follow_vehicle_changes(self):
+        swift = self.add_vehicle('MAT1', 'Maruti Suzuki', 'Swift', '550000')
+        self.add_vehicle('MAT2', 'Maruti', 'Swift Dzire', '650000')
+        self.add_vehicle('MAT3', 'Maruti', 'Swift', '900000')
+        self.add_vehicle('MAT4', 'Hyundai', 'Creta', '600000')
+        inquiry = VehicleInquiry.objects.create(name='Asha', Vehicle_name='maruti swift', budget='5-7 lakh')
+
+        self.assertEqual(self.matched_plates(inquiry), ['MAT1', 'MAT2'])
+
+        # The index reloads only the journalled vehicle
+        swift.estimated_selling_price = Decimal('1500000')
+        with self.captureOnCommitCallbacks(execute=True):
+            swift.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.matched_plates(inquiry), ['MAT2'])
+        self.assertEqual(len(data_queries(queries)), 1)
+        with CaptureQueriesContext(connection) as queries:
+            match_inquiries([inquiry])
+        self.assertEqual(data_queries(queries), [])
+
+    def test_interleaved_changes_are_all_replayed(self):
+        creta = self.add_vehicle('MAT7', 'Hyundai', 'Creta', '600000')
+        venue = self.add_vehicle('MAT8', 'Hyundai', 'Venue', '600000')
+        inquiry = VehicleInquiry.objects.create(name='Mira', Vehicle_name='Hyundai')
+        self.assertEqual(sorted(self.matched_plates(inquiry)), ['MAT7', 'MAT8'])
+
+        Vehicle.objects.filter(pk__in=[creta.pk, venue.pk]).update(vehicle_make='Kia')
+        schema_name = connection.schema_name
+        set_many = cache.set_many
+        interleaved = []
+
+        def set_many_after_second_write(*args, **kwargs):
+            # The second write reserves and publishes its entry before the first writes its own
+            if not interleaved:
+                interleaved.append(venue.pk)
+                inventory_indexes.record_changes(schema_name, [venue.pk])
+            return set_many(*args, **kwargs)
+
+        with mock.patch.object(cache, 'set_many', side_effect=set_many_after_second_write):
+            inventory_indexes.record_changes(schema_name, [creta.pk])
+        self.assertEqual(interleaved, [venue.pk])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.matched_plates(inquiry), [])
+        self.assertEqual(len(data_queries(queries)), 1)  # Both replayed, without a rebuild
+
+    def test_arrivals_are_recorded_for_open_inquiries(self):
+        wanted = VehicleInquiry.objects.create(name='Ravi', Vehicle_name='Creta', budget='around 6 lakh')
+        VehicleInquiry.objects.create(name='Done', Vehicle_name='Creta', status=VehicleInquiry.STATUS_CLOSED)
+        VehicleInquiry.objects.create(name='Other', Vehicle_name='Innova')
+
+        creta = self.add_vehicle('MAT5', 'Hyundai', 'Creta', '620000')
+        # Matching is left to the worker
+        self.assertFalse(InquiryMatch.objects.exists())
+        job = MatchingJob.objects.get(tenant=self.tenant)
+        self.assertEqual(job.vehicle_ids, [creta.pk])
+
+        self.assertTrue(run_matching_job(job.pk))
+        self.assertEqual(list(InquiryMatch.objects.values_list('inquiry_id', 'vehicle_id', 'score')),
+                         [(wanted.pk, creta.pk, 1.0)])
+        job.refresh_from_db()
+        self.assertEqual(job.status, MatchingJob.STATUS_DONE)
+
+    def test_journal_failures_do_not_fail_the_write(self):
+        with mock.patch.object(inventory_indexes, 'record_changes', side_effect=RuntimeError('cache down')), \
+                self.assertLogs('django', 'ERROR'):
+            creta = self.add_vehicle('MAT9', 'Hyundai', 'Creta', '620000')
+        self.assertTrue(Vehicle.objects.filter(pk=creta.pk).exists())
+        self.assertEqual(MatchingJob.objects.get(tenant=self.tenant).vehicle_ids, [creta.pk])
+
+    def test_old_indexes_are_rebuilt(self):
+        creta = self.add_vehicle('MAT6', 'Hyundai', 'Creta', '600000')
+        inquiry = VehicleInquiry.objects.create(name='Mira', Vehicle_name='Creta')
+        self.assertEqual(self.matched_plates(inquiry), ['MAT6'])
+
+        Vehicle.objects.filter(pk=creta.pk).update(vehicle_model='Venue')  # Not journalled
+        self.assertEqual(self.matched_plates(inquiry), ['MAT6'])
+        with mock.patch.object(inventory_indexes, 'max_age', -1):
+            self.assertEqual(self.matched_plates(inquiry), [])
+
+    def test_command_records_the_best_matches_per_inquiry(self):
+        # Without running the arrival callbacks, so only the command records matches
+        for i in range(DEFAULT_LIMIT + 3):
+            make_vehicle(vehicle_make='Hyundai', vehicle_model='Creta', license_plate_number=f'CMD{i}',
+                         inventory_status='IN', estimated_selling_price=Decimal(600000 + i))
+        inquiry = VehicleInquiry.objects.create(name='Ravi', Vehicle_name='Creta')
+
+        call_command('match_inquiries', schema=self.tenant.schema_name, stdout=io.StringIO())
+        self.assertEqual(InquiryMatch.objects.filter(inquiry=inquiry).count(), DEFAULT_LIMIT)
+
+
+class RequestLogTests(SimpleTestCase):
+    def request(self, **headers):
+        request = RequestFactory().get('/dealership/api/vehicles/', **headers)
+
+        def unexpected():
+            raise AssertionError("The session or user was loaded")
+        request.user = SimpleLazyObject(unexpected)
+        return request
+
+    def middleware(self, status=200, sample_rate=1.0):
+        middleware = RequestLogMiddleware(lambda request: HttpResponse(status=status))
+        middleware.sample_rate = sample_rate
+        return middleware
+
+    def test_logged_request_is_one_json_record(self):
+        with self.assertLogs('dealership.requests', 'INFO') as logs:
+            self.middleware()(self.request(HTTP_X_REQUEST_ID='abc123'))
+        record = logs.records[0]
+        self.assertEqual((record.method, record.status, record.user_id), ('GET', 200, None))
+        self.assertFalse(hasattr(record, 'headers'))
+        data = json.loads(JSONFormatter().format(record))
+        self.assertEqual(data['message'], 'GET /dealership/api/vehicles/ 200')
+        self.assertEqual(data['path'], '/dealership/api/vehicles/')
+
+    def test_debug_details_redact_credentials(self):
+        with self.assertLogs('dealership.requests', 'DEBUG') as logs:
+            self.middleware()(self.request(HTTP_AUTHORIZATION='Bearer secret', HTTP_COOKIE='sessionid=secret',
+                                           HTTP_X_SESSION_ID='secret', HTTP_X_ENCRYPTED_UID='secret',
+                                           HTTP_X_API_KEY='secret', HTTP_X_TENANT_SCHEMA='test'))
+        record = logs.records[0]
+        for header in ('Authorization', 'X-Session-Id', 'X-Encrypted-Uid', 'X-Api-Key'):
+            self.assertEqual(record.headers[header], '[redacted]')
+        self.assertEqual(record.headers['X-Tenant-Schema'], 'test')
+        self.assertEqual(record.cookies, ['sessionid'])
+        self.assertNotIn('secret', JSONFormatter().format(record))
+
+    def test_sampled_out_requests_are_skipped_unless_they_fail(self):
+        with self.assertLogs('dealership.requests', 'INFO') as logs:
+            self.middleware(sample_rate=0.0)(self.request())
+            self.middleware(status=500, sample_rate=0.0)(self.request())
+        self.assertEqual([(record.levelname, record.status) for record in logs.records], [('ERROR', 500)])
+
+    def test_disabled_logger_builds_nothing(self):
+        logger = logging.getLogger('dealership.requests')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        response = self.middleware()(self.request())
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,174 @@
+# dealership/uploads.py
+"""
+Resumable chunked uploads.
+
+A client starts an UploadSession with the file's name and size, then PUTs
+fixed-size parts (in any order, in parallel, retrying as often as needed).
+Each part is streamed from the request body into its offset of a staging
+file, so neither Django's multipart parser nor a worker's memory ever holds
+the whole file. Completing the session hands the staging file to the
+target field's storage and attaches it to the vehicle.
+
+Staging files live under UPLOAD_STAGING_ROOT/<schema>/, which must be
+shared by every web process. Sessions left open longer than
+UPLOAD_SESSION_TTL_SECONDS are removed by expire_upload_sessions().
+"""
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+from .images import queue_image_processing
+from .models import UploadSession, UploadPart, VehicleImage
+import logging
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """The upload request cannot be applied to the session in its current state."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def staging_dir():
+    root = _setting('UPLOAD_STAGING_ROOT', os.path.join(settings.BASE_DIR, 'upload_staging'))
+    return os.path.join(root, connection.schema_name)
+
+
+def staging_path(session):
+    return os.path.join(staging_dir(), f'{session.pk}.part')
+
+
+def start_upload(vehicle, target, filename, size, user=None, sha256=''):
+    """Open an UploadSession and its (sparse) staging file."""
+    if target not in dict(UploadSession.TARGET_CHOICES):
+        raise UploadError(f"Unknown upload target '{target}'")
+    max_size = _setting('UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+    if not 0 < size <= max_size:
+        raise UploadError(f"size must be between 1 and {max_size} bytes")
+    if sha256 and len(sha256) != 64:
+        raise UploadError("sha256 must be a hex SHA-256 digest")
+
+    session = UploadSession.objects.create(
+        vehicle=vehicle, target=target, filename=os.path.basename(filename)[:255] or 'upload',
+        size=size, part_size=_setting('UPLOAD_PART_SIZE', 5 * 1024 * 1024),
+        sha256=sha256.lower(), created_by_id=user.pk if user else None,
+    )
+    path = staging_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as staging:
+        staging.truncate(size)
+    return session
+
+
+def write_part(session, number, stream, length):
+    """
+    Copy part ``number`` (0-based) from ``stream`` into its place in the
+    staging file. Re-sending a part overwrites it, so retries are safe.
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        raise UploadError("Upload is already completed")
+    if not 0 <= number < session.part_count:
+        raise UploadError(f"Part number must be between 0 and {session.part_count - 1}")
+    expected = session.part_length(number)
+    if length != expected:
+        raise UploadError(f"Part {number} must be exactly {expected} bytes")
+
+    offset = number * session.part_size
+    received = 0
+    fd = os.open(staging_path(session), os.O_WRONLY)
+    try:
+        while received < expected:
+            chunk = stream.read(min(READ_CHUNK_SIZE, expected - received))
+            if not chunk:
+                break
+            os.pwrite(fd, chunk, offset + received)
+            received += len(chunk)
+    finally:
+        os.close(fd)
+    if received != expected:
+        raise UploadError(f"Part {number} ended after {received} of {expected} bytes")
+
+    UploadPart.objects.update_or_create(session=session, number=number, defaults={'size': received})
+    logger.debug(f"Upload {session.pk}: stored part {number} ({received} bytes)")
+
+
+def received_parts(session):
+    return sorted(session.parts.values_list('number', flat=True))
+
+
+def complete_upload(session):
+    """Attach the assembled file to its target. Returns the completed session."""
+    path = staging_path(session)
+    with transaction.atomic():
+        # Lock the session so concurrent completes attach the file once
+        session = UploadSession.objects.select_for_update().select_related('vehicle').get(pk=session.pk)
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadError("Upload is already completed")
+        missing = sorted(set(range(session.part_count)) - set(received_parts(session)))
+        if missing:
+            raise UploadError(f"Missing parts: {', '.join(map(str, missing[:20]))}")
+
+        if session.sha256:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as staging:
+                for chunk in iter(lambda: staging.read(READ_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != session.sha256:
+                raise UploadError("Assembled file does not match the sha256 given at start")
+
+        with open(path, 'rb') as staging:
+            upload = File(staging, name=session.filename)
+            if session.target == UploadSession.TARGET_IMAGE:
+                session.vehicle_image = VehicleImage.objects.create(vehicle=session.vehicle, image=upload)
+                queue_image_processing([session.vehicle_image])
+            else:
+                vehicle = session.vehicle
+                getattr(vehicle, session.target).save(session.filename, upload, save=False)
+                vehicle.save(update_fields=[session.target])
+        session.status = UploadSession.STATUS_COMPLETED
+        session.completed_at = timezone.now()
+        session.save(update_fields=['status', 'completed_at', 'vehicle_image'])
+        session.parts.all().delete()
+
+    os.unlink(path)
+    logger.debug(f"Upload {session.pk} completed into {session.target} of vehicle {session.vehicle_id}")
+    return session
+
+
+def abort_upload(session):
+    path = staging_path(session)
+    session.delete()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def expire_upload_sessions(max_age=None):
+    """
+    Delete the current schema's open sessions older than ``max_age``
+    (default UPLOAD_SESSION_TTL_SECONDS) and staging files no session owns.
+    Returns the number of sessions removed.
+    """
+    max_age = max_age or timedelta(seconds=_setting('UPLOAD_SESSION_TTL_SECONDS', 86400))
+    cutoff = timezone.now() - max_age
+    expired = list(UploadSession.objects.filter(status=UploadSession.STATUS_OPEN, created_at__lt=cutoff))
+    for session in expired:
+        abort_upload(session)
+
+    directory = staging_dir()
+    if os.path.isdir(directory):
+        open_ids = {str(pk) for pk in UploadSession.objects.filter(status=UploadSession.STATUS_OPEN)
+                    .values_list('pk', flat=True)}
+        for entry in os.scandir(directory):
+            # Left behind when a vehicle (and its sessions) was deleted mid-upload
+            if (entry.name.endswith('.part') and entry.name[:-len('.part')] not in open_ids
+                    and entry.stat().st_mtime < cutoff.timestamp()):
+                os.unlink(entry.path)
+    return len(expired)
@@ -5,17 +5,26 @@ from .views import (
     LiveInventoryView,
     DeleteVehicleAPIView,
     CombinedVehicleAPIView,
+    VehicleImportAPIView,
     VehicleDataAPIView,
     AddMaintenanceAPIView,
     MaintenanceRecordDetailView,
     MaintenanceRecordListCreateView,
     MaintenanceRecordExportView,
     VehicleInventoryExportView,
+    ExportJobListCreateView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadPartView,
+    UploadCompleteView,
     CreatePaymentAPIView,
     ViewPaymentsAPIView,
     VehicleUpdateAPIView,
     OutboundVehicleAPIView,
     VehiclePaymentSummaryAPIView,
+    VehiclePaymentSummaryBatchAPIView,
     UpdatePaymentAPIView,
     VehicleCostAPIView,
     CatalogueAPIView,
@@ -25,9 +34,12 @@ from .views import (
     InquiryBrokerListCreateAPIView,
     GetOutboundVehiclesAPIView,
     VehicleInquiryListCreateAPIView,
+    VehicleInquiryMatchesAPIView,
+    VehicleInquiryMatchBatchAPIView,
     UpdateOutboundVehicleAPIView,
     SalesStatsAPIView,
     VehicleListView,
+    VehicleSearchAPIView,
     VehicleImageAPIView
 )
 
@@ -37,13 +49,21 @@ urlpatterns = [
 
     # Vehicle Management
     path('inventory/', VehicleListView.as_view(), name='vehicle_inventory'),  # List Vehicles
+    path('vehicles/search/', VehicleSearchAPIView.as_view(), name='vehicle-search'),
     path('live-inventory/', LiveInventoryView.as_view(), name='live_inventory'),  # Live Inventory API
     path('delete-vehicle/<int:vehicle_id>/', DeleteVehicleAPIView.as_view(), name='delete_vehicle'),  # Delete Vehicle
     path('vehicle/', CombinedVehicleAPIView.as_view(), name='combined_vehicle'),  # Combined Vehicle API
+    path('vehicle/import/', VehicleImportAPIView.as_view(), name='vehicle-import'),
     path('vehicle/update/<int:vehicle_id>/', VehicleUpdateAPIView.as_view(), name='update-vehicle'),
     path('vehicle-detail/<int:vehicle_id>/', VehicleDetailAPIView.as_view(), name='vehicle-detail'),
     path('vehicles/<int:vehicle_id>/images/', VehicleImageAPIView.as_view(), name='vehicle-images'),
 
+    # Resumable chunked uploads (images and vehicle documents)
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-session-create'),
+    path('uploads/<uuid:upload_id>/', UploadSessionDetailView.as_view(), name='upload-session-detail'),
+    path('uploads/<uuid:upload_id>/parts/<int:number>/', UploadPartView.as_view(), name='upload-part'),
+    path('uploads/<uuid:upload_id>/complete/', UploadCompleteView.as_view(), name='upload-complete'),
+
     # payments slot
     path('payments/', CreatePaymentAPIView.as_view(), name='create_payment'),
 
@@ -64,10 +84,16 @@ urlpatterns = [
     path('maintenance/', MaintenanceRecordListCreateView.as_view(), name='maintenance-list-create'),
     path('maintenance/<int:pk>/', MaintenanceRecordDetailView.as_view(), name='maintenance-detail'),
     path('maintenance/export-excel/', MaintenanceRecordExportView.as_view(), name='maintenance-export-excel'),
+
+    # Background exports (processed by manage.py run_export_worker)
+    path('exports/', ExportJobListCreateView.as_view(), name='export-job-list-create'),
+    path('exports/<int:job_id>/', ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('exports/<int:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
     path('outbound-vehicle/', OutboundVehicleAPIView.as_view(), name='create_outbound_vehicle'),  # Create Outbound Vehicle
     path('outbound-vehicle/<int:vehicle_id>/', OutboundVehicleAPIView.as_view(), name='get_outbound_vehicle'),  # Get Outbound Vehicle by vehicle_id
     path('outbound-vehicles/', GetOutboundVehiclesAPIView.as_view(), name='get_outbound_vehicles'),
     path('vehicle-payment-summary/<int:vehicle_id>/', VehiclePaymentSummaryAPIView.as_view(), name='vehicle-payment-summary'),
+    path('vehicle-payment-summaries/', VehiclePaymentSummaryBatchAPIView.as_view(), name='vehicle-payment-summaries'),
     path('vehicle-cost/<int:vehicle_id>/', VehicleCostAPIView.as_view(), name='update-payment'),
     path('catalogue/', CatalogueAPIView.as_view(), name='catalogue-list'),
     path('catalogue/<int:vehicle_id>/', CatalogueDetailAPIView.as_view(), name='catalogue-detail'),
@@ -82,6 +108,8 @@ urlpatterns = [
 
     path('inquiry-brokers/', InquiryBrokerListCreateAPIView.as_view(), name='inquiry-brokers'),
     path('vehicle-inquiries/', VehicleInquiryListCreateAPIView.as_view(), name='vehicle-inquiries'),
+    path('vehicle-inquiries/matches/', VehicleInquiryMatchBatchAPIView.as_view(), name='vehicle-inquiry-matches'),
+    path('vehicle-inquiries/<int:inquiry_id>/matches/', VehicleInquiryMatchesAPIView.as_view(), name='vehicle-inquiry-match-detail'),
     path('outbound/update/<int:vehicle_id>/', UpdateOutboundVehicleAPIView.as_view(), name='update_outbound_vehicle'),
     path('sales-stats/', SalesStatsAPIView.as_view(), name='sales-stats'),
 
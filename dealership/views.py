@@ -1,8 +1,11 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import APIException
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
 from django.contrib.auth.models import Group
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -15,40 +18,40 @@ from django.utils import timezone
 from datetime import timedelta
 from django.http import Http404
 from accounts.models import CustomUser
-from tenants.models import Client, Domain
+from tenants.models import Client, Domain, ExportJob
 from django_tenants.utils import tenant_context
 from threading import local
 import jwt
-import openpyxl
 from rest_framework import generics
 from django.db.models import Sum
 from datetime import datetime, timedelta
-from .serializers import ( CombinedVehicleSerializer,CatalogueSerializer, VehicleImageSerializer, OutboundVehicleSerializer, UpdateCatalogueSerializer, PaymentSerializer, VehicleListSerializer,VehicleDetailSerializer,VehicleInquirySerializer, InquiryBrokerSerializer, VehicleDataSerializer,OutboundVehicleSerializer, MaintenanceRecord, MaintenanceRecordSerializer,VehicleUpdateSerializer,StaffSerializer,StaffSalarySerializer,StaffSalaryMonthWiseSerializer,InvoiceSerializer,ElectricityBillSerializer, OfficeRentSerializer, WifiBillSerializer, AdditionalExpenseSerializer)
-
-from .models import Vehicle, MaintenanceRecord, VehicleImage, OutboundVehicle, Payment, Inquirybroker, VehicleInquiry, Staff,StaffSalary,Invoice,ElectricityBill, OfficeRent, WifiBill, AdditionalExpense
+from .serializers import ( CombinedVehicleSerializer,CatalogueSerializer, VehicleImageSerializer, OutboundVehicleSerializer, UpdateCatalogueSerializer, PaymentSerializer, VehicleListSerializer,VehicleSearchSerializer,VehicleDetailSerializer,VehicleInquirySerializer, InquiryBrokerSerializer, VehicleDataSerializer,OutboundVehicleSerializer, MaintenanceRecord, MaintenanceRecordSerializer,VehicleUpdateSerializer,StaffSerializer,StaffSalarySerializer,StaffSalaryMonthWiseSerializer,InvoiceSerializer,ElectricityBillSerializer, OfficeRentSerializer, WifiBillSerializer, AdditionalExpenseSerializer)
+
+from .pagination import VehicleKeysetPagination, VehicleSearchPagination
+from .search import FACET_FIELDS, search_vehicles
+from .catalogue import get_catalogue, get_catalogue_item, schedule_catalogue_update
+from .images import queue_image_processing
+from .imports import ImportFileError, import_vehicles
+from .ledger import get_ledgers, payment_summary, cost_summary
+from .matching import DEFAULT_LIMIT, criteria_data, match_data, match_inquiries, parse_inquiry
+from .media import retain_media
+from .uploads import UploadError, abort_upload, complete_upload, received_parts, start_upload, write_part
+from .stats import sales_stats, vehicle_statistics, DEFAULT_MONTHS, MAX_MONTHS
+from .exports import EXPORTS, XLSX_CONTENT_TYPE, MaintenanceRecordExport, VehicleInventoryExport
+from .models import Vehicle, MaintenanceRecord, VehicleImage, OutboundVehicle, Payment, Inquirybroker, VehicleInquiry, Staff,StaffSalary,Invoice,ElectricityBill, OfficeRent, WifiBill, AdditionalExpense, UploadSession, InquiryMatch
 
 logger = logging.getLogger(__name__)
 
 
 class CombinedVehicleAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
+    required_permissions = {'POST': ('dealership.add_vehicle', 'You do not have permission to add vehicles.')}
 
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        if not (request.user.has_perm('dealership.add_vehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to add vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         tenant = request.tenant
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
@@ -66,8 +69,39 @@ class CombinedVehicleAPIView(APIView):
 
 
             
+class VehicleImportAPIView(APIView):
+    """Bulk-create vehicles from an uploaded CSV or XLSX ``file``; ``dry_run=true`` only validates."""
+    parser_classes = (MultiPartParser, FormParser)
+    required_permissions = {'POST': ('dealership.add_vehicle', 'You do not have permission to add vehicles.')}
+
+    def post(self, request):
+        if not request.user.is_authenticated:
+            logger.warning("Unauthorized access attempt: No active session")
+            return Response({"detail": "Authentication credentials were not provided."}, status=401)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "A CSV or XLSX file is required."}, status=400)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        tenant = request.tenant
+        logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
+
+        try:
+            with tenant_context(tenant):
+                logger.debug(f"Importing vehicles from {upload.name} for tenant: {tenant.name}")
+                report = import_vehicles(upload, upload.name, added_by_id=request.user.pk, dry_run=dry_run)
+                return Response(report, status=200)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            logger.error(f"Error in VehicleImportAPIView: {str(e)}", exc_info=True)
+            return Response({"error": f"Server error: {str(e)}"}, status=500)
+
+
 class VehicleImageAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
+    required_permissions = {'POST': ('dealership.add_vehicle', 'You do not have permission to add vehicle images.')}
 
     def get(self, request, vehicle_id):
         if not request.user.is_authenticated:
@@ -89,11 +123,6 @@ class VehicleImageAPIView(APIView):
         if not request.user.is_authenticated:
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        if not (request.user.has_perm('dealership.add_vehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to add vehicle images.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         try:
             with tenant_context(request.tenant):
                 vehicle = Vehicle.objects.get(vehicle_id=vehicle_id)
@@ -107,6 +136,9 @@ class VehicleImageAPIView(APIView):
                     image_instances.append(image)
                 
                 VehicleImage.objects.bulk_create(image_instances)
+                retain_media(image_instances)
+                schedule_catalogue_update(vehicle.vehicle_id)
+                queue_image_processing(image_instances)
                 serializer = VehicleImageSerializer(image_instances, many=True, context={"request": request})
                 return Response({"message": "Images uploaded", "images": serializer.data}, status=201)
         except Vehicle.DoesNotExist:
@@ -118,6 +150,10 @@ class VehicleImageAPIView(APIView):
 
 class VehicleUpdateAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
+    required_permissions = {
+        'PUT': ('dealership.change_vehicle', 'You do not have permission to update vehicles.'),
+        'PATCH': ('dealership.change_vehicle', 'You do not have permission to update vehicles.'),
+    }
     
     def get_object(self, vehicle_id, tenant):
         with tenant_context(tenant):
@@ -133,12 +169,6 @@ class VehicleUpdateAPIView(APIView):
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
             
-        # Check permissions
-        if not (request.user.has_perm('dealership.change_vehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to update vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
         tenant = request.tenant
         try:
             vehicle = self.get_object(vehicle_id, tenant)
@@ -164,12 +194,6 @@ class VehicleUpdateAPIView(APIView):
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
             
-        # Check permissions
-        if not (request.user.has_perm('dealership.change_vehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to update vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
         tenant = request.tenant
         try:
             vehicle = self.get_object(vehicle_id, tenant)
@@ -202,12 +226,6 @@ logger = logging.getLogger(__name__)
 class VehicleListView(APIView):
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -219,23 +237,54 @@ class VehicleListView(APIView):
             with tenant_context(tenant):
                 logger.debug(f"Fetching vehicles for tenant: {tenant.name}")
                 vehicles = Vehicle.objects.all()
+                paginator = VehicleKeysetPagination()
+                if paginator.is_requested(request):
+                    page = paginator.paginate_queryset(vehicles, request, view=self)
+                    serializer = CombinedVehicleSerializer(page, many=True, context={"request": request})
+                    return paginator.get_paginated_response(serializer.data)
                 serializer = CombinedVehicleSerializer(vehicles, many=True, context={"request": request})
                 return Response(serializer.data)
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"Error in VehicleListView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
             
  
+class VehicleSearchAPIView(APIView):
+    """
+    GET vehicles/search/?q=<text>&vehicle_type=&fuel_type=&inventory_status=&page=&page_size=
+
+    Ranked full-text search over the tenant's inventory (see dealership.search),
+    with facet counts for vehicle_type, fuel_type and inventory_status.
+    """
+    max_query_length = 200
+
+    def get(self, request):
+        text = request.query_params.get('q', '')
+        if len(text) > self.max_query_length:
+            return Response({"error": f"q must be at most {self.max_query_length} characters."}, status=400)
+        filters = {field: request.query_params.get(field) for field in FACET_FIELDS}
+
+        try:
+            with tenant_context(request.tenant):
+                vehicles, total, facets = search_vehicles(text, filters)
+                paginator = VehicleSearchPagination(count=total)
+                page = paginator.paginate_queryset(vehicles, request, view=self)
+                serializer = VehicleSearchSerializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data, facets)
+        except APIException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in VehicleSearchAPIView: {str(e)}", exc_info=True)
+            return Response({"error": f"Server error: {str(e)}"}, status=500)
+
+
 logger = logging.getLogger(__name__)
 
 class LiveInventoryView(APIView):
       
     def get(self, request):
-            logger.debug(f"Request headers: {request.headers}")
-            logger.debug(f"Session: {dict(request.session)}")
-            logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-            logger.debug(f"Cookies: {request.COOKIES}")
-
             if not request.user.is_authenticated:
                 logger.warning("Unauthorized access attempt: No active session")
                 return Response({"error": "Authentication credentials were not provided."}, status=401)
@@ -247,8 +296,15 @@ class LiveInventoryView(APIView):
                 with tenant_context(tenant):
                     logger.debug(f"Fetching vehicles for tenant: {tenant.name}")
                     vehicles = Vehicle.objects.all()
+                    paginator = VehicleKeysetPagination()
+                    if paginator.is_requested(request):
+                        page = paginator.paginate_queryset(vehicles, request, view=self)
+                        serializer = CombinedVehicleSerializer(page, many=True, context={"request": request})
+                        return paginator.get_paginated_response(serializer.data)
                     serializer = CombinedVehicleSerializer(vehicles, many=True, context={"request": request})
                     return Response(serializer.data)
+            except APIException:
+                raise
             except Exception as e:
                 logger.error(f"Error in LiveInventoryView: {str(e)}", exc_info=True)
                 return Response({"error": f"Server error: {str(e)}"}, status=500)
@@ -256,23 +312,13 @@ class LiveInventoryView(APIView):
 
 
 class DeleteVehicleAPIView(APIView):
-    def delete(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
+    required_permissions = {'DELETE': ('dealership.delete_vehicle', 'You do not have permission to delete vehicles.')}
 
+    def delete(self, request, vehicle_id):
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        # Check if user has permission to delete vehicles or belongs to allowed groups
-        if not (request.user.has_perm('dealership.delete_vehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to delete vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         tenant = request.tenant
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
@@ -289,12 +335,6 @@ class DeleteVehicleAPIView(APIView):
 
 class VehicleDataAPIView(APIView):
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -306,8 +346,15 @@ class VehicleDataAPIView(APIView):
             with tenant_context(tenant):
                 logger.debug(f"Fetching vehicles for tenant: {tenant.name}")
                 vehicles = Vehicle.objects.all()
+                paginator = VehicleKeysetPagination()
+                if paginator.is_requested(request):
+                    page = paginator.paginate_queryset(vehicles, request, view=self)
+                    serializer = VehicleDataSerializer(page, many=True, context={"request": request})
+                    return paginator.get_paginated_response(serializer.data)
                 serializer = VehicleDataSerializer(vehicles, many=True, context={"request": request})
                 return Response(serializer.data, status=200)
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"Error in VehicleDataAPIView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
@@ -315,12 +362,6 @@ class VehicleDataAPIView(APIView):
 
 class AddMaintenanceAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -359,12 +400,6 @@ class AddMaintenanceAPIView(APIView):
             
 class MaintenanceRecordListCreateView(APIView):
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -383,12 +418,6 @@ class MaintenanceRecordListCreateView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -410,12 +439,6 @@ class MaintenanceRecordListCreateView(APIView):
 
 class MaintenanceRecordDetailView(APIView):
     def get(self, request, pk):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -434,12 +457,6 @@ class MaintenanceRecordDetailView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def put(self, request, pk):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -461,12 +478,6 @@ class MaintenanceRecordDetailView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def delete(self, request, pk):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -491,129 +502,182 @@ class MaintenanceRecordExportView(APIView):
     Export all maintenance records as an Excel file.
     """
     def get(self, request):
-        # 1) Create an in-memory workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Maintenance Records"
-
-        # 2) Write column headers (adjust as needed)
-        headers = [
-            "ID",
-            "Vehicle ID",
-            "Maintenance Type",
-            "Maintenance Date",
-            "Cost",
-            "Person in Charge",
-            "Receipt",
-            "Created At",
-        ]
-        for col_num, header in enumerate(headers, start=1):
-            ws.cell(row=1, column=col_num, value=header)
-
-        # 3) Query all maintenance records
-        queryset = MaintenanceRecord.objects.all().order_by('id')
-
-        # 4) Write each record row
-        row_index = 2
-        for record in queryset:
-            ws.cell(row=row_index, column=1, value=record.id)
-            ws.cell(row=row_index, column=2, value=record.vehicle.vehicle_id)  # or record.vehicle_id
-            ws.cell(row=row_index, column=3, value=record.maintenance_type)
-            # Convert date to string if not None
-            ws.cell(row=row_index, column=4, value=str(record.maintenance_date) if record.maintenance_date else "")
-            ws.cell(row=row_index, column=5, value=record.cost)
-            ws.cell(row=row_index, column=6, value=record.person_in_charge if record.person_in_charge else "")
-            ws.cell(row=row_index, column=7, value=str(record.receipt) if record.receipt else "No Receipt")
-            ws.cell(row=row_index, column=8, value=str(record.created_at) if record.created_at else "")
-            row_index += 1
-
-        # 5) Prepare HTTP response with an Excel attachment
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename=maintenance_records.xlsx'
-
-        # 6) Save the workbook content to the response
-        wb.save(response)
-        return response
+        with tenant_context(request.tenant):
+            return MaintenanceRecordExport().response()
 
 
 class VehicleInventoryExportView(APIView):
     def get(self, request):
-        # create workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Vehicle Inventory"
-
-        # headers
-        headers = [
-            "Vehicle ID", "Type", "Make", "Model", "Year",
-            "Chassis", "Plate", "Odometer", "Color", "Fuel",
-            "Transmission", "Seller", "Mobile", "Email",
-            "Condition", "Tires", "Damage", "Engine",
-            "Interior", "Arrival", "Price", "Storage", "Notes"
-        ]
-        for col_num, header in enumerate(headers, start=1):
-            ws.cell(row=1, column=col_num, value=header)
-
-        # query vehicles
-        queryset = Vehicle.objects.all().order_by("vehicle_id")
-
-        # fill rows
-        row_index = 2
-        for v in queryset:
-            ws.cell(row=row_index, column=1, value=v.vehicle_id)
-            ws.cell(row=row_index, column=2, value=v.vehicle_type)
-            ws.cell(row=row_index, column=3, value=v.vehicle_make)
-            ws.cell(row=row_index, column=4, value=v.vehicle_model)
-            ws.cell(row=row_index, column=5, value=v.year_of_manufacturing)
-            ws.cell(row=row_index, column=6, value=v.chassis_number)
-            ws.cell(row=row_index, column=7, value=v.license_plate_number)
-            ws.cell(row=row_index, column=8, value=v.odometer_reading_kms)
-            ws.cell(row=row_index, column=9, value=v.color)
-            ws.cell(row=row_index, column=10, value=v.fuel_type)
-            ws.cell(row=row_index, column=11, value=v.transmission_type)
-            ws.cell(row=row_index, column=12, value=v.seller_name_company_name)
-            ws.cell(row=row_index, column=13, value=v.mobile_number)
-            ws.cell(row=row_index, column=14, value=v.email_address)
-            ws.cell(row=row_index, column=15, value=v.condition_grade)
-            ws.cell(row=row_index, column=16, value=v.tires_condition)
-            ws.cell(row=row_index, column=17, value=v.damage_details_if_any)
-            ws.cell(row=row_index, column=18, value=v.engine_condition)
-            # if interior_condition is boolean or string
-            ws.cell(row=row_index, column=19, value=str(v.interior_condition))
-            ws.cell(row=row_index, column=20, value=str(v.arrival_date or ""))
-            ws.cell(row=row_index, column=21, value=str(v.purchase_price or ""))
-            ws.cell(row=row_index, column=22, value=v.storage_location)
-            ws.cell(row=row_index, column=23, value=v.notes or "")
-            row_index += 1
-
-        # response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename=vehicle_inventory.xlsx'
-        wb.save(response)
-        return response
-        
+        with tenant_context(request.tenant):
+            return VehicleInventoryExport().response()
+
+
+def export_job_data(request, job):
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "rows_written": job.rows_written,
+        "total_rows": job.total_rows,
+        "error": job.error or None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "download_url": None,
+    }
+    if job.status == ExportJob.STATUS_DONE:
+        data["download_url"] = request.build_absolute_uri(reverse('export-job-download', args=[job.id]))
+    return data
+
+
+class ExportJobListCreateView(APIView):
+    """
+    Queue a background export (POST {"kind": ...}) or list the tenant's
+    recent export jobs. Jobs are processed by manage.py run_export_worker.
+    """
+    def get(self, request):
+        jobs = ExportJob.objects.filter(tenant=request.tenant)[:20]
+        return Response([export_job_data(request, job) for job in jobs], status=200)
+
+    def post(self, request):
+        kind = request.data.get('kind')
+        if kind not in EXPORTS:
+            return Response({"error": f"Invalid export kind. Choose from: {', '.join(EXPORTS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        job = ExportJob.objects.create(tenant=request.tenant, kind=kind, requested_by_id=request.user.pk)
+        logger.debug(f"Queued {kind} export job {job.id} for tenant: {request.tenant.name}")
+        return Response(export_job_data(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobDetailView(APIView):
+    def get(self, request, job_id):
+        job = get_object_or_404(ExportJob, id=job_id, tenant=request.tenant)
+        return Response(export_job_data(request, job), status=200)
+
+
+class ExportJobDownloadView(APIView):
+    def get(self, request, job_id):
+        job = get_object_or_404(ExportJob, id=job_id, tenant=request.tenant)
+        if job.status != ExportJob.STATUS_DONE or not job.file:
+            return Response({"error": f"Export is not ready (status: {job.status})."}, status=status.HTTP_409_CONFLICT)
+        return FileResponse(job.file.open('rb'), as_attachment=True,
+                            filename=EXPORTS[job.kind].filename, content_type=XLSX_CONTENT_TYPE)
+
+def upload_session_data(request, session):
+    data = {
+        "id": session.id,
+        "vehicle_id": session.vehicle_id,
+        "target": session.target,
+        "filename": session.filename,
+        "size": session.size,
+        "part_size": session.part_size,
+        "part_count": session.part_count,
+        "received_parts": received_parts(session) if session.status == UploadSession.STATUS_OPEN else [],
+        "status": session.status,
+        "created_at": session.created_at,
+        "completed_at": session.completed_at,
+        "file_url": None,
+    }
+    if session.status == UploadSession.STATUS_COMPLETED:
+        field = session.vehicle_image.image if session.vehicle_image else getattr(session.vehicle, session.target, None)
+        if field:
+            data["file_url"] = request.build_absolute_uri(field.url)
+        if session.vehicle_image:
+            data["vehicle_image"] = VehicleImageSerializer(session.vehicle_image, context={"request": request}).data
+    return data
+
+
+def get_upload_session(request, upload_id):
+    """The requesting user's upload session, or 404."""
+    sessions = UploadSession.objects.select_related('vehicle', 'vehicle_image')
+    if not request.user.is_superuser:
+        sessions = sessions.filter(created_by_id=request.user.pk)
+    return get_object_or_404(sessions, pk=upload_id)
+
+
+class UploadSessionCreateView(APIView):
+    """
+    Start a resumable upload: POST {"vehicle_id", "target", "filename",
+    "size", "sha256" (optional)}. ``target`` is "image" for a new
+    VehicleImage or the name of a vehicle document field. Send the parts
+    with PUT uploads/<id>/parts/<n>/, then POST uploads/<id>/complete/.
+    """
+    required_permissions = {'POST': ('dealership.add_vehicle', 'You do not have permission to upload vehicle files.')}
+
+    def post(self, request):
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            return Response({"error": "size must be the file size in bytes."}, status=400)
+
+        with tenant_context(request.tenant):
+            vehicle = get_object_or_404(Vehicle, vehicle_id=request.data.get("vehicle_id"))
+            try:
+                session = start_upload(
+                    vehicle, request.data.get("target", UploadSession.TARGET_IMAGE),
+                    request.data.get("filename") or "upload", size,
+                    user=request.user, sha256=request.data.get("sha256") or "",
+                )
+            except UploadError as e:
+                return Response({"error": str(e)}, status=400)
+            return Response(upload_session_data(request, session), status=201)
+
+
+class UploadSessionDetailView(APIView):
+    """Upload status, including the parts received so far (GET), or abort it (DELETE)."""
+    def get(self, request, upload_id):
+        with tenant_context(request.tenant):
+            session = get_upload_session(request, upload_id)
+            return Response(upload_session_data(request, session), status=200)
+
+    def delete(self, request, upload_id):
+        with tenant_context(request.tenant):
+            session = get_upload_session(request, upload_id)
+            if session.status != UploadSession.STATUS_OPEN:
+                return Response({"error": "Upload is already completed."}, status=status.HTTP_409_CONFLICT)
+            abort_upload(session)
+            return Response(status=204)
+
+
+class UploadPartView(APIView):
+    """PUT the raw bytes of part ``number`` (0-based) as the request body."""
+    def put(self, request, upload_id, number):
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        with tenant_context(request.tenant):
+            session = get_upload_session(request, upload_id)
+            try:
+                # Read from the raw stream; request.data would buffer the body
+                write_part(session, number, request.stream, length)
+            except UploadError as e:
+                return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT
+                                if session.status != UploadSession.STATUS_OPEN else 400)
+            return Response({"part": number, "received_parts": received_parts(session)}, status=200)
+
+
+class UploadCompleteView(APIView):
+    def post(self, request, upload_id):
+        with tenant_context(request.tenant):
+            session = get_upload_session(request, upload_id)
+            try:
+                session = complete_upload(session)
+            except UploadError as e:
+                return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+            return Response(upload_session_data(request, session), status=200)
+
 class OutboundVehicleAPIView(APIView):
-    def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
+    required_permissions = {
+        'GET': ('dealership.view_outboundvehicle', 'You do not have permission to view outbound vehicles.'),
+        'POST': ('dealership.add_outboundvehicle', 'You do not have permission to add outbound vehicles.'),
+    }
 
+    def get(self, request, vehicle_id):
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        # Check if user has permission to view outbound vehicles or belongs to allowed groups
-        if not (request.user.has_perm('dealership.view_outboundvehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to view outbound vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         tenant = request.tenant
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
@@ -634,22 +698,10 @@ class OutboundVehicleAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
     
     def post(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        # Check if user has permission to add outbound vehicles or belongs to allowed groups
-        if not (request.user.has_perm('dealership.add_outboundvehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to add outbound vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         tenant = request.tenant
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
@@ -673,23 +725,15 @@ class OutboundVehicleAPIView(APIView):
 
 
 class UpdateOutboundVehicleAPIView(APIView):
-    def patch(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
+    required_permissions = {
+        'PATCH': ('dealership.change_outboundvehicle', 'You do not have permission to update outbound vehicles.'),
+    }
 
+    def patch(self, request, vehicle_id):
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
 
-        # Check if user has permission to change outbound vehicles or belongs to allowed groups
-        if not (request.user.has_perm('dealership.change_outboundvehicle') or 
-                request.user.groups.filter(name__in=['sub-admins', 'salesperson']).exists()):
-            return Response({'error': 'You do not have permission to update outbound vehicles.'}, 
-                          status=status.HTTP_403_FORBIDDEN)
-
         tenant = request.tenant
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
@@ -712,12 +756,6 @@ class UpdateOutboundVehicleAPIView(APIView):
 class CreatePaymentAPIView(APIView):
 
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -737,14 +775,19 @@ class CreatePaymentAPIView(APIView):
                 if not payment_slots:
                     return Response({"error": "Payment slots array is required."}, status=400)
 
-                created_payments = []
-                for slot in payment_slots:
-                    serializer = PaymentSerializer(data={**slot, "vehicle_id": vehicle_id}, context={"request": request})
-                    if serializer.is_valid():
-                        serializer.save()
-                        created_payments.append(serializer.data)
-                    else:
-                        return Response(serializer.errors, status=400)
+                if not isinstance(payment_slots, list):
+                    return Response({"error": "Payment slots must be an array."}, status=400)
+
+                # Validate every slot before writing any of them
+                serializer = PaymentSerializer(
+                    data=[{**slot, "vehicle_id": vehicle.vehicle_id} for slot in payment_slots],
+                    many=True,
+                    context={"request": request}
+                )
+                if not serializer.is_valid():
+                    return Response(serializer.errors, status=400)
+                serializer.save()
+                created_payments = serializer.data
 
                 return Response(
                     {"message": "Payments added successfully!", "data": created_payments},
@@ -756,12 +799,6 @@ class CreatePaymentAPIView(APIView):
 
 class ViewPaymentsAPIView(APIView):
     def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -787,12 +824,6 @@ class ViewPaymentsAPIView(APIView):
   
 class UpdatePaymentAPIView(APIView):
     def put(self, request, vehicle_id, slot_number):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -853,12 +884,6 @@ class UpdatePaymentAPIView(APIView):
   
 class VehiclePaymentSummaryAPIView(APIView):
     def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -869,42 +894,16 @@ class VehiclePaymentSummaryAPIView(APIView):
         try:
             with tenant_context(tenant):
                 logger.debug(f"Fetching payment summary for tenant: {tenant.name}")
-                vehicle = get_object_or_404(Vehicle, vehicle_id=vehicle_id)
-                outbound_vehicle = OutboundVehicle.objects.filter(vehicle=vehicle).first()
-                selling_price = outbound_vehicle.selling_price if outbound_vehicle else 0
-                purchase_price = vehicle.purchase_price or 0
-
-                total_purchase_paid = Payment.objects.filter(vehicle=vehicle, payment_type="purchase").aggregate(
-                    total=Sum('amount_paid')
-                )['total'] or 0
-                purchase_balance = purchase_price - total_purchase_paid
-
-                total_selling_received = Payment.objects.filter(vehicle=vehicle, payment_type="selling").aggregate(
-                    total=Sum('amount_paid')
-                )['total'] or 0
-                selling_balance = selling_price - total_selling_received
-
-                return Response({
-                    "vehicle_id": vehicle_id,
-                    "purchase_price": purchase_price,
-                    "total_purchase_paid": total_purchase_paid,
-                    "purchase_balance": purchase_balance,
-                    "selling_price": selling_price,
-                    "total_selling_received": total_selling_received,
-                    "selling_balance": selling_balance
-                }, status=200)
+                ledger = get_ledgers([vehicle_id]).get(vehicle_id)
+                if ledger is None:
+                    return Response({"error": "Vehicle not found"}, status=404)
+                return Response(payment_summary(ledger), status=200)
         except Exception as e:
             logger.error(f"Error in VehiclePaymentSummaryAPIView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
    
 class VehicleCostAPIView(APIView):
     def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -915,31 +914,62 @@ class VehicleCostAPIView(APIView):
         try:
             with tenant_context(tenant):
                 logger.debug(f"Fetching vehicle cost for tenant: {tenant.name}")
-                vehicle = get_object_or_404(Vehicle, vehicle_id=vehicle_id)
-                purchase_price = vehicle.purchase_price if vehicle.purchase_price else 0
-                total_maintenance_cost = MaintenanceRecord.objects.filter(vehicle=vehicle).aggregate(
-                    total_cost=Sum('cost')
-                )['total_cost'] or 0
-                total_cost = purchase_price + total_maintenance_cost
-
-                return Response({
-                    "vehicle_id": vehicle_id,
-                    "purchase_price": purchase_price,
-                    "total_maintenance_cost": total_maintenance_cost,
-                    "total_cost": total_cost
-                }, status=200)
+                ledger = get_ledgers([vehicle_id]).get(vehicle_id)
+                if ledger is None:
+                    return Response({"error": "Vehicle not found"}, status=404)
+                return Response(cost_summary(ledger), status=200)
         except Exception as e:
             logger.error(f"Error in VehicleCostAPIView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
    
-class CatalogueAPIView(APIView):
+class VehiclePaymentSummaryBatchAPIView(APIView):
+    """Payment and cost summaries for ``?ids=1,2,3`` in one query."""
+    max_ids = 500
+
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
+        if not request.user.is_authenticated:
+            logger.warning("Unauthorized access attempt: No active session")
+            return Response({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            vehicle_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of vehicle IDs"}, status=400)
+        if not vehicle_ids:
+            return Response({"error": "ids is required"}, status=400)
+        if len(vehicle_ids) > self.max_ids:
+            return Response({"error": f"At most {self.max_ids} vehicle IDs per request"}, status=400)
+
+        tenant = request.tenant
+        logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
+
+        try:
+            with tenant_context(tenant):
+                ledgers = get_ledgers(vehicle_ids)
+                summaries = [
+                    {**payment_summary(ledgers[vehicle_id]), **cost_summary(ledgers[vehicle_id])}
+                    for vehicle_id in dict.fromkeys(vehicle_ids) if vehicle_id in ledgers
+                ]
+                return Response(summaries, status=200)
+        except Exception as e:
+            logger.error(f"Error in VehiclePaymentSummaryBatchAPIView: {str(e)}", exc_info=True)
+            return Response({"error": f"Server error: {str(e)}"}, status=500)
+
+
+def catalogue_response(request, etag, body):
+    """Serve a pre-rendered catalogue document, honouring If-None-Match."""
+    # Weak comparison, as for GET in RFC 9110: W/"x" matches "x"
+    client_etags = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+    if '*' in client_etags or etag in client_etags:
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
 
+class CatalogueAPIView(APIView):
+    def get(self, request):
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -950,11 +980,8 @@ class CatalogueAPIView(APIView):
         try:
             with tenant_context(tenant):
                 logger.debug(f"Fetching catalogue for tenant: {tenant.name}")
-                vehicles = Vehicle.objects.filter(inventory_status="IN")
-                for vehicle in vehicles:
-                    vehicle.refresh_from_db()
-                serializer = CatalogueSerializer(vehicles, many=True, context={"request": request})
-                return Response(serializer.data, status=200)
+                etag, body = get_catalogue(tenant.schema_name, request.build_absolute_uri('/')[:-1])
+                return catalogue_response(request, etag, body)
         except Exception as e:
             logger.error(f"Error in CatalogueAPIView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
@@ -964,12 +991,6 @@ class UpdateCatalogueAPIView(APIView):
     parser_classes = (JSONParser,)
 
     def patch(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -995,12 +1016,6 @@ class UpdateCatalogueAPIView(APIView):
             
 class CatalogueDetailAPIView(APIView):
     def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1011,7 +1026,11 @@ class CatalogueDetailAPIView(APIView):
         try:
             with tenant_context(tenant):
                 logger.debug(f"Fetching catalogue details for tenant: {tenant.name}")
-                vehicle = get_object_or_404(Vehicle, vehicle_id=vehicle_id)
+                document = get_catalogue_item(tenant.schema_name, request.build_absolute_uri('/')[:-1], vehicle_id)
+                if document is not None:
+                    return catalogue_response(request, *document)
+                # Not in inventory, so not in the snapshot
+                vehicle = get_object_or_404(Vehicle.objects.prefetch_related('images'), vehicle_id=vehicle_id)
                 serializer = CatalogueSerializer(vehicle, context={"request": request})
                 return Response(serializer.data, status=200)
         except Exception as e:
@@ -1020,11 +1039,6 @@ class CatalogueDetailAPIView(APIView):
 
 class VehicleDetailAPIView(APIView):
     def get(self, request, vehicle_id):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt")
             return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
@@ -1049,12 +1063,6 @@ class InquiryBrokerListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = InquiryBrokerSerializer
 
     def get(self, request, *args, **kwargs):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1071,12 +1079,6 @@ class InquiryBrokerListCreateAPIView(generics.ListCreateAPIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def post(self, request, *args, **kwargs):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1097,12 +1099,6 @@ class VehicleInquiryListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = VehicleInquirySerializer
 
     def get(self, request, *args, **kwargs):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1119,12 +1115,6 @@ class VehicleInquiryListCreateAPIView(generics.ListCreateAPIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def post(self, request, *args, **kwargs):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1140,14 +1130,77 @@ class VehicleInquiryListCreateAPIView(generics.ListCreateAPIView):
             logger.error(f"Error in VehicleInquiryListCreateAPIView POST: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
    
+def match_limit(request):
+    """``?limit=`` for inquiry matches, between 1 and 50."""
+    try:
+        return min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), 50)
+    except ValueError:
+        return DEFAULT_LIMIT
+
+
+class VehicleInquiryMatchesAPIView(APIView):
+    """
+    Ranked in-inventory matches for one inquiry, the criteria parsed from it,
+    and the vehicles recorded as matching it when they arrived.
+    """
+    def get(self, request, inquiry_id):
+        if not request.user.is_authenticated:
+            logger.warning("Unauthorized access attempt: No active session")
+            return Response({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            with tenant_context(request.tenant):
+                inquiry = VehicleInquiry.objects.filter(pk=inquiry_id).first()
+                if inquiry is None:
+                    return Response({"error": "Inquiry not found"}, status=404)
+                matches = match_inquiries([inquiry], match_limit(request))[inquiry.pk]
+                arrivals = InquiryMatch.objects.filter(inquiry=inquiry).order_by('-created_at', '-score')
+                return Response({
+                    "inquiry_id": inquiry.pk,
+                    "criteria": criteria_data(parse_inquiry(inquiry)),
+                    "matches": [match_data(entry, value) for value, entry in matches],
+                    "arrivals": list(arrivals.values('vehicle_id', 'score', 'created_at')[:50]),
+                }, status=200)
+        except Exception as e:
+            logger.error(f"Error in VehicleInquiryMatchesAPIView: {str(e)}", exc_info=True)
+            return Response({"error": f"Server error: {str(e)}"}, status=500)
+
+
+class VehicleInquiryMatchBatchAPIView(APIView):
+    """Ranked matches for ``?ids=1,2,3``, or for every open inquiry, matched in memory."""
+    max_ids = 500
+
+    def get(self, request):
+        if not request.user.is_authenticated:
+            logger.warning("Unauthorized access attempt: No active session")
+            return Response({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            inquiry_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of inquiry IDs"}, status=400)
+        if len(inquiry_ids) > self.max_ids:
+            return Response({"error": f"At most {self.max_ids} inquiry IDs per request"}, status=400)
+
+        try:
+            with tenant_context(request.tenant):
+                inquiries = VehicleInquiry.objects.order_by('id')
+                if inquiry_ids:
+                    inquiries = inquiries.filter(pk__in=inquiry_ids)
+                else:
+                    inquiries = inquiries.filter(status=VehicleInquiry.STATUS_OPEN)
+                matches = match_inquiries(inquiries, match_limit(request))
+                return Response([
+                    {"inquiry_id": inquiry_id, "matches": [match_data(entry, value) for value, entry in found]}
+                    for inquiry_id, found in matches.items()
+                ], status=200)
+        except Exception as e:
+            logger.error(f"Error in VehicleInquiryMatchBatchAPIView: {str(e)}", exc_info=True)
+            return Response({"error": f"Server error: {str(e)}"}, status=500)
+
+
 class ElectricityBillAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1168,12 +1221,6 @@ class ElectricityBillAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1193,12 +1240,6 @@ class ElectricityBillAPIView(APIView):
  
 class OfficeRentAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1219,12 +1260,6 @@ class OfficeRentAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1244,12 +1279,6 @@ class OfficeRentAPIView(APIView):
 
 class WifiBillAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1270,12 +1299,6 @@ class WifiBillAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1295,12 +1318,6 @@ class WifiBillAPIView(APIView):
  
 class AdditionalExpenseAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1321,12 +1338,6 @@ class AdditionalExpenseAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1346,12 +1357,6 @@ class AdditionalExpenseAPIView(APIView):
   
 class StaffAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1372,12 +1377,6 @@ class StaffAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1397,12 +1396,6 @@ class StaffAPIView(APIView):
    
 class StaffSalaryAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1424,12 +1417,6 @@ class StaffSalaryAPIView(APIView):
  
 class StaffSalaryUpdateAPIView(APIView):
     def put(self, request, pk):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1452,12 +1439,6 @@ class StaffSalaryUpdateAPIView(APIView):
 
 class StaffSalaryMonthWiseAPIView(APIView):
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1482,12 +1463,6 @@ class StaffSalaryMonthWiseAPIView(APIView):
 
 class VehicleStatisticsAPIView(APIView):
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1498,23 +1473,7 @@ class VehicleStatisticsAPIView(APIView):
         try:
             with tenant_context(tenant):
                 logger.debug(f"Fetching vehicle statistics for tenant: {tenant.name}")
-                total_vehicles = Vehicle.objects.count()
-                current_in_inventory = Vehicle.objects.filter(inventory_status='IN').count()
-                total_outbound_vehicles = OutboundVehicle.objects.count()
-                total_selling_price = OutboundVehicle.objects.aggregate(total=Sum('selling_price'))['total'] or 0
-                total_purchase_price = Vehicle.objects.aggregate(total=Sum('purchase_price'))['total'] or 0
-                total_maintenance_cost = MaintenanceRecord.objects.aggregate(total=Sum('cost'))['total'] or 0
-                final_profit = total_selling_price - (total_purchase_price + total_maintenance_cost)
-
-                data = {
-                    "total_vehicles_added": total_vehicles,
-                    "current_in_inventory": current_in_inventory,
-                    "total_outbound_vehicles": total_outbound_vehicles,
-                    "total_selling_price": total_selling_price,
-                    "total_purchase_price": total_purchase_price,
-                    "total_maintenance_cost": total_maintenance_cost,
-                    "final_profit": final_profit,
-                }
+                data = vehicle_statistics()
 
                 return Response(data, status=200)
         except Exception as e:
@@ -1523,12 +1482,6 @@ class VehicleStatisticsAPIView(APIView):
 
 class InvoiceAPIView(APIView):
     def post(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1549,12 +1502,6 @@ class InvoiceAPIView(APIView):
             return Response({"error": f"Server error: {str(e)}"}, status=500)
 
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"Session: {dict(request.session)}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
-        logger.debug(f"Cookies: {request.COOKIES}")
-        logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt: No active session")
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
@@ -1575,9 +1522,6 @@ class InvoiceAPIView(APIView):
 
 class GetOutboundVehiclesAPIView(APIView):
     def get(self, request):
-        logger.debug(f"Request headers: {request.headers}")
-        logger.debug(f"User authenticated: {request.user.is_authenticated}")
-
         if not request.user.is_authenticated:
             logger.warning("Unauthorized access attempt")
             return Response({"detail": "Authentication credentials were not provided."}, 
@@ -1610,38 +1554,16 @@ class SalesStatsAPIView(APIView):
         logger.debug(f"Tenant: {tenant.name}, ID: {tenant.id}")
 
         try:
-            with tenant_context(tenant):
-                # Inventory stats
-                total_vehicles = Vehicle.objects.count()
-                total_in_inventory = Vehicle.objects.filter(inventory_status='IN').count()
-                
-                # Outbound stats
-                outbound_vehicles = OutboundVehicle.objects.all()
-                total_outbound = outbound_vehicles.count()
-                total_sales_revenue = outbound_vehicles.aggregate(Sum('selling_price'))['selling_price__sum'] or 0
-                total_other_expenses = outbound_vehicles.aggregate(Sum('other_expense'))['other_expense__sum'] or 0
-                total_purchase_price = Vehicle.objects.aggregate(Sum('purchase_price'))['purchase_price__sum'] or 0
-                
-                # Monthly sales trend (last 12 months)
-                now = timezone.now()
-                monthly_sales = []
-                for i in range(12):
-                    start_date = now - timedelta(days=30 * (12 - i))
-                    end_date = now - timedelta(days=30 * (11 - i))
-                    monthly_total = outbound_vehicles.filter(
-                        outbound_date__range=[start_date, end_date]
-                    ).aggregate(Sum('selling_price'))['selling_price__sum'] or 0
-                    monthly_sales.append(monthly_total)
+            months = int(request.query_params.get('months', DEFAULT_MONTHS))
+        except ValueError:
+            return Response({"error": "months must be an integer."}, status=400)
+        if not 1 <= months <= MAX_MONTHS:
+            return Response({"error": f"months must be between 1 and {MAX_MONTHS}."}, status=400)
 
-                return Response({
-                    "total_vehicles": total_vehicles,
-                    "total_in_inventory": total_in_inventory,
-                    "total_outbound": total_outbound,
-                    "total_sales_revenue": total_sales_revenue,
-                    "total_other_expenses": total_other_expenses,
-                    "total_purchase_price": total_purchase_price,
-                    "monthly_sales": monthly_sales
-                }, status=200)
+        try:
+            with tenant_context(tenant):
+                # Two grouped queries however many months are requested
+                return Response(sales_stats(months), status=200)
         except Exception as e:
             logger.error(f"Error in SalesStatsAPIView: {str(e)}", exc_info=True)
             return Response({"error": f"Server error: {str(e)}"}, status=500)
\ No newline at end of file
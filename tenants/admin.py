@@ -1,3 +1,32 @@
 from django.contrib import admin
+from .models import ExportJob, ImageJob, MatchingJob, SchemaMigrationStatus
 
-# Register your models here.
\ No newline at end of file
+# Register your models here.
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'kind', 'status', 'rows_written', 'total_rows', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = [field.name for field in ExportJob._meta.fields]
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'image_id', 'status', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [field.name for field in ImageJob._meta.fields]
+
+
+@admin.register(MatchingJob)
+class MatchingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'status', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [field.name for field in MatchingJob._meta.fields]
+
+
+@admin.register(SchemaMigrationStatus)
+class SchemaMigrationStatusAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'status', 'seconds', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [field.name for field in SchemaMigrationStatus._meta.fields]
@@ -0,0 +1,159 @@
+# tenants/cache.py
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django_tenants.utils import get_tenant_model, get_tenant_domain_model, get_public_schema_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TenantResolutionCache:
+    """
+    Two-layer cache for hostname/schema -> tenant resolution.
+
+    A per-process LRU sits in front of Django's cache framework. Shared keys are
+    namespaced by a generation token; saving or deleting a Client or Domain
+    replaces the token, so every process drops its stale entries within
+    TENANT_CACHE_LOCAL_TTL seconds and the shared layer is invalidated at once.
+    """
+    GENERATION_KEY = 'tenants:resolve:generation'
+
+    def __init__(self):
+        self.max_entries = getattr(settings, 'TENANT_CACHE_MAX_ENTRIES', 512)
+        self.ttl = getattr(settings, 'TENANT_CACHE_TTL', 300)
+        self.local_ttl = getattr(settings, 'TENANT_CACHE_LOCAL_TTL', 30)
+        self._local = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked_at = 0.0
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _current_generation(self):
+        now = time.monotonic()
+        if self._generation is not None and now - self._generation_checked_at < self.local_ttl:
+            return self._generation
+
+        generation = cache.get(self.GENERATION_KEY)
+        if generation is None:
+            cache.add(self.GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = cache.get(self.GENERATION_KEY)
+
+        with self._lock:
+            if generation != self._generation:
+                self._local.clear()
+            self._generation = generation
+            self._generation_checked_at = now
+        return generation
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, kind, value, loader):
+        """
+        Return the cached result of ``loader()`` for ``(kind, value)``. ``None``
+        results are cached too, so unknown hostnames do not hit the database
+        on every request. Model instances are copied before being returned
+        because callers annotate them (e.g. ``tenant.domain_url``).
+        """
+        generation = self._current_generation()
+        key = f"{kind}:{value}"
+
+        result = self._get_local(key)
+        if result is not _MISSING:
+            self.local_hits += 1
+            return copy.copy(result)
+
+        shared_key = f"tenants:resolve:{generation}:{key}"
+        wrapped = cache.get(shared_key, _MISSING)
+        if wrapped is not _MISSING:
+            self.shared_hits += 1
+            result = wrapped[0]
+        else:
+            self.misses += 1
+            result = loader()
+            cache.set(shared_key, (result,), self.ttl)
+
+        self._set_local(key, result)
+        return copy.copy(result)
+
+    def invalidate(self):
+        with self._lock:
+            self._local.clear()
+            self._generation = None
+        cache.set(self.GENERATION_KEY, uuid.uuid4().hex, None)
+        logger.debug("Tenant resolution cache invalidated")
+
+    def stats(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else None,
+            'local_entries': len(self._local),
+        }
+
+    # Resolution helpers used by the tenant middleware
+
+    def get_tenant_for_domain(self, hostname):
+        def load():
+            domain = (get_tenant_domain_model().objects
+                      .select_related('tenant').filter(domain=hostname).first())
+            return domain.tenant if domain else None
+        return self.get('domain', hostname, load)
+
+    def get_tenant_for_schema(self, schema_name):
+        def load():
+            return get_tenant_model().objects.filter(schema_name=schema_name).first()
+        return self.get('schema', schema_name, load)
+
+    def get_domain_for_schema(self, schema_name):
+        def load():
+            return (get_tenant_domain_model().objects
+                    .filter(tenant__schema_name=schema_name)
+                    .order_by('-is_primary', 'id')
+                    .values_list('domain', flat=True)
+                    .first())
+        return self.get('schema-domain', schema_name, load)
+
+
+tenant_cache = TenantResolutionCache()
+
+
+def get_public_tenant():
+    """
+    Process-wide accessor for the public tenant. Loaded lazily on first use
+    and refreshed whenever a Client or Domain row changes. Returns None if
+    the public tenant has not been created yet.
+    """
+    return tenant_cache.get_tenant_for_schema(get_public_schema_name())
+
+
+def get_public_domain():
+    """Primary domain of the public tenant, or None if it has none."""
+    return tenant_cache.get_domain_for_schema(get_public_schema_name())
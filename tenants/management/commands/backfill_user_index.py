@@ -0,0 +1,49 @@
+# tenants/management/commands/backfill_user_index.py
+import logging
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django_tenants.utils import tenant_context, get_public_schema_name
+from tenants.models import Client
+from accounts.models import UserTenantIndex
+from accounts.user_index import index_users
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Backfill the username -> tenant login index from existing tenant schemas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', help='Only backfill this tenant schema')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete index rows whose user no longer exists in the tenant')
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant with schema "{options["schema"]}" does not exist'))
+                return
+
+        total = 0
+        for tenant in tenants:
+            with tenant_context(tenant):
+                users = list(User.objects.filter(tenant=tenant).only('id', 'username', 'email', 'tenant'))
+                written = index_users(users)
+
+                pruned = 0
+                if options['prune']:
+                    pruned, _ = (UserTenantIndex.objects.filter(tenant=tenant)
+                                 .exclude(user_id__in=[user.pk for user in users])
+                                 .delete())
+
+            total += written
+            self.stdout.write(self.style.SUCCESS(
+                f'Indexed {written} user(s) for tenant "{tenant.name}"'
+                + (f', pruned {pruned} stale row(s)' if pruned else '')
+            ))
+            logger.debug(f"Backfilled {written} index rows for schema {tenant.schema_name}")
+
+        self.stdout.write(self.style.SUCCESS(f'Login index backfill complete - {total} user(s) indexed'))
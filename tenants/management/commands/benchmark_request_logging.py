@@ -0,0 +1,96 @@
+# tenants/management/commands/benchmark_request_logging.py
+import logging
+import os
+import time
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from dealership.request_log import JSONFormatter, RequestContextFilter, RequestLogMiddleware
+from dealership.request_log import logger as request_logger
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = ('Measure the per-request cost of request logging: the old per-view header, session and cookie '
+            'dumps against RequestLogMiddleware when off, sampled out, and logging')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests per mode')
+
+    def make_request(self, session_key):
+        request = RequestFactory().get('/dealership/api/vehicles/', HTTP_AUTHORIZATION='Bearer benchmark',
+                                       HTTP_COOKIE=f'sessionid={session_key}; csrftoken=benchmark')
+        request.session = SessionStore(session_key)
+        return request
+
+    def run(self, handler, session_key, count):
+        requests = [self.make_request(session_key) for _ in range(count)]
+        started = time.perf_counter()
+        for request in requests:
+            handler(request)
+        return (time.perf_counter() - started) / count * 1e6
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        session = SessionStore()
+        session['tenant_domain'] = 'benchmark.localhost'
+        session.create()
+        view_logger = logging.getLogger('dealership.views')
+
+        def view(request):
+            return HttpResponse('ok')
+
+        def view_with_dumps(request):
+            # What every dealership view did before RequestLogMiddleware
+            view_logger.debug(f"Request headers: {request.headers}")
+            view_logger.debug(f"Session: {dict(request.session)}")
+            view_logger.debug(f"User authenticated: {request.user.is_authenticated}, User: {request.user}")
+            view_logger.debug(f"Cookies: {request.COOKIES}")
+            view_logger.debug(f"Session ID from cookies: {request.COOKIES.get('sessionid')}")
+            return view(request)
+
+        def with_user(handler):
+            def wrapped(request):
+                request.user = AnonymousUser()
+                return handler(request)
+            return wrapped
+
+        saved = (request_logger.level, request_logger.handlers, request_logger.propagate, view_logger.level)
+        devnull = open(os.devnull, 'w')
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(JSONFormatter())
+        handler.addFilter(RequestContextFilter())
+        request_logger.handlers, request_logger.propagate = [handler], False
+        view_logger.setLevel(logging.INFO)
+
+        def middleware(level, sample_rate):
+            request_logger.setLevel(level)
+            instance = RequestLogMiddleware(view)
+            instance.sample_rate = sample_rate
+            return instance
+
+        try:
+            modes = [
+                ('No logging', lambda: view),
+                ('Per-view dumps, DEBUG off', lambda: with_user(view_with_dumps)),
+                ('Middleware, logger off', lambda: middleware(logging.WARNING, 1.0)),
+                ('Middleware, sampled out', lambda: middleware(logging.INFO, 0.0)),
+                ('Middleware, logged', lambda: middleware(logging.INFO, 1.0)),
+                ('Middleware, logged with details', lambda: middleware(logging.DEBUG, 1.0)),
+            ]
+            baseline = None
+            for label, make_handler in modes:
+                micros = self.run(make_handler(), session.session_key, count)
+                baseline = micros if baseline is None else baseline
+                self.stdout.write(f'{label:<34} {micros:8.1f} us/request  (+{micros - baseline:.1f} us)')
+        finally:
+            request_logger.setLevel(saved[0])
+            request_logger.handlers, request_logger.propagate = saved[1], saved[2]
+            view_logger.setLevel(saved[3])
+            devnull.close()
+            session.delete()
+
+        logger.debug(f"Benchmarked request logging over {count} request(s) per mode")
+        self.stdout.write(self.style.SUCCESS('Request logging benchmark complete'))
@@ -0,0 +1,45 @@
+# tenants/management/commands/bulk_create_tenant_users.py
+import json
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from tenants.models import Client
+from accounts.bulk_users import BulkUserFileError, provision_users, read_user_rows
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Create many users for a tenant from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file with username, email and password columns, '
+                                         'plus optional first_name, last_name, is_tenant_admin, groups and '
+                                         'permissions (";"-separated in CSV)')
+        parser.add_argument('--schema', required=True, help='Tenant schema name')
+        parser.add_argument('--processes', type=int, help='Password hashing processes (default: CPU count)')
+        parser.add_argument('--report', help='Write the full JSON report to this file')
+
+    def handle(self, *args, **options):
+        tenant = Client.objects.filter(schema_name=options['schema']).first()
+        if tenant is None:
+            raise CommandError(f'Tenant with schema "{options["schema"]}" does not exist')
+
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                rows = read_user_rows(fileobj, options['path'])
+        except (OSError, BulkUserFileError) as e:
+            raise CommandError(str(e))
+
+        report = provision_users(tenant, rows, processes=options['processes'])
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f'Row {error["row"]}: {json.dumps(error["errors"])}'))
+        if report['failed'] > 20:
+            self.stdout.write(self.style.WARNING(f'... and {report["failed"] - 20} more row(s) with errors'))
+        if options['report']:
+            with open(options['report'], 'w') as fileobj:
+                json.dump(report, fileobj, indent=2)
+        logger.debug(f"Bulk user report for {tenant.schema_name}: {report['created']} created, {report['failed']} failed")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {report["created"]} of {report["rows"]} user(s) for tenant "{tenant.name}" '
+            f'in {report["seconds"]}s'
+        ))
@@ -1,6 +1,7 @@
 # tenants/management/commands/create_public_tenant.py
 from django.core.management.base import BaseCommand
 from tenants.models import Client, Domain
+from tenants.cache import get_public_tenant
 import os
 
 class Command(BaseCommand):
@@ -28,13 +29,14 @@ class Command(BaseCommand):
             domain_name = 'localhost:8000'
         
         # Create public tenant if it doesn't exist
-        public_tenant, created = Client.objects.get_or_create(
-            schema_name='public',
-            defaults={
-                'name': 'Public Site',
-                'is_active': True
-            }
-        )
+        public_tenant = get_public_tenant()
+        created = public_tenant is None
+        if created:
+            public_tenant = Client.objects.create(
+                schema_name='public',
+                name='Public Site',
+                is_active=True
+            )
         
         # Create or get public domain - FIXED: Handle existing domains properly
         try:
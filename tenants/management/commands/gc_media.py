@@ -0,0 +1,41 @@
+# tenants/management/commands/gc_media.py
+import logging
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django_tenants.utils import tenant_context, get_public_schema_name
+from tenants.models import Client
+from dealership.media import collect_garbage
+from dealership.uploads import expire_upload_sessions
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = ('Delete content-addressed media files that no vehicle record references any more, '
+            'and upload sessions left open past UPLOAD_SESSION_TTL_SECONDS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', help='Only collect this tenant schema')
+        parser.add_argument('--grace-seconds', type=int,
+                            help='Keep files written this recently (default: MEDIA_GC_GRACE_SECONDS)')
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant with schema "{options["schema"]}" does not exist'))
+                return
+
+        grace = timedelta(seconds=options['grace_seconds']) if options['grace_seconds'] is not None else None
+        total = 0
+        for tenant in tenants:
+            with tenant_context(tenant):
+                expired = expire_upload_sessions()
+                removed = collect_garbage(grace=grace)
+            if expired:
+                self.stdout.write(f'Removed {expired} expired upload session(s) for tenant "{tenant.name}"')
+            total += removed
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} unreferenced file(s) for tenant "{tenant.name}"'))
+            logger.debug(f"Media garbage collection removed {removed} file(s) in {tenant.schema_name}")
+
+        self.stdout.write(self.style.SUCCESS(f'Media garbage collection complete - {total} file(s) removed'))
@@ -0,0 +1,60 @@
+# tenants/management/commands/import_vehicles.py
+import json
+import logging
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import tenant_context
+from tenants.models import Client
+from dealership.imports import DEFAULT_CHUNK_SIZE, ImportFileError, import_vehicles
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Bulk-import vehicles into a tenant's inventory from a CSV or XLSX file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file whose header row names Vehicle fields')
+        parser.add_argument('--schema', required=True, help='Tenant schema to import into')
+        parser.add_argument('--added-by', help='Username recorded as the creator of the vehicles')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Rows validated and inserted per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+        parser.add_argument('--report', help='Write the full JSON report to this file')
+
+    def handle(self, *args, **options):
+        tenant = Client.objects.filter(schema_name=options['schema']).first()
+        if tenant is None:
+            raise CommandError(f'Tenant with schema "{options["schema"]}" does not exist')
+
+        added_by_id = None
+        if options['added_by']:
+            added_by_id = User.objects.filter(username=options['added_by']).values_list('pk', flat=True).first()
+            if added_by_id is None:
+                raise CommandError(f'User "{options["added_by"]}" does not exist')
+
+        try:
+            with open(options['path'], 'rb') as fileobj, tenant_context(tenant):
+                report = import_vehicles(
+                    fileobj, options['path'], added_by_id=added_by_id,
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f'Row {error["row"]}: {json.dumps(error["errors"])}'))
+        if report['failed'] > 20:
+            self.stdout.write(self.style.WARNING(f'... and {report["failed"] - 20} more row(s) with errors'))
+
+        if options['report']:
+            with open(options['report'], 'w') as fileobj:
+                json.dump(report, fileobj, indent=2, default=str)
+
+        verb = 'Validated' if report['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report["valid"]} of {report["rows"]} row(s) for tenant "{tenant.name}" '
+            f'({report["failed"]} failed) in {report["seconds"]}s, {report["rows_per_second"]} rows/s'
+        ))
+        logger.debug(f"Vehicle import into {tenant.schema_name}: {report['created']} created")
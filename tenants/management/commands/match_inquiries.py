@@ -0,0 +1,39 @@
+# tenants/management/commands/match_inquiries.py
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django_tenants.utils import tenant_context, get_public_schema_name
+from tenants.models import Client
+from dealership.matching import DEFAULT_LIMIT, match_new_vehicles
+from dealership.models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Match every open vehicle inquiry against the whole inventory and record the best matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', help='Only match this tenant schema')
+        parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                            help='Matches to record per inquiry')
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant with schema "{options["schema"]}" does not exist'))
+                return
+
+        for tenant in tenants:
+            started = time.monotonic()
+            with tenant_context(tenant):
+                vehicle_ids = Vehicle.objects.filter(inventory_status='IN').values_list('vehicle_id', flat=True)
+                recorded = match_new_vehicles(list(vehicle_ids), limit=options['limit'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Recorded {recorded} inquiry match(es) for tenant "{tenant.name}" '
+                f'in {time.monotonic() - started:.2f}s'
+            ))
+            logger.debug(f"Matched inquiries for schema {tenant.schema_name}")
+
+        self.stdout.write(self.style.SUCCESS('Inquiry matching complete'))
@@ -0,0 +1,75 @@
+# tenants/management/commands/migrate_tenants_parallel.py
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from tenants.models import SchemaMigrationStatus
+from tenants.schema_migrations import migrate_schema, migration_target, pending_schemas, record_failure
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = ('Migrate the public schema, then every tenant schema in a pool of worker processes. '
+            'Schemas already migrated to the current migrations are skipped, so a failed run resumes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                            help='Number of schemas migrated at once')
+        parser.add_argument('--schema', action='append', help='Only migrate this tenant schema (repeatable)')
+        parser.add_argument('--force', action='store_true',
+                            help='Migrate schemas even if they are recorded as up to date')
+        parser.add_argument('--skip-shared', action='store_true', help='Do not migrate the public schema first')
+
+    def report(self, schema_name, status, seconds, error):
+        if status == SchemaMigrationStatus.STATUS_DONE:
+            self.stdout.write(f'Migrated "{schema_name}" in {seconds}s')
+        else:
+            self.stdout.write(self.style.ERROR(f'Failed "{schema_name}" after {seconds}s: {error}'))
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if not options['skip_shared']:
+            call_command('migrate_schemas', shared=True, interactive=False, verbosity=0)
+            self.stdout.write(f'Migrated the public schema in {time.monotonic() - started:.1f}s')
+
+        target = migration_target()
+        schemas = pending_schemas(target, only=options['schema'], force=options['force'])
+        processes = max(1, min(options['processes'], len(schemas)))
+        self.stdout.write(f'{len(schemas)} tenant schema(s) to migrate with {processes} process(es)')
+
+        results = []
+        if processes == 1:
+            for schema_name in schemas:
+                results.append(migrate_schema(schema_name, target))
+                self.report(*results[-1])
+        elif schemas:
+            # Spawned (not forked) children open their own database connections
+            pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+            with pool:
+                futures = {pool.submit(migrate_schema, schema_name, target): schema_name for schema_name in schemas}
+                for future in as_completed(futures):
+                    schema_name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The child died before it could record the failure itself
+                        record_failure(schema_name, str(e))
+                        result = (schema_name, SchemaMigrationStatus.STATUS_FAILED, None, str(e))
+                    results.append(result)
+                    self.report(*result)
+
+        failed = [result[0] for result in results if result[1] != SchemaMigrationStatus.STATUS_DONE]
+        elapsed = time.monotonic() - started
+        logger.debug(f"Migrated {len(results) - len(failed)} of {len(results)} schema(s) in {elapsed:.1f}s")
+        if failed:
+            raise CommandError(f'{len(failed)} schema(s) failed to migrate: {", ".join(failed)}. '
+                               f'Run the command again to retry them.')
+        self.stdout.write(self.style.SUCCESS(f'Migrated {len(results)} tenant schema(s) in {elapsed:.1f}s'))
@@ -0,0 +1,57 @@
+# tenants/management/commands/provision_tenants.py
+import csv
+import json
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from tenants.provisioning import ensure_template_schema, provision_tenants, template_schema
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Create tenants in bulk by cloning the pre-migrated template schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?',
+                            help='CSV with schema_name,name,domain[,description] columns, or a JSON list of objects')
+        parser.add_argument('--schema_name', help='Schema name of a single tenant to create instead of a file')
+        parser.add_argument('--name', help='Tenant name (with --schema_name)')
+        parser.add_argument('--domain', help='Primary domain (with --schema_name)')
+        parser.add_argument('--refresh-template', action='store_true',
+                            help='Only create or migrate the template schema')
+
+    def load_specs(self, path):
+        try:
+            with open(path, newline='') as fileobj:
+                if path.lower().endswith('.json'):
+                    specs = json.load(fileobj)
+                else:
+                    specs = list(csv.DictReader(fileobj))
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+        if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+            raise CommandError('Expected a list of tenant objects')
+        return specs
+
+    def handle(self, *args, **options):
+        if options['refresh_template']:
+            changed = ensure_template_schema()
+            state = 'migrated' if changed else 'already up to date'
+            self.stdout.write(self.style.SUCCESS(f'Template schema "{template_schema()}" {state}'))
+            return
+        if options['schema_name']:
+            specs = [{key: options[key] for key in ('schema_name', 'name', 'domain')}]
+        elif options['path']:
+            specs = self.load_specs(options['path'])
+        else:
+            raise CommandError('Give a CSV or JSON file of tenants, or --schema_name, --name and --domain')
+
+        results = provision_tenants(specs)
+        created = [result for result in results if result['status'] == 'created']
+        for result in results:
+            if result['status'] == 'created':
+                self.stdout.write(f'Created "{result["schema_name"]}" in {result["seconds"]}s')
+            else:
+                self.stdout.write(self.style.WARNING(f'Skipped "{result["schema_name"]}": {result["error"]}'))
+        logger.debug(f"Provisioned {len(created)} of {len(results)} tenant(s)")
+
+        self.stdout.write(self.style.SUCCESS(f'Provisioned {len(created)} of {len(results)} tenant(s)'))
@@ -0,0 +1,35 @@
+# tenants/management/commands/rebuild_rollups.py
+import logging
+from django.core.management.base import BaseCommand
+from django_tenants.utils import tenant_context, get_public_schema_name
+from tenants.models import Client
+from dealership.ledger import refresh_ledgers
+from dealership.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard financial rollups and per-vehicle ledgers from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', help='Only rebuild this tenant schema')
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant with schema "{options["schema"]}" does not exist'))
+                return
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                rollup = rebuild_rollups()
+                ledgers = refresh_ledgers()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt rollups for tenant "{tenant.name}": {rollup.vehicles_total} vehicle(s), '
+                f'{rollup.outbound_total} sale(s), {ledgers} ledger(s)'
+            ))
+            logger.debug(f"Rebuilt rollups for schema {tenant.schema_name}")
+
+        self.stdout.write(self.style.SUCCESS('Rollup rebuild complete'))
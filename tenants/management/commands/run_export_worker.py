@@ -0,0 +1,12 @@
+# tenants/management/commands/run_export_worker.py
+from dealership.exports import run_export_job
+from tenants.models import ExportJob
+from tenants.workers import JobWorkerCommand
+
+
+class Command(JobWorkerCommand):
+    help = 'Process queued export jobs for all tenants in a pool of worker processes'
+    job_model = ExportJob
+    label = 'export'
+    run_job = staticmethod(run_export_job)
+    requeue_reset = {'rows_written': 0}
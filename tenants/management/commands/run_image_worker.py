@@ -0,0 +1,39 @@
+# tenants/management/commands/run_image_worker.py
+from django_tenants.utils import tenant_context, get_public_schema_name
+from dealership.images import run_image_job
+from dealership.models import VehicleImage
+from tenants.models import Client, ImageJob
+from tenants.workers import JobWorkerCommand
+
+
+class Command(JobWorkerCommand):
+    help = 'Render thumbnail and medium variants of uploaded vehicle images in a pool of worker processes'
+    job_model = ImageJob
+    label = 'image'
+    run_job = staticmethod(run_image_job)
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--enqueue-missing', action='store_true',
+                            help='First queue every image that has no variants and no pending job')
+
+    def enqueue_missing(self):
+        queued = 0
+        for tenant in Client.objects.exclude(schema_name=get_public_schema_name()):
+            pending = set(ImageJob.objects
+                          .filter(tenant=tenant, status__in=[ImageJob.STATUS_QUEUED, ImageJob.STATUS_RUNNING])
+                          .values_list('image_id', flat=True))
+            with tenant_context(tenant):
+                image_ids = (VehicleImage.objects
+                             .filter(processed_at__isnull=True)
+                             .exclude(image='').exclude(image__isnull=True)
+                             .values_list('pk', flat=True))
+                jobs = [ImageJob(tenant=tenant, image_id=image_id) for image_id in image_ids if image_id not in pending]
+            ImageJob.objects.bulk_create(jobs, batch_size=1000)
+            queued += len(jobs)
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} image(s) without variants'))
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            self.enqueue_missing()
+        super().handle(*args, **options)
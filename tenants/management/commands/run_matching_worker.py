@@ -0,0 +1,11 @@
+# tenants/management/commands/run_matching_worker.py
+from dealership.matching import run_matching_job
+from tenants.models import MatchingJob
+from tenants.workers import JobWorkerCommand
+
+
+class Command(JobWorkerCommand):
+    help = 'Match newly arrived vehicles to open inquiries in a pool of worker processes'
+    job_model = MatchingJob
+    label = 'matching'
+    run_job = staticmethod(run_matching_job)
@@ -1,6 +1,7 @@
 # tenants/middleware.py
 from django.http import HttpResponseForbidden
 from django_tenants.utils import get_tenant_model, get_tenant_domain_model, get_public_schema_name
+from .cache import tenant_cache, get_public_tenant
 import logging
 import os
 
@@ -11,10 +12,8 @@ class SimpleTenantMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        tenant_model = get_tenant_model()
-        try:
-            public_tenant = tenant_model.objects.get(schema_name=get_public_schema_name())
-        except tenant_model.DoesNotExist:
+        public_tenant = get_public_tenant()
+        if public_tenant is None:
             logger.error("Public tenant does not exist")
             return HttpResponseForbidden("Public tenant not found")
 
@@ -23,11 +22,11 @@ class SimpleTenantMiddleware:
             return self.get_response(request)
 
         hostname = request.get_host().split(':')[0]
-        try:
-            domain = get_tenant_domain_model().objects.get(domain=hostname)
-            request.tenant = domain.tenant
+        tenant = tenant_cache.get_tenant_for_domain(hostname)
+        if tenant is not None:
+            request.tenant = tenant
             logger.debug(f"Set tenant: {request.tenant.name}, ID: {request.tenant.id}")
-        except get_tenant_domain_model().DoesNotExist:
+        else:
             logger.warning(f"No tenant found for hostname: {hostname}")
             request.tenant = public_tenant
 
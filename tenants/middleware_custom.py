@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.db import connection
 from django_tenants.middleware import TenantMainMiddleware
 from django_tenants.utils import remove_www
 from django_tenants.utils import get_tenant_model, get_tenant_domain_model
+from .cache import tenant_cache, get_public_tenant, get_public_domain
 import logging
 import os
 
@@ -9,7 +12,7 @@ logger = logging.getLogger(__name__)
 class HeaderTenantMiddleware(TenantMainMiddleware):
     """
     Custom middleware that supports both header-based and subdomain-based tenant identification.
-    Priority: HTTP Header > Session > Subdomain > Public tenant
+    Priority: Tenant-scoped JWT > HTTP Header > Session > Subdomain > Public tenant
     """
     
     @staticmethod
@@ -37,13 +40,10 @@ class HeaderTenantMiddleware(TenantMainMiddleware):
         if hasattr(request, 'session') and 'tenant_schema' in request.session:
             tenant_schema = request.session['tenant_schema']
             try:
-                tenant_model = get_tenant_model()
-                tenant = tenant_model.objects.get(schema_name=tenant_schema)
-                domain_model = get_tenant_domain_model()
-                domain = domain_model.objects.filter(tenant=tenant).first()
+                domain = tenant_cache.get_domain_for_schema(tenant_schema)
                 if domain:
-                    logger.debug(f"Tenant identified via session schema: {domain.domain}")
-                    return domain.domain
+                    logger.debug(f"Tenant identified via session schema: {domain}")
+                    return domain
             except Exception as e:
                 logger.warning(f"Failed to resolve tenant from session schema: {e}")
         
@@ -55,13 +55,10 @@ class HeaderTenantMiddleware(TenantMainMiddleware):
         
         # Strategy 5: Default to public tenant domain
         try:
-            tenant_model = get_tenant_model()
-            public_tenant = tenant_model.objects.get(schema_name='public')
-            domain_model = get_tenant_domain_model()
-            public_domain = domain_model.objects.filter(tenant=public_tenant).first()
+            public_domain = get_public_domain()
             if public_domain:
-                logger.debug(f"Defaulting to public domain: {public_domain.domain}")
-                return public_domain.domain
+                logger.debug(f"Defaulting to public domain: {public_domain}")
+                return public_domain
         except Exception as e:
             logger.error(f"Failed to get public tenant domain: {e}")
         
@@ -69,19 +66,63 @@ class HeaderTenantMiddleware(TenantMainMiddleware):
         logger.debug(f"Final fallback to hostname: {hostname}")
         return hostname
 
+    def get_tenant(self, domain_model, hostname):
+        """
+        Resolve the tenant through the shared resolution cache instead of
+        querying the domain table on every request.
+        """
+        tenant = tenant_cache.get_tenant_for_domain(hostname)
+        if tenant is None:
+            raise domain_model.DoesNotExist(f'No domain matches "{hostname}"')
+        return tenant
+
+    @staticmethod
+    def tenant_from_token(request):
+        """
+        Resolve the tenant from the schema claim of a tenant-scoped bearer
+        token. The verified token is kept on the request so the DRF
+        authentication class does not decode it a second time.
+        """
+        from accounts.tokens import TenantAccessToken, TENANT_SCHEMA_CLAIM
+        from rest_framework_simplejwt.exceptions import TokenError
+
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        parts = header.split()
+        if len(parts) != 2 or parts[0] != 'Bearer':
+            return None
+        try:
+            token = TenantAccessToken(parts[1])
+        except TokenError:
+            return None  # Left for the authentication class to reject
+        schema_name = token.get(TENANT_SCHEMA_CLAIM)
+        if not schema_name:
+            return None
+
+        request.validated_jwt = (parts[1], token)
+        return tenant_cache.get_tenant_for_schema(schema_name)
+
     def process_request(self, request):
         """
         Override to add additional logging and error handling
         """
         try:
+            if getattr(settings, 'TENANT_JWT_RESOLUTION', False):
+                connection.set_schema_to_public()
+                tenant = self.tenant_from_token(request)
+                if tenant is not None:
+                    logger.debug(f"Tenant identified via token: {tenant.schema_name}")
+                    tenant.domain_url = remove_www(request.get_host().split(':')[0])
+                    request.tenant = tenant
+                    connection.set_tenant(request.tenant)
+                    self.setup_url_routing(request)
+                    return None
             return super().process_request(request)
         except Exception as e:
             logger.error(f"Error in HeaderTenantMiddleware: {str(e)}")
             # Set public tenant as fallback
-            tenant_model = get_tenant_model()
-            try:
-                request.tenant = tenant_model.objects.get(schema_name='public')
-            except tenant_model.DoesNotExist:
+            public_tenant = get_public_tenant()
+            if public_tenant is None:
                 logger.critical("Public tenant not found - application cannot function")
-                raise
+                raise get_tenant_model().DoesNotExist("Public tenant not found")
+            request.tenant = public_tenant
             return None
\ No newline at end of file
@@ -0,0 +1,14 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Installed once in the public schema, which is on every tenant's search_path
+
+    dependencies = [
+        ('tenants', '0003_imagejob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0004_pg_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchemaMigrationStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('target', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('seconds', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'schema migration statuses',
+                'ordering': ['schema_name'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0005_schemamigrationstatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingJournal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
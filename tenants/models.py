@@ -1,3 +1,5 @@
+import uuid
+from django.conf import settings
 from django.db import models
 from django_tenants.models import TenantMixin, DomainMixin
 
@@ -16,4 +18,163 @@ class Client(TenantMixin):
 
 class Domain(DomainMixin):
     def __str__(self):
-        return self.domain
\ No newline at end of file
+        return self.domain
+
+
+def export_upload_to(instance, filename):
+    return f"exports/{instance.tenant.schema_name}/{uuid.uuid4().hex}/{filename}"
+
+
+class ExportJob(models.Model):
+    """
+    A background Excel export. Lives in the public schema so a single worker
+    (manage.py run_export_worker) can claim jobs for every tenant; the rows
+    themselves are read inside the job's tenant schema.
+    """
+    KIND_CHOICES = [
+        ('inventory', 'Vehicle Inventory'),
+        ('maintenance', 'Maintenance Records'),
+        ('payments', 'Payments'),
+        ('outbound', 'Outbound Sales'),
+    ]
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    tenant = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='export_jobs')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    file = models.FileField(upload_to=export_upload_to, blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.total_rows))
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.tenant.schema_name}, {self.status})"
+
+
+class ImageJob(models.Model):
+    """
+    Rendering of the size variants of one VehicleImage, queued in the public
+    schema for manage.py run_image_worker like ExportJob. ``image_id`` is
+    the VehicleImage pk inside the tenant's schema.
+    """
+    STATUS_QUEUED = ExportJob.STATUS_QUEUED
+    STATUS_RUNNING = ExportJob.STATUS_RUNNING
+    STATUS_DONE = ExportJob.STATUS_DONE
+    STATUS_FAILED = ExportJob.STATUS_FAILED
+    STATUS_CHOICES = ExportJob.STATUS_CHOICES
+
+    tenant = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='image_jobs')
+    image_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Image job #{self.pk} ({self.tenant.schema_name}, image {self.image_id}, {self.status})"
+
+
+class MatchingJob(models.Model):
+    """
+    Matching of newly arrived vehicles to the open inquiries of one tenant
+    (dealership.matching.match_new_vehicles), queued in the public schema
+    for manage.py run_matching_worker. ``vehicle_ids`` are Vehicle pks
+    inside the tenant's schema.
+    """
+    STATUS_QUEUED = ExportJob.STATUS_QUEUED
+    STATUS_RUNNING = ExportJob.STATUS_RUNNING
+    STATUS_DONE = ExportJob.STATUS_DONE
+    STATUS_FAILED = ExportJob.STATUS_FAILED
+    STATUS_CHOICES = ExportJob.STATUS_CHOICES
+
+    tenant = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='matching_jobs')
+    vehicle_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Matching job #{self.pk} ({self.tenant.schema_name}, {len(self.vehicle_ids)} vehicle(s), {self.status})"
+
+
+class SchemaMigrationStatus(models.Model):
+    """
+    Outcome of the last migrate_tenants_parallel run for one schema.
+    ``target`` identifies the set of tenant migrations the run applied, so
+    a schema marked done for the current target is skipped on the next run.
+    """
+    STATUS_RUNNING = ExportJob.STATUS_RUNNING
+    STATUS_DONE = ExportJob.STATUS_DONE
+    STATUS_FAILED = ExportJob.STATUS_FAILED
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    schema_name = models.CharField(max_length=63, unique=True)
+    target = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['schema_name']
+        verbose_name_plural = 'schema migration statuses'
+
+    def __str__(self):
+        return f"{self.schema_name}: {self.status}"
+
+
+class MatchingJournal(models.Model):
+    """
+    Last reserved position of one schema's inventory change journal (see
+    dealership.matching). Writers reserve positions here, under a row lock,
+    so concurrent writes never share a journal entry.
+    """
+    schema_name = models.CharField(max_length=63, unique=True)
+    position = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.schema_name}: {self.position}"
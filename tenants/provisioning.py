@@ -0,0 +1,170 @@
+# tenants/provisioning.py
+"""
+Tenant provisioning by cloning a template schema.
+
+Running every tenant migration for each new dealership is slow, and it gets
+slower as migrations accumulate. Instead, TENANT_TEMPLATE_SCHEMA holds an
+empty, fully migrated copy of the tenant tables. A new tenant's schema is
+cloned from it with django-tenants' clone_schema() SQL function. The clone
+copies the template's django_migrations rows too, so the new schema is
+already up to date with nothing faked or replayed.
+
+The template is not a Client, so migrate_schemas skips it. The deploy
+creates it and brings it up to date with ensure_template_schema() (manage.py
+provision_tenants --refresh-template), as does the provision_tenants command
+before each batch. The provisioning API never migrates it: migrations in a
+request would hold the template lock and outlast the request timeout, so
+the API refuses to provision while template_is_current() is False. Nothing
+else may write to the template, because every row in it is copied into each
+new tenant.
+"""
+import re
+import time
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django_tenants.clone import CloneSchema
+from django_tenants.models import TenantMixin
+from django_tenants.signals import post_schema_sync
+from django_tenants.utils import schema_context, schema_exists, get_public_schema_name
+from .models import Client, Domain
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Stricter than django-tenants' check: clone_schema() fails on names that need quoting
+SCHEMA_NAME_RE = re.compile(r'^(?!pg_)[a-z][a-z0-9_]{0,62}$')
+
+
+class ProvisioningError(Exception):
+    """The tenant cannot be provisioned as requested."""
+
+
+def template_schema():
+    return getattr(settings, 'TENANT_TEMPLATE_SCHEMA', 'tenant_template')
+
+
+def _template_lock(cursor, shared=False):
+    # Cloning holds a shared lock, so it never copies a half-migrated template
+    function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    cursor.execute(f"SELECT {function}(hashtext(%s))", [template_schema()])
+
+
+def template_is_current():
+    """True if the template schema exists and has every tenant migration applied."""
+    if not schema_exists(template_schema()):
+        return False
+    with schema_context(template_schema()):
+        executor = MigrationExecutor(connection)
+        return not executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def ensure_template_schema():
+    """
+    Create the template schema if it is missing and apply any pending tenant
+    migrations to it. Returns True if the template was changed.
+    """
+    template = template_schema()
+    connection.set_schema_to_public()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regproc('public.clone_schema') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            CloneSchema()._create_clone_schema_function()
+
+    if template_is_current():
+        return False
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            _template_lock(cursor)
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{template}"')
+        call_command('migrate_schemas', tenant=True, schema_name=template, interactive=False, verbosity=0)
+    connection.set_schema_to_public()
+    logger.info(f"Migrated tenant template schema {template}")
+    return True
+
+
+def _copy_triggers(cursor, template, schema_name):
+    """
+    Re-create the template's triggers in the clone. clone_schema() points
+    cloned triggers at the template's functions and drops their column lists.
+    """
+    cursor.execute(
+        "SELECT t.tgname, c.relname, pg_get_triggerdef(t.oid) FROM pg_trigger t "
+        "JOIN pg_class c ON c.oid = t.tgrelid "
+        "WHERE c.relnamespace = %s::regnamespace AND NOT t.tgisinternal",
+        [template],
+    )
+    for trigger, table, definition in cursor.fetchall():
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{trigger}" ON "{schema_name}"."{table}"')
+        cursor.execute(definition.replace(f'{template}.', f'"{schema_name}".'))
+
+
+def validate_tenant(schema_name, name, domain):
+    if not isinstance(schema_name, str) or not SCHEMA_NAME_RE.match(schema_name):
+        raise ProvisioningError(f"Invalid schema name '{schema_name}'")
+    if schema_name in (get_public_schema_name(), template_schema()):
+        raise ProvisioningError(f"Schema name '{schema_name}' is reserved")
+    if not name:
+        raise ProvisioningError("name is required")
+    if not domain:
+        raise ProvisioningError("domain is required")
+    if Client.objects.filter(schema_name=schema_name).exists() or schema_exists(schema_name):
+        raise ProvisioningError(f"Tenant with schema '{schema_name}' already exists")
+    if Domain.objects.filter(domain=domain).exists():
+        raise ProvisioningError(f"Domain '{domain}' is already in use")
+
+
+def provision_tenant(schema_name, name, domain, description=''):
+    """
+    Create a Client, its schema (cloned from the template) and its primary
+    Domain in one transaction. The template must be current; call
+    ensure_template_schema() first.
+    """
+    validate_tenant(schema_name, name, domain)
+    template = template_schema()
+    connection.set_schema_to_public()
+    with transaction.atomic():
+        tenant = Client(schema_name=schema_name, name=name, description=description or None)
+        tenant.auto_create_schema = False
+        tenant.save()
+        with connection.cursor() as cursor:
+            _template_lock(cursor, shared=True)
+            try:
+                CloneSchema().clone_schema(template, schema_name, set_connection=False)
+            except ValidationError as exc:
+                raise ProvisioningError(f"Tenant with schema '{schema_name}' already exists") from exc
+            _copy_triggers(cursor, template, schema_name)
+        Domain.objects.create(domain=domain, tenant=tenant, is_primary=True)
+    post_schema_sync.send(sender=TenantMixin, tenant=tenant.serializable_fields())
+    return tenant
+
+
+def provision_tenants(specs, refresh_template=True):
+    """
+    Provision each of ``specs`` ({"schema_name", "name", "domain",
+    "description"}) in turn. A failure only skips that tenant. Returns one
+    result dict per spec, in order. Without ``refresh_template`` the caller
+    must have checked template_is_current().
+    """
+    if refresh_template:
+        ensure_template_schema()
+    results = []
+    for spec in specs:
+        schema_name = spec.get('schema_name')
+        started = time.monotonic()
+        try:
+            tenant = provision_tenant(schema_name, spec.get('name'), spec.get('domain'), spec.get('description', ''))
+        except (ProvisioningError, ValidationError) as exc:
+            message = exc.messages[0] if isinstance(exc, ValidationError) else str(exc)
+            results.append({"schema_name": schema_name, "status": "failed", "error": message})
+            continue
+        except DatabaseError as exc:
+            logger.exception(f"Provisioning tenant {schema_name} failed")
+            results.append({"schema_name": schema_name, "status": "failed", "error": str(exc).strip()})
+            continue
+        seconds = round(time.monotonic() - started, 3)
+        results.append({"schema_name": schema_name, "status": "created", "tenant_id": tenant.id, "seconds": seconds})
+        logger.info(f"Provisioned tenant {schema_name} in {seconds}s")
+    return results
@@ -0,0 +1,93 @@
+# tenants/schema_migrations.py
+"""
+Per-schema bookkeeping for manage.py migrate_tenants_parallel.
+
+Each tenant schema is migrated on its own by migrate_schema(), in a worker
+process, and its outcome is stored in a SchemaMigrationStatus row in the
+public schema. The row records the migration target: a digest of the
+latest migration of every tenant app. A schema already done for the
+current target is skipped, so a run that failed part-way resumes where it
+stopped, and a deploy without new tenant migrations has nothing to do.
+The provisioning template is migrated through ensure_template_schema(),
+under the template lock, so no tenant is cloned from it half-migrated.
+"""
+import hashlib
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_exists
+from .models import Client, SchemaMigrationStatus
+from .provisioning import ensure_template_schema, template_schema
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def migration_target():
+    """Digest of the leaf migrations of the tenant apps."""
+    labels = {config.label for config in apps.get_app_configs() if config.name in settings.TENANT_APPS}
+    leaves = sorted(node for node in MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes()
+                    if node[0] in labels)
+    return hashlib.sha256(repr(leaves).encode()).hexdigest()
+
+
+def tenant_schemas():
+    """Every tenant schema, plus the provisioning template if it exists."""
+    schemas = list(Client.objects.exclude(schema_name=get_public_schema_name())
+                   .order_by('schema_name').values_list('schema_name', flat=True))
+    if schema_exists(template_schema()):
+        schemas.append(template_schema())
+    return schemas
+
+
+def pending_schemas(target, only=None, force=False):
+    """Schemas still to migrate to ``target``, restricted to ``only`` if given."""
+    schemas = tenant_schemas()
+    if only:
+        schemas = [schema for schema in schemas if schema in only]
+    if not force:
+        done = set(SchemaMigrationStatus.objects
+                   .filter(status=SchemaMigrationStatus.STATUS_DONE, target=target, schema_name__in=schemas)
+                   .values_list('schema_name', flat=True))
+        schemas = [schema for schema in schemas if schema not in done]
+    return schemas
+
+
+def record_failure(schema_name, error):
+    SchemaMigrationStatus.objects.filter(schema_name=schema_name).update(
+        status=SchemaMigrationStatus.STATUS_FAILED, error=error, finished_at=timezone.now()
+    )
+
+
+def migrate_schema(schema_name, target):
+    """
+    Apply pending tenant migrations to one schema and record the outcome.
+    Runs in a worker process; returns (schema_name, status, seconds, error).
+    """
+    SchemaMigrationStatus.objects.update_or_create(schema_name=schema_name, defaults={
+        'target': target, 'status': SchemaMigrationStatus.STATUS_RUNNING, 'error': '',
+        'started_at': timezone.now(), 'finished_at': None, 'seconds': None,
+    })
+    started = time.monotonic()
+    try:
+        if schema_name == template_schema():
+            ensure_template_schema()
+        else:
+            call_command('migrate_schemas', tenant=True, schema_name=schema_name, interactive=False, verbosity=0)
+    except Exception as e:
+        logger.exception(f"Migrating schema {schema_name} failed")
+        status, error = SchemaMigrationStatus.STATUS_FAILED, str(e) or type(e).__name__
+    else:
+        status, error = SchemaMigrationStatus.STATUS_DONE, ''
+    finally:
+        connection.set_schema_to_public()
+    seconds = round(time.monotonic() - started, 3)
+
+    SchemaMigrationStatus.objects.filter(schema_name=schema_name).update(
+        status=status, error=error, finished_at=timezone.now(), seconds=seconds
+    )
+    return schema_name, status, seconds, error
@@ -0,0 +1,15 @@
+# tenants/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Client, Domain
+from .cache import tenant_cache
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_tenant_resolution(sender, **kwargs):
+    # Wait for commit so other processes cannot re-cache the old rows
+    transaction.on_commit(tenant_cache.invalidate)
@@ -1,3 +1,183 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django_tenants.test.cases import TenantTestCase
+from django_tenants.utils import schema_context
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from accounts.models import CustomUser
+from accounts.views import provision_tenants_view
+from dealership.models import Vehicle
+from dealership.search import search_vehicles
+from dealership.tests import make_vehicle
+
+from .cache import TenantResolutionCache, get_public_domain, get_public_tenant, tenant_cache
+from .models import Client, Domain, SchemaMigrationStatus
+from .provisioning import ensure_template_schema, provision_tenants, template_is_current, template_schema
+from .schema_migrations import migrate_schema, migration_target, pending_schemas
+
+
+class TenantsTestCase(TenantTestCase):
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Test Dealership'
+
+
+class TenantResolutionCacheTests(TenantsTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def worker(self):
+        # Each instance stands in for one worker process; only the shared cache is common to them
+        resolver = TenantResolutionCache()
+        resolver.local_ttl = 0
+        return resolver
+
+    def test_miss_then_local_then_shared_hit(self):
+        first, second = TenantResolutionCache(), TenantResolutionCache()
+        hostname = self.get_test_tenant_domain()
+        self.assertEqual(first.get_tenant_for_domain(hostname).pk, self.tenant.pk)
+        self.assertEqual(first.get_tenant_for_domain(hostname).pk, self.tenant.pk)
+        self.assertEqual(second.get_tenant_for_domain(hostname).pk, self.tenant.pk)
+        self.assertEqual((first.misses, first.local_hits), (1, 1))
+        self.assertEqual((second.misses, second.shared_hits), (0, 1))
+
+    def test_unknown_hostnames_are_cached_as_none(self):
+        resolver = TenantResolutionCache()
+        self.assertIsNone(resolver.get_tenant_for_domain('unknown.localhost'))
+        self.assertIsNone(resolver.get_tenant_for_domain('unknown.localhost'))
+        self.assertEqual(resolver.misses, 1)
+
+    def test_domain_changes_reach_other_workers(self):
+        first, second = self.worker(), self.worker()
+        self.assertIsNone(first.get_tenant_for_domain('moved.localhost'))
+        self.assertIsNone(second.get_tenant_for_domain('moved.localhost'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            domain = Domain.objects.create(domain='moved.localhost', tenant=self.tenant, is_primary=False)
+        self.assertEqual(second.get_tenant_for_domain('moved.localhost').pk, self.tenant.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            domain.delete()
+        self.assertIsNone(second.get_tenant_for_domain('moved.localhost'))
+        self.assertEqual((second.shared_hits, second.misses), (1, 2))
+
+
+class PublicTenantTests(TenantsTestCase):
+    def setUp(self):
+        cache.clear()
+        tenant_cache.invalidate()
+
+    def test_public_tenant_and_domain_are_loaded_once_and_refreshed(self):
+        self.assertIsNone(get_public_tenant())
+        self.assertIsNone(get_public_domain())
+
+        connection.set_schema_to_public()
+        self.addCleanup(connection.set_tenant, self.tenant)
+        public = Client(schema_name='public', name='Public')
+        public.auto_create_schema = False
+        with self.captureOnCommitCallbacks(execute=True):
+            public.save()
+            Domain.objects.create(domain='secondary.localhost', tenant=public, is_primary=False)
+            Domain.objects.create(domain='public.localhost', tenant=public, is_primary=True)
+
+        self.assertEqual(get_public_tenant().pk, public.pk)
+        self.assertEqual(get_public_domain(), 'public.localhost')
+        misses = tenant_cache.misses
+        get_public_tenant(), get_public_domain()
+        self.assertEqual(tenant_cache.misses, misses)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Domain.objects.filter(domain='public.localhost').delete()
+        self.assertEqual(get_public_domain(), 'secondary.localhost')
+
+
+class TenantProvisioningTests(TenantsTestCase):
+    def setUp(self):
+        self.addCleanup(connection.set_tenant, self.tenant)
+
+    def test_tenants_are_cloned_from_the_migrated_template(self):
+        results = provision_tenants([
+            {'schema_name': 'clone_one', 'name': 'Clone One', 'domain': 'clone-one.test.com'},
+            {'schema_name': 'clone_one', 'name': 'Again', 'domain': 'clone-again.test.com'},
+            {'schema_name': 'Bad-Name', 'name': 'Bad', 'domain': 'bad.test.com'},
+        ])
+        self.assertEqual([result['status'] for result in results], ['created', 'failed', 'failed'])
+        tenant = Client.objects.get(schema_name='clone_one')
+        self.assertEqual(tenant.get_primary_domain().domain, 'clone-one.test.com')
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT app, name FROM clone_one.django_migrations EXCEPT "
+                           f"SELECT app, name FROM {template_schema()}.django_migrations")
+            self.assertEqual(cursor.fetchall(), [])
+            # The search trigger calls the clone's own function
+            cursor.execute("SELECT pg_get_triggerdef(t.oid) FROM pg_trigger t JOIN pg_class c ON c.oid = t.tgrelid "
+                           "WHERE c.relnamespace = 'clone_one'::regnamespace AND NOT t.tgisinternal")
+            self.assertIn('EXECUTE FUNCTION clone_one.dealership_vehicle_search_vector()', cursor.fetchone()[0])
+
+        with schema_context('clone_one'):
+            make_vehicle(vehicle_make='Toyota', vehicle_model='Corolla', license_plate_number='CLN1')
+            self.assertEqual(search_vehicles('toyo')[1], 1)
+        with schema_context(template_schema()):
+            self.assertFalse(Vehicle.objects.exists())
+
+    def provision_request(self, user, schema_name='clone_two'):
+        request = APIRequestFactory().post('/accounts/api/provision-tenants/', {'tenants': [
+            {'schema_name': schema_name, 'name': 'Clone Two', 'domain': f'{schema_name}.test.com'},
+        ]}, format='json')
+        force_authenticate(request, user=user)
+        return provision_tenants_view(request)
+
+    def test_only_platform_admins_can_provision(self):
+        response = self.provision_request(CustomUser(username='provision-tester', tenant=self.tenant))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Client.objects.filter(schema_name='clone_two').exists())
+
+    def test_api_refuses_an_outdated_template_without_migrating_it(self):
+        admin = CustomUser.objects.create_superuser('platform', 'platform@example.com', 'x')
+        with mock.patch('accounts.views.template_is_current', return_value=False), \
+                mock.patch('tenants.provisioning.ensure_template_schema') as ensure:
+            self.assertEqual(self.provision_request(admin).status_code, 409)
+        ensure.assert_not_called()
+        self.assertFalse(Client.objects.filter(schema_name='clone_two').exists())
+
+        ensure_template_schema()
+        with mock.patch('tenants.provisioning.ensure_template_schema') as ensure:
+            self.assertEqual(self.provision_request(admin).status_code, 201)
+        ensure.assert_not_called()
+        self.assertTrue(Client.objects.filter(schema_name='clone_two').exists())
+
+    def test_template_is_not_current_until_created(self):
+        with override_settings(TENANT_TEMPLATE_SCHEMA='no_such_template'):
+            self.assertFalse(template_is_current())
+
+
+class SchemaMigrationTests(TenantsTestCase):
+    def setUp(self):
+        self.addCleanup(connection.set_tenant, self.tenant)
+
+    def test_migrated_schemas_are_skipped_until_the_target_changes(self):
+        schema = self.tenant.schema_name
+        target = migration_target()
+        self.assertEqual(pending_schemas(target, only=[schema]), [schema])
+
+        self.assertEqual(migrate_schema(schema, target)[1], SchemaMigrationStatus.STATUS_DONE)
+        self.assertEqual(pending_schemas(target, only=[schema]), [])
+        self.assertEqual(pending_schemas('0' * 64, only=[schema]), [schema])
+        self.assertEqual(pending_schemas(target, only=[schema], force=True), [schema])
+
+    def test_failures_are_recorded(self):
+        schema_name, status, _, error = migrate_schema('no_such_schema', migration_target())
+        self.assertEqual(status, SchemaMigrationStatus.STATUS_FAILED)
+        self.assertEqual(SchemaMigrationStatus.objects.get(schema_name=schema_name).error, error)
+
+    def test_template_is_migrated_under_the_template_lock(self):
+        ensure_template_schema()
+        target = migration_target()
+        with mock.patch('tenants.schema_migrations.ensure_template_schema') as ensure, \
+                mock.patch('tenants.schema_migrations.call_command') as migrate:
+            self.assertEqual(migrate_schema(template_schema(), target)[1], SchemaMigrationStatus.STATUS_DONE)
+        ensure.assert_called_once_with()
+        migrate.assert_not_called()
+        self.assertIn(template_schema(), pending_schemas(target, force=True))
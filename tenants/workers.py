@@ -0,0 +1,102 @@
+# tenants/workers.py
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerCommand(BaseCommand):
+    """
+    Base for commands that drain a public-schema job queue (ExportJob,
+    ImageJob, MatchingJob) in a pool of worker processes. Subclasses set
+    ``job_model``, a ``label`` for output and ``run_job``, a module-level
+    function taking a job id and returning True on success.
+    """
+    job_model = None
+    label = 'job'
+    run_job = None
+    # Extra fields reset when a stale job is requeued
+    requeue_reset = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                            help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=30,
+                            help='Requeue jobs left running for this many minutes by a dead worker')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever')
+
+    def claim_jobs(self, limit):
+        """Mark up to ``limit`` queued jobs as running; other workers skip them."""
+        model = self.job_model
+        with transaction.atomic():
+            job_ids = list(model.objects
+                           .select_for_update(skip_locked=True)
+                           .filter(status=model.STATUS_QUEUED)
+                           .order_by('created_at')
+                           .values_list('id', flat=True)[:limit])
+            model.objects.filter(id__in=job_ids).update(
+                status=model.STATUS_RUNNING, started_at=timezone.now()
+            )
+        return job_ids
+
+    def requeue_stale_jobs(self, minutes):
+        model = self.job_model
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        requeued = (model.objects
+                    .filter(status=model.STATUS_RUNNING, started_at__lt=cutoff)
+                    .update(status=model.STATUS_QUEUED, **self.requeue_reset))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale {self.label} job(s)'))
+
+    def handle(self, *args, **options):
+        model = self.job_model
+        run_job = type(self).run_job
+        processes = max(1, options['processes'])
+        self.requeue_stale_jobs(options['stale_after'])
+
+        self.stdout.write(self.style.SUCCESS(f'{self.label.capitalize()} worker started with {processes} process(es)'))
+        running = {}
+        # Spawned (not forked) children open their own database connections
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+        with pool:
+            while True:
+                for job_id in self.claim_jobs(processes - len(running)):
+                    running[pool.submit(run_job, job_id)] = job_id
+                    logger.debug(f"Dispatched {self.label} job {job_id}")
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        # The child died before it could record the failure itself
+                        ok = False
+                        model.objects.filter(pk=job_id).update(
+                            status=model.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+                        )
+                    style = self.style.SUCCESS if ok else self.style.ERROR
+                    self.stdout.write(style(f'{self.label.capitalize()} job {job_id} {"finished" if ok else "failed"}'))
+
+        self.stdout.write(self.style.SUCCESS(f'{self.label.capitalize()} queue drained'))